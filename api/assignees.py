@@ -0,0 +1,125 @@
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Lower, Trim
+
+
+class ContactIndex:
+    """
+    In-memory lookup of contacts used to resolve task assignees.
+    Legacy clients describe assignees in the ``assignedTo`` JSON as contact objects
+    or names. The index maps those descriptions to contact ids without a query per
+    entry, so a whole batch of tasks is resolved with the single query that loads it.
+    Attributes:
+        ids (set): The ids of all contacts.
+    """
+    def __init__(self, rows):
+        """
+        Builds the index.
+        Args:
+            rows (iterable): Tuples of (id, name, surname, email) for every contact.
+        """
+        self.ids = set()
+        self.by_email = {}
+        self.by_name = {}
+        for pk, name, surname, email in rows:
+            self.ids.add(pk)
+            if email:
+                self.by_email.setdefault(email.lower(), pk)
+            full_name = f'{name} {surname}'.strip().lower()
+            self.by_name.setdefault(full_name, pk)
+            self.by_name.setdefault((name or '').strip().lower(), pk)
+
+    @classmethod
+    def load(cls, contacts):
+        """
+        Loads the index with one query.
+        Args:
+            contacts (QuerySet): The Contact queryset (or historical model manager) to index.
+        Returns:
+            ContactIndex: The loaded index.
+        """
+        return cls(contacts.values_list('id', 'name', 'surname', 'email'))
+
+    @classmethod
+    def load_matching(cls, contacts, *values):
+        """
+        Loads an index of only the contacts some assignee values may refer to, for a single
+        write: contact ids become ``WHERE id IN (...)``, emails and names are matched ignoring
+        case. Without any id, email or name no query is made.
+        Args:
+            contacts (QuerySet): The Contact queryset to index.
+            *values: Assignee id lists or legacy ``assignedTo`` JSON values.
+        Returns:
+            ContactIndex: The loaded index.
+        """
+        ids, emails, names = set(), set(), set()
+        for value in values:
+            for entry in value if isinstance(value, list) else [value]:
+                if isinstance(entry, bool):
+                    continue
+                if isinstance(entry, int):
+                    ids.add(entry)
+                elif isinstance(entry, str):
+                    names.add(entry.strip().lower())
+                elif isinstance(entry, dict):
+                    if isinstance(entry.get('id'), int):
+                        ids.add(entry['id'])
+                    if isinstance(entry.get('email'), str):
+                        emails.add(entry['email'].lower())
+                    names.add(f"{entry.get('name') or ''} {entry.get('surname') or ''}".strip().lower())
+        names.discard('')
+        if not ids and not emails and not names:
+            return cls([])
+        condition = Q(pk__in=ids)
+        if emails:
+            contacts = contacts.annotate(email_ci=Lower('email'))
+            condition |= Q(email_ci__in=emails)
+        if names:
+            contacts = contacts.annotate(name_ci=Lower(Trim('name')),
+                                         full_name_ci=Lower(Trim(Concat('name', Value(' '), 'surname'))))
+            condition |= Q(name_ci__in=names) | Q(full_name_ci__in=names)
+        return cls.load(contacts.filter(condition))
+
+    def resolve(self, assigned_to):
+        """
+        Resolves an ``assignedTo`` value to contact ids.
+        Entries may be contact ids, dicts with an 'id', 'email' or 'name'/'surname',
+        or plain strings holding a full name. Entries that match no contact are skipped.
+        Args:
+            assigned_to: The legacy ``assignedTo`` JSON value.
+        Returns:
+            list: The ids of the matching contacts, without duplicates, in input order.
+        """
+        if assigned_to is None:
+            return []
+        entries = assigned_to if isinstance(assigned_to, list) else [assigned_to]
+        resolved = []
+        for entry in entries:
+            pk = self._resolve_entry(entry)
+            if pk is not None and pk not in resolved:
+                resolved.append(pk)
+        return resolved
+
+    def _resolve_entry(self, entry):
+        """
+        Resolves a single entry of ``assignedTo``.
+        Args:
+            entry: An id, dict or name.
+        Returns:
+            int or None: The contact id, or None if nothing matches.
+        """
+        if isinstance(entry, bool):
+            return None
+        if isinstance(entry, int):
+            return entry if entry in self.ids else None
+        if isinstance(entry, str):
+            return self.by_name.get(entry.strip().lower())
+        if isinstance(entry, dict):
+            pk = entry.get('id')
+            if isinstance(pk, int) and not isinstance(pk, bool) and pk in self.ids:
+                return pk
+            email = entry.get('email')
+            if isinstance(email, str) and email.lower() in self.by_email:
+                return self.by_email[email.lower()]
+            name = f"{entry.get('name') or ''} {entry.get('surname') or ''}".strip().lower()
+            return self.by_name.get(name) if name else None
+        return None
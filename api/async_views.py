@@ -0,0 +1,286 @@
+from asgiref.sync import sync_to_async
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAcceptable, NotAuthenticated, NotFound
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from .authentication import CachedTokenAuthentication
+from .conditional import alist_validators, detail_etag, not_modified, set_validators
+from .fast_serializers import values_serializer
+from .filters import filter_tasks
+from .models import Task, Contact
+from .serializers import TaskItemSerializer, ContactSerializer
+from .views import TasksItemView, ContactView
+
+
+class AsyncAPIView(View):
+    """
+    Base class of the async views served under ASGI (see ``ASYNC_VIEWS``).
+    DRF views are synchronous, so under ASGI every request to them runs in a worker
+    thread. Requests handled here by ``native_methods`` run on the event loop: token
+    authentication, queries (async ORM) and cache lookups are awaited, so a request
+    waiting on the database or for another request's cache entry holds no thread.
+    All other requests (writes, OPTIONS) and requests for the browsable API are passed
+    to ``sync_view`` in a thread, so validation, signals and change versions stay in one place.
+    Attributes:
+        sync_view (type): The DRF view serving what is not handled natively.
+        native_methods (tuple): The HTTP methods handled on the event loop.
+        authentication (CachedTokenAuthentication): The token authentication.
+        renderer_classes (list): The renderers to negotiate between.
+    """
+    sync_view = None
+    native_methods = ('get', 'head')
+    authentication = CachedTokenAuthentication()
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        """
+        Returns the view function, exempt from CSRF checks like DRF views (tokens are not sent by browsers).
+        Returns:
+            callable: The async view function.
+        """
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Authenticates the request, negotiates the renderer and runs the handler.
+        Args:
+            request (HttpRequest): The incoming request.
+            *args: Positional URL arguments.
+            **kwargs: Keyword URL arguments.
+        Returns:
+            HttpResponse: The rendered response.
+        """
+        if request.method.lower() not in self.native_methods:
+            return await self.delegate(request, *args, **kwargs)
+        request = Request(request, negotiator=DefaultContentNegotiation())
+        try:
+            renderer, media_type = request.negotiator.select_renderer(
+                request, [renderer() for renderer in self.renderer_classes])
+        except NotAcceptable as exc:
+            renderer, media_type = self.renderer_classes[0](), self.renderer_classes[0].media_type
+            request.accepted_renderer, request.accepted_media_type = renderer, media_type
+            return self.finalize_response(request, self.handle_exception(request, exc))
+        if renderer.format == 'api':
+            return await self.delegate(request._request, *args, **kwargs)
+        request.accepted_renderer, request.accepted_media_type = renderer, media_type
+        try:
+            credentials = await self.authentication.aauthenticate(request._request)
+            if credentials is None:
+                raise NotAuthenticated()
+            request.user, request.auth = credentials
+            response = await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            response = self.handle_exception(request, exc)
+        return self.finalize_response(request, response)
+
+    async def delegate(self, request, *args, **kwargs):
+        """
+        Passes a request to the sync view in a worker thread.
+        Args:
+            request (HttpRequest): The incoming request.
+            *args: Positional URL arguments.
+            **kwargs: Keyword URL arguments.
+        Returns:
+            HttpResponse: The rendered response of the sync view.
+        """
+        return await sync_to_async(self.run_sync_view)(request, *args, **kwargs)
+
+    def run_sync_view(self, request, *args, **kwargs):
+        """
+        Runs the sync view and renders its response, in the worker thread.
+        Args:
+            request (HttpRequest): The incoming request.
+            *args: Positional URL arguments.
+            **kwargs: Keyword URL arguments.
+        Returns:
+            HttpResponse: The rendered response.
+        """
+        response = self.sync_view.as_view()(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def handle_exception(self, request, exc):
+        """
+        Turns an API exception into an error response, the way DRF views do.
+        Args:
+            request (Request): The incoming request.
+            exc (APIException): The exception.
+        Returns:
+            Response: The error response.
+        """
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            exc.auth_header = self.authentication.authenticate_header(request)
+        return exception_handler(exc, {'view': self, 'args': self.args, 'kwargs': self.kwargs, 'request': request})
+
+    def finalize_response(self, request, response):
+        """
+        Renders a response with the negotiated renderer and adds the Allow and Vary headers.
+        Args:
+            request (Request): The incoming request.
+            response (HttpResponse): The response of the handler.
+        Returns:
+            HttpResponse: The rendered response.
+        """
+        if isinstance(response, Response) and not response.is_rendered:
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = {'view': self, 'args': self.args, 'kwargs': self.kwargs, 'request': request}
+            response.render()
+        response['Allow'] = ', '.join(self._allowed_methods())
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Passes the request to the sync view.
+        """
+        return await self.delegate(request, *args, **kwargs)
+
+    async def put(self, request, *args, **kwargs):
+        """
+        Passes the request to the sync view.
+        """
+        return await self.delegate(request, *args, **kwargs)
+
+    async def patch(self, request, *args, **kwargs):
+        """
+        Passes the request to the sync view.
+        """
+        return await self.delegate(request, *args, **kwargs)
+
+    async def delete(self, request, *args, **kwargs):
+        """
+        Passes the request to the sync view.
+        """
+        return await self.delegate(request, *args, **kwargs)
+
+
+class AsyncModelView(AsyncAPIView):
+    """
+    Async list and detail reads of a model, rendering the same output as its sync view.
+    Rows are read as ``values()`` rows with async iteration and rendered by the
+    compiled ValuesSerializer; ``?fields=``/``?exclude=``, ETags with 304 responses
+    and the response cache work as in the sync view.
+    Attributes:
+        model (type): The model to read.
+        serializer_class (type): The serializer whose output is rendered.
+        not_found (str): The message of a 404 for a missing row.
+    """
+    model = None
+    serializer_class = None
+    not_found = 'Not found'
+
+    async def get(self, request, pk=None, format=None):
+        """
+        Retrieve a single row by its id, or the list if no id is provided.
+        Args:
+            request (Request): The incoming request.
+            pk (int, optional): The primary key of the row.
+            format (str, optional): The format of the response.
+        Returns:
+            HttpResponse: The serialized row(s) with their validators, or 304.
+        Raises:
+            NotFound: If the requested row does not exist.
+        """
+        if pk:
+            return await self.retrieve(request, pk)
+
+        async def compute():
+            return self.finalize_response(request, await self.list(request))
+        return await self.sync_view.response_cache.afetch(request, compute)
+
+    async def retrieve(self, request, pk):
+        """
+        Read a single row.
+        Args:
+            request (Request): The incoming request.
+            pk (int): The primary key of the row.
+        Returns:
+            Response: The serialized row with its ETag, or 304.
+        Raises:
+            NotFound: If the row does not exist.
+        """
+        serializer = values_serializer(self.serializer_class).project(self.serializer_class.requested_fields(request))
+        row = await serializer.values(self.model.objects.filter(pk=pk), extra=('version',)).afirst()
+        if row is None:
+            raise NotFound(detail=self.not_found, code=404)
+        etag = detail_etag(request, self.model, pk, row['version'])
+        response = not_modified(request, etag)
+        if response:
+            return response
+        data = await serializer.aserialize([row])
+        return set_validators(Response(data[0]), etag)
+
+    async def list(self, request):
+        """
+        Compute the list of rows.
+        Args:
+            request (Request): The incoming request.
+        Returns:
+            Response: The serialized rows and their validators, or 304.
+        """
+        etag, last_modified = await alist_validators(request, self.model)
+        response = not_modified(request, etag, last_modified)
+        if response:
+            return response
+        serializer = values_serializer(self.serializer_class).project(self.serializer_class.requested_fields(request))
+        return set_validators(Response(await serializer.aserialize(serializer.values(self.model.objects.all()))),
+                              etag, last_modified)
+
+
+class AsyncTasksItemView(AsyncModelView):
+    """
+    Async variant of TasksItemView.
+    * Requires token authentication.
+    * Only authenticated users are able to access this view.
+    Lists are filtered and paginated like the sync view (see filter_tasks and TaskCursorPagination).
+    """
+    sync_view = TasksItemView
+    model = Task
+    serializer_class = TaskItemSerializer
+    not_found = 'Task not found'
+
+    async def list(self, request):
+        """
+        Compute a page (or, with ``?paginate=false``, all) of the filtered tasks.
+        Args:
+            request (Request): The incoming request.
+        Returns:
+            Response: The serialized tasks and their validators, or 304.
+        """
+        etag, last_modified = await alist_validators(request, Task)
+        response = not_modified(request, etag, last_modified)
+        if response:
+            return response
+        serializer = values_serializer(TaskItemSerializer).project(TaskItemSerializer.requested_fields(request))
+        paginator = self.sync_view.pagination_class()
+        todos = serializer.values(filter_tasks(Task.objects.all(), request.query_params),
+                                  extra=paginator.get_ordering(request))
+        if request.query_params.get('paginate') == 'false':
+            if paginator.ordering_query_param in request.query_params:
+                todos = todos.order_by(*paginator.get_ordering(request))
+            response = Response(await serializer.aserialize(todos))
+        else:
+            page = await paginator.apaginate_queryset(todos, request, view=self)
+            response = paginator.get_paginated_response(await serializer.aserialize(page))
+        return set_validators(response, etag, last_modified)
+
+
+class AsyncContactView(AsyncModelView):
+    """
+    Async variant of ContactView.
+    * Requires token authentication.
+    * Only authenticated users are able to access this view.
+    """
+    sync_view = ContactView
+    model = Contact
+    serializer_class = ContactSerializer
+    not_found = 'User not found'
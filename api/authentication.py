@@ -0,0 +1,372 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+
+DEFAULT_TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': 1024,
+    'TTL': 60,
+    'USE_DJANGO_CACHE': False,
+}
+
+
+class TokenCache:
+    """
+    Thread-safe in-process LRU cache of resolved tokens with a time to live. Entries
+    may carry the generation of their token (see token_generation()); an entry whose
+    generation is no longer current is dropped on read.
+    Attributes:
+        max_size (int): Maximum number of cached tokens; the least recently used is evicted first.
+        ttl (float): Seconds a cached token stays valid.
+    """
+    def __init__(self, max_size, ttl):
+        """
+        Creates an empty cache.
+        Args:
+            max_size (int): Maximum number of cached tokens.
+            ttl (float): Seconds a cached token stays valid.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, generation=None):
+        """
+        Returns the cached token for a key, or None if it is missing, expired or of another generation.
+        Args:
+            key (str): The token key.
+            generation (str, optional): The current generation of the token.
+        Returns:
+            Token or None: The cached token with its user.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, expires, cached_generation = entry
+            if expires < time.monotonic() or cached_generation != generation:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token, generation=None):
+        """
+        Caches a resolved token.
+        Args:
+            key (str): The token key.
+            token (Token): The token with its user loaded.
+            generation (str, optional): The generation of the token when it was resolved.
+        """
+        with self._lock:
+            self._entries[key] = (token, time.monotonic() + self.ttl, generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Drops a token from the cache.
+        Args:
+            key (str): The token key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Drops all cached tokens.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+def get_cache_settings():
+    """
+    Returns the token cache settings, ``TOKEN_AUTH_CACHE`` merged over the defaults.
+    Returns:
+        dict: The settings.
+    """
+    return {**DEFAULT_TOKEN_AUTH_CACHE, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+
+
+_settings = get_cache_settings()
+token_cache = TokenCache(_settings['MAX_SIZE'], _settings['TTL'])
+
+
+def shared_cache_key(key, prefix='auth-token:'):
+    """
+    Returns the Django cache key of a token. The token itself is hashed so that it
+    never shows up in a shared cache backend.
+    Args:
+        key (str): The token key.
+        prefix (str, optional): The key prefix, e.g. 'auth-token-generation:' for the generation.
+    Returns:
+        str: The cache key.
+    """
+    return prefix + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def generation_key(key):
+    """
+    Returns the Django cache key of the generation of a token.
+    Args:
+        key (str): The token key.
+    Returns:
+        str: The cache key.
+    """
+    return shared_cache_key(key, 'auth-token-generation:')
+
+
+def token_generation(key):
+    """
+    Returns the generation of a token in the shared cache, with USE_DJANGO_CACHE.
+    forget_token() replaces it, so every process drops its in-process entry of the
+    token on the next request, without waiting for the TTL. The marker lives for the
+    TTL, as long as any entry resolved before it was set; if the cache backend evicts
+    it early, other processes may accept the token until their entry expires.
+    Args:
+        key (str): The token key.
+    Returns:
+        str or None: The generation, None if the token was not revoked within the TTL.
+    """
+    return cache.get(generation_key(key))
+
+
+async def atoken_generation(key):
+    """
+    Async variant of token_generation().
+    """
+    return await cache.aget(generation_key(key))
+
+
+def cached_shared(entry, generation):
+    """
+    Returns the token of a shared cache entry if it was stored in the current generation.
+    Args:
+        entry (tuple or None): The generation and the token, as stored by authentication.
+        generation (str or None): The current generation of the token.
+    Returns:
+        Token or None: The token, or None if the entry is missing or stale.
+    """
+    if entry is None or entry[0] != generation:
+        return None
+    return entry[1]
+
+
+def forget_token(key):
+    """
+    Drops a token from the in-process cache and, if enabled, from the Django cache,
+    replacing its generation there so other processes drop their copy as well.
+    Called when a token is deleted or its user changes, so the change takes effect
+    on the next request.
+    Args:
+        key (str): The token key.
+    """
+    token_cache.delete(key)
+    if get_cache_settings()['USE_DJANGO_CACHE']:
+        cache.set(generation_key(key), uuid.uuid4().hex, token_cache.ttl)
+        cache.delete(shared_cache_key(key))
+
+
+async def aforget_token(key):
+    """
+    Async variant of forget_token().
+    """
+    token_cache.delete(key)
+    if get_cache_settings()['USE_DJANGO_CACHE']:
+        await cache.aset(generation_key(key), uuid.uuid4().hex, token_cache.ttl)
+        await cache.adelete(shared_cache_key(key))
+
+
+def get_token_ttl():
+    """
+    Returns how long a token stays valid without being used.
+    Returns:
+        timedelta: The ``TOKEN_TTL`` setting (seconds), one week by default.
+    """
+    return timedelta(seconds=getattr(settings, 'TOKEN_TTL', 7 * 24 * 3600))
+
+
+def is_expired(token, now=None):
+    """
+    Tells whether a token has not been used (or refreshed) for longer than the TTL.
+    Args:
+        token (Token): The token to check. Its ``created`` field holds the last refresh.
+        now (datetime, optional): The current time.
+    Returns:
+        bool: True if the token is expired.
+    """
+    return token.created < (now or timezone.now()) - get_token_ttl()
+
+
+def refresh_token(token, now=None):
+    """
+    Slides the expiry of a token forward once less than half of its TTL is left.
+    At most one UPDATE per token and half TTL is issued.
+    Args:
+        token (Token): The token in use.
+        now (datetime, optional): The current time.
+    Returns:
+        bool: True if the token was refreshed.
+    """
+    now = now or timezone.now()
+    if token.created >= now - get_token_ttl() / 2:
+        return False
+    Token.objects.filter(key=token.key).update(created=now)
+    token.created = now
+    return True
+
+
+async def arefresh_token(token, now=None):
+    """
+    Async variant of refresh_token().
+    Args:
+        token (Token): The token in use.
+        now (datetime, optional): The current time.
+    Returns:
+        bool: True if the token was refreshed.
+    """
+    now = now or timezone.now()
+    if token.created >= now - get_token_ttl() / 2:
+        return False
+    await Token.objects.filter(key=token.key).aupdate(created=now)
+    token.created = now
+    return True
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that remembers resolved tokens.
+    DRF's TokenAuthentication joins the token and user tables on every request. This
+    class keeps resolved tokens in an in-process LRU with a TTL (see TOKEN_AUTH_CACHE)
+    and, if USE_DJANGO_CACHE is set, in the Django cache shared between processes.
+    Deleting a token or saving its user evicts it (see api.signals). With the shared
+    cache, other processes check the token's generation there on every request (one
+    cache read, no query) and see the eviction immediately; without it they keep
+    accepting the token until their entry expires, after the TTL at the latest.
+    Tokens expire after ``TOKEN_TTL`` seconds without use; using a token slides its expiry.
+    """
+    def authenticate_credentials(self, key):
+        """
+        Resolves a token key to its user, consulting the caches first.
+        Args:
+            key (str): The token key from the Authorization header.
+        Returns:
+            tuple: The user and the token.
+        Raises:
+            AuthenticationFailed: If the token is invalid or expired, or the user is inactive.
+        """
+        use_shared = get_cache_settings()['USE_DJANGO_CACHE']
+        generation = token_generation(key) if use_shared else None
+        token = token_cache.get(key, generation)
+        if token is None and use_shared:
+            token = cached_shared(cache.get(shared_cache_key(key)), generation)
+            if token is not None:
+                token_cache.set(key, token, generation)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, token, generation)
+            if use_shared:
+                cache.set(shared_cache_key(key), (generation, token), token_cache.ttl)
+        now = timezone.now()
+        if is_expired(token, now):
+            Token.objects.filter(key=key).delete()
+            forget_token(key)
+            raise AuthenticationFailed('Token has expired.')
+        if refresh_token(token, now) and use_shared:
+            cache.set(shared_cache_key(key), (generation, token), token_cache.ttl)
+        return (token.user, token)
+
+    async def aauthenticate(self, request):
+        """
+        Async variant of authenticate(), for async views.
+        Args:
+            request (HttpRequest): The incoming request.
+        Returns:
+            tuple or None: The user and the token, or None if no token was sent.
+        Raises:
+            AuthenticationFailed: If the header is malformed, the token is invalid or expired,
+            or the user is inactive.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+        if len(auth) > 2:
+            raise AuthenticationFailed(_('Invalid token header. Token string should not contain spaces.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed(_('Invalid token header. Token string should not contain invalid characters.'))
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        """
+        Async variant of authenticate_credentials().
+        Args:
+            key (str): The token key from the Authorization header.
+        Returns:
+            tuple: The user and the token.
+        Raises:
+            AuthenticationFailed: If the token is invalid or expired, or the user is inactive.
+        """
+        use_shared = get_cache_settings()['USE_DJANGO_CACHE']
+        generation = await atoken_generation(key) if use_shared else None
+        token = token_cache.get(key, generation)
+        if token is None and use_shared:
+            token = cached_shared(await cache.aget(shared_cache_key(key)), generation)
+            if token is not None:
+                token_cache.set(key, token, generation)
+        if token is None:
+            try:
+                token = await self.get_model().objects.select_related('user').aget(key=key)
+            except self.get_model().DoesNotExist:
+                raise AuthenticationFailed(_('Invalid token.'))
+            if not token.user.is_active:
+                raise AuthenticationFailed(_('User inactive or deleted.'))
+            token_cache.set(key, token, generation)
+            if use_shared:
+                await cache.aset(shared_cache_key(key), (generation, token), token_cache.ttl)
+        now = timezone.now()
+        if is_expired(token, now):
+            await Token.objects.filter(key=key).adelete()
+            await aforget_token(key)
+            raise AuthenticationFailed('Token has expired.')
+        if await arefresh_token(token, now) and use_shared:
+            await cache.aset(shared_cache_key(key), (generation, token), token_cache.ttl)
+        return (token.user, token)
+
+
+class QueryTokenAuthentication(CachedTokenAuthentication):
+    """
+    Token authentication reading the token from ``?token=``, for browser EventSource
+    clients, which cannot send an Authorization header. URLs end up in access logs,
+    so only the event stream accepts it.
+    """
+    def authenticate(self, request):
+        """
+        Authenticates with the token from the query string.
+        Args:
+            request (Request): The incoming request.
+        Returns:
+            tuple or None: The user and the token, or None if no token was given.
+        Raises:
+            AuthenticationFailed: If the token is invalid or expired, or the user is inactive.
+        """
+        key = request.query_params.get('token')
+        if not key:
+            return None
+        return self.authenticate_credentials(key)
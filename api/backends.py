@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models.functions import Lower
+
+
+def filter_by_email(queryset, email):
+    """
+    Filters users by email, ignoring case.
+    The filter compares ``LOWER(email)``, so it is answered by the expression index
+    created in migration 0024 instead of a scan of the user table.
+    Args:
+        queryset (QuerySet): The users to filter.
+        email (str): The email address to look up.
+    Returns:
+        QuerySet: The users with that email address.
+    """
+    return queryset.annotate(email_lower=Lower('email')).filter(email_lower=email.lower())
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authentication backend that logs users in with their email address and password.
+    The user is fetched with one indexed query and the password is checked against
+    that row. Calls without an ``email`` fall through to the next backend.
+    """
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        """
+        Authenticates a user by email and password.
+        Args:
+            request (HttpRequest): The current request, or None.
+            email (str): The email address of the user.
+            password (str): The password to check.
+            **kwargs: Credentials meant for other backends.
+        Returns:
+            User or None: The user if the credentials are valid and the user is active.
+        """
+        if not email or password is None:
+            return None
+        UserModel = get_user_model()
+        user = filter_by_email(UserModel._default_manager.all(), email).first()
+        if user is None:
+            # Run the password hasher once to reduce the timing difference
+            # between an existing and a nonexistent user (see ModelBackend).
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
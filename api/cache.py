@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import time
+from functools import partial
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.http import parse_http_date_safe
+from .conditional import not_modified
+from .models import ChangeCounter
+
+
+DEFAULT_RESPONSE_CACHE = {
+    'CACHE': 'default',
+    'TIMEOUT': 300,
+    'LOCK_TIMEOUT': 10,
+    'WAIT': 5,
+    'POLL_INTERVAL': 0.05,
+}
+
+
+def get_response_cache_settings():
+    """
+    Returns the response cache settings, ``RESPONSE_CACHE`` merged over the defaults.
+    Returns:
+        dict: The settings.
+    """
+    return {**DEFAULT_RESPONSE_CACHE, **getattr(settings, 'RESPONSE_CACHE', {})}
+
+
+def get_cache():
+    """
+    Returns the Django cache holding the cached responses.
+    Returns:
+        BaseCache: The cache backend.
+    """
+    return caches[get_response_cache_settings()['CACHE']]
+
+
+class ResponseCache:
+    """
+    Cache of rendered list responses, per model, user and request.
+    Entries are keyed by the table's ChangeCounter (its value and update time, read
+    with one lookup by the unique name), the user and the full path with the
+    negotiated media type, and hold the rendered body with its content type and
+    validators. Every committed write to the table moves the counter, so entries of
+    the previous state are no longer read, in every process and with any cache
+    backend; they expire after TIMEOUT. The update time tells apart a value handed out
+    again after a write was rolled back. A miss is computed by a single request: the
+    first one takes a lock with ``cache.add``, the others wait for its entry (up to
+    WAIT seconds) instead of running the same queries. The counter and a miss are read
+    from the database the request reads from, e.g. a replica: an entry computed from a
+    lagging replica is keyed on that replica's counter, i.e. on the state it holds, so
+    it is correct for every request that reads the same counter, on any database.
+    Attributes:
+        model (type): The model whose list is cached.
+    """
+    headers = ('ETag', 'Last-Modified')
+
+    def __init__(self, model):
+        """
+        Creates the cache for the list of a model.
+        Args:
+            model (type): The model class.
+        """
+        self.model = model
+
+    def key(self, request):
+        """
+        Returns the cache key of a request.
+        Args:
+            request (Request): The incoming request.
+        Returns:
+            str: The cache key.
+        """
+        return self.make_key(request, self.counter().first())
+
+    async def akey(self, request):
+        """
+        Async variant of key().
+        Args:
+            request (Request): The incoming request.
+        Returns:
+            str: The cache key.
+        """
+        return self.make_key(request, await self.counter().afirst())
+
+    def counter(self):
+        """
+        Selects the value and update time of the table's change counter.
+        Returns:
+            QuerySet: The counter row as a (value, updated_at) tuple, missing if the table was never written.
+        """
+        return ChangeCounter.objects.filter(name=self.model._meta.model_name).values_list('value', 'updated_at')
+
+    def make_key(self, request, counter):
+        """
+        Builds the cache key of a request.
+        Args:
+            request (Request): The incoming request.
+            counter (tuple or None): The change counter's value and update time, None if the table was never written.
+        Returns:
+            str: The cache key.
+        """
+        value, updated_at = counter or (0, None)
+        version = f'{value}-{updated_at.timestamp() if updated_at else 0}'
+        variant = f'{request.get_full_path()}|{request.accepted_media_type}'.encode('utf-8')
+        return (f'response-cache:{self.model._meta.model_name}:{version}:{request.user.pk}:'
+                + hashlib.sha1(variant).hexdigest())
+
+    def fetch(self, request, compute):
+        """
+        Returns the cached response of a request, or computes and caches it.
+        Responses of the browsable API are never cached, as they embed per-request data.
+        Args:
+            request (Request): The incoming request.
+            compute (callable): Returns the response on a miss.
+        Returns:
+            HttpResponse: The cached response (with validators, or 304 if the client's copy
+            is current) or the computed one.
+        """
+        if request.accepted_renderer.format == 'api':
+            return compute()
+        options = get_response_cache_settings()
+        cache = get_cache()
+        key = self.key(request)
+        lock_key = key + ':lock'
+        entry = cache.get(key)
+        locked = False
+        if entry is None:
+            locked = cache.add(lock_key, 1, options['LOCK_TIMEOUT'])
+            if not locked:
+                entry = self.wait(cache, key, options)
+        if entry is not None:
+            return self.respond(request, entry)
+        try:
+            response = compute()
+        except Exception:
+            if locked:
+                cache.delete(lock_key)
+            raise
+        response.add_post_render_callback(partial(self.store, cache, key, lock_key if locked else None, options))
+        return response
+
+    async def afetch(self, request, compute):
+        """
+        Async variant of fetch(), for async views. Waiting for another request's entry
+        sleeps on the event loop instead of blocking a thread.
+        Args:
+            request (Request): The incoming request.
+            compute (callable): Coroutine function returning the rendered response on a miss.
+        Returns:
+            HttpResponse: The cached response (with validators, or 304 if the client's copy
+            is current) or the computed one.
+        """
+        options = get_response_cache_settings()
+        cache = get_cache()
+        key = await self.akey(request)
+        lock_key = key + ':lock'
+        entry = await cache.aget(key)
+        locked = False
+        if entry is None:
+            locked = await cache.aadd(lock_key, 1, options['LOCK_TIMEOUT'])
+            if not locked:
+                entry = await self.await_entry(cache, key, options)
+        if entry is not None:
+            return self.respond(request, entry)
+        try:
+            response = await compute()
+            if response.status_code == 200:
+                await cache.aset(key, self.entry(response), options['TIMEOUT'])
+        finally:
+            if locked:
+                await cache.adelete(lock_key)
+        return response
+
+    def respond(self, request, entry):
+        """
+        Answers a request from a cache entry.
+        Args:
+            request (Request): The incoming request.
+            entry (dict): The cached body, content type and headers.
+        Returns:
+            HttpResponse: 304 if the client's copy is current, otherwise the cached response.
+        """
+        headers = entry['headers']
+        last_modified = parse_http_date_safe(headers['Last-Modified']) if 'Last-Modified' in headers else None
+        return not_modified(request, headers.get('ETag'), last_modified) or self.build(entry)
+
+    def wait(self, cache, key, options):
+        """
+        Waits for the request holding the lock to store its entry.
+        Args:
+            cache (BaseCache): The cache backend.
+            key (str): The entry's cache key.
+            options (dict): The response cache settings.
+        Returns:
+            dict or None: The entry, or None if it did not appear in time.
+        """
+        deadline = time.monotonic() + options['WAIT']
+        while time.monotonic() < deadline:
+            time.sleep(options['POLL_INTERVAL'])
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+            if cache.get(key + ':lock') is None:
+                return None
+        return None
+
+    async def await_entry(self, cache, key, options):
+        """
+        Async variant of wait().
+        Args:
+            cache (BaseCache): The cache backend.
+            key (str): The entry's cache key.
+            options (dict): The response cache settings.
+        Returns:
+            dict or None: The entry, or None if it did not appear in time.
+        """
+        deadline = time.monotonic() + options['WAIT']
+        while time.monotonic() < deadline:
+            await asyncio.sleep(options['POLL_INTERVAL'])
+            entry = await cache.aget(key)
+            if entry is not None:
+                return entry
+            if await cache.aget(key + ':lock') is None:
+                return None
+        return None
+
+    def store(self, cache, key, lock_key, options, response):
+        """
+        Caches a rendered response and releases the lock. Called after rendering.
+        Args:
+            cache (BaseCache): The cache backend.
+            key (str): The entry's cache key.
+            lock_key (str or None): The lock to release, if this request holds it.
+            options (dict): The response cache settings.
+            response (Response): The rendered response.
+        """
+        if response.status_code == 200:
+            cache.set(key, self.entry(response), options['TIMEOUT'])
+        if lock_key is not None:
+            cache.delete(lock_key)
+
+    def entry(self, response):
+        """
+        Builds the cache entry of a rendered response.
+        Args:
+            response (HttpResponse): The rendered response.
+        Returns:
+            dict: The body, content type and validators.
+        """
+        return {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'headers': {name: response[name] for name in self.headers if response.has_header(name)},
+        }
+
+    def build(self, entry):
+        """
+        Builds a response from a cache entry.
+        Args:
+            entry (dict): The cached body, content type and headers.
+        Returns:
+            HttpResponse: The response.
+        """
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        for name, value in entry['headers'].items():
+            response[name] = value
+        return response
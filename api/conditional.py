@@ -0,0 +1,125 @@
+import hashlib
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+from .models import ChangeCounter
+
+
+def _variant(request):
+    """
+    Fingerprints everything besides the data that shapes a response body:
+    the path with its query string and the negotiated media type.
+    Args:
+        request (Request): The incoming request.
+    Returns:
+        str: A short hex digest.
+    """
+    media_type = getattr(request, 'accepted_media_type', '') or ''
+    raw = f'{request.get_full_path()}|{media_type}'.encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()[:12]
+
+
+def list_validators(request, model):
+    """
+    Computes the validators of a list response from the per-table change counter.
+    This costs a single lookup by the unique counter name, no matter how many rows
+    the table has, and never touches the serializer.
+    Args:
+        request (Request): The incoming request.
+        model (type): The model class whose table is listed.
+    Returns:
+        tuple: The strong ETag (str) and the Last-Modified timestamp (int or None).
+    """
+    return _list_validators(request, model, _counter(model).first())
+
+
+async def alist_validators(request, model):
+    """
+    Async variant of list_validators().
+    Args:
+        request (Request): The incoming request.
+        model (type): The model class whose table is listed.
+    Returns:
+        tuple: The strong ETag (str) and the Last-Modified timestamp (int or None).
+    """
+    return _list_validators(request, model, await _counter(model).afirst())
+
+
+def _counter(model):
+    """
+    Selects the value and update time of a table's change counter.
+    Args:
+        model (type): The model class of the table.
+    Returns:
+        QuerySet: The counter row as a (value, updated_at) tuple.
+    """
+    return ChangeCounter.objects.filter(name=model._meta.model_name).values_list('value', 'updated_at')
+
+
+def _list_validators(request, model, counter):
+    """
+    Builds the validators of a list response from its change counter.
+    Args:
+        request (Request): The incoming request.
+        model (type): The model class whose table is listed.
+        counter (tuple or None): The counter's value and update time, None if the table was never written.
+    Returns:
+        tuple: The strong ETag (str) and the Last-Modified timestamp (int or None).
+    """
+    value, updated_at = counter or (0, None)
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+    return f'"{model._meta.model_name}-{value}-{_variant(request)}"', last_modified
+
+
+def detail_etag(request, model, pk, version):
+    """
+    Computes the row-level ETag of a detail response.
+    Args:
+        request (Request): The incoming request.
+        model (type): The model class of the row.
+        pk (int): The primary key of the row.
+        version (int): The change version of the row.
+    Returns:
+        str: The strong ETag.
+    """
+    return f'"{model._meta.model_name}-{pk}-{version}-{_variant(request)}"'
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Evaluates If-None-Match and, if absent, If-Modified-Since.
+    ETags are compared weakly as RFC 9110 requires for If-None-Match, so tags
+    weakened by a compressing proxy or middleware still match.
+    Args:
+        request (Request): The incoming request.
+        etag (str): The current ETag of the resource.
+        last_modified (int, optional): The current Last-Modified timestamp.
+    Returns:
+        Response or None: An empty 304 response if the client's copy is current, otherwise None.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        tags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        fresh = '*' in tags or etag in tags
+    else:
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+        fresh = last_modified is not None and if_modified_since is not None and last_modified <= if_modified_since
+    if not fresh:
+        return None
+    return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Attaches the ETag and Last-Modified headers to a response.
+    Args:
+        response (Response): The response to decorate.
+        etag (str): The ETag of the resource.
+        last_modified (int, optional): The Last-Modified timestamp.
+    Returns:
+        Response: The same response.
+    """
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
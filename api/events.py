@@ -0,0 +1,520 @@
+import asyncio
+import threading
+from collections import deque
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+from .models import Task, Contact, current_version
+from .renderers import FastJSONRenderer
+from .serializers import TaskItemSerializer, ContactSerializer
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+DEFAULT_EVENTS = {
+    'BACKEND': 'api.events.LocalBackend',
+    'OPTIONS': {},
+    'MAX_QUEUE': 256,
+    'MAX_SUBSCRIBERS': 1000,
+    'WSGI_STREAMS': 0,
+    'HEARTBEAT': 15,
+    'RETRY': 3000,
+}
+
+# Every change of the shared board goes to this channel.
+BOARD_CHANNEL = 'board'
+
+SERIALIZERS = {
+    Task: TaskItemSerializer,
+    Contact: ContactSerializer,
+}
+
+HEARTBEAT_FRAME = b': keep-alive\n\n'
+
+
+def get_event_settings():
+    """
+    Returns the event settings, ``EVENTS`` merged over the defaults.
+    Returns:
+        dict: The settings.
+    """
+    return {**DEFAULT_EVENTS, **getattr(settings, 'EVENTS', {})}
+
+
+def encode_event(event, data, event_id=None):
+    """
+    Encodes an event as a Server-Sent Events frame. Events are encoded once when
+    published and the same bytes are queued for every subscriber.
+    Args:
+        event (str): The event name, e.g. 'task.updated'.
+        data: The JSON payload.
+        event_id (int, optional): The change version, sent as the event id so a
+            reconnecting client reports it as Last-Event-ID.
+    Returns:
+        bytes: The frame.
+    """
+    frame = b'' if event_id is None else b'id: %d\n' % event_id
+    return frame + b'event: ' + event.encode('utf-8') + b'\ndata: ' + FastJSONRenderer().render(data) + b'\n\n'
+
+
+class Subscription:
+    """
+    The bounded queue of event frames of one connected client.
+    Publishers never wait for a subscriber: a frame is appended, or, if MAX_QUEUE
+    frames are already waiting because the client does not read them, the queue is
+    dropped and the subscription closed (the client is evicted and resyncs on reconnect).
+    The queue can be read from a thread (get) or from an event loop (aget).
+    Attributes:
+        channels (tuple): The channels subscribed to.
+        max_queue (int): Maximum number of queued frames.
+        closed (bool): Whether the subscription was evicted.
+        threaded (bool): Whether a thread blocks on the subscription (a WSGI stream).
+    """
+    def __init__(self, channels, max_queue, threaded=False):
+        """
+        Creates an empty subscription.
+        Args:
+            channels (tuple): The channels to subscribe to.
+            max_queue (int): Maximum number of queued frames.
+            threaded (bool, optional): Whether a thread blocks on the subscription.
+        """
+        self.channels = channels
+        self.max_queue = max_queue
+        self.closed = False
+        self.threaded = threaded
+        self._frames = deque()
+        self._condition = threading.Condition()
+        self._loop = None
+        self._wakeup = None
+
+    def push(self, frame):
+        """
+        Queues a frame, or evicts the subscriber if its queue is full. Called from any thread.
+        Args:
+            frame (bytes): The encoded event.
+        Returns:
+            bool: False if the subscription is closed.
+        """
+        with self._condition:
+            if self.closed:
+                return False
+            if len(self._frames) >= self.max_queue:
+                self._frames.clear()
+                self.closed = True
+            else:
+                self._frames.append(frame)
+            self._condition.notify()
+            loop, wakeup = self._loop, self._wakeup
+        if wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass
+        return not self.closed
+
+    def take(self):
+        """
+        Removes and returns all queued frames. Must be called with the lock held.
+        Returns:
+            list: The frames in order.
+        """
+        frames = list(self._frames)
+        self._frames.clear()
+        return frames
+
+    def get(self, timeout):
+        """
+        Waits in the calling thread for frames.
+        Args:
+            timeout (float): Seconds to wait at most.
+        Returns:
+            list: The queued frames, empty on timeout or eviction.
+        """
+        with self._condition:
+            if not self._frames and not self.closed:
+                self._condition.wait(timeout)
+            return self.take()
+
+    async def aget(self, timeout):
+        """
+        Waits on the event loop for frames, without holding a thread.
+        Args:
+            timeout (float): Seconds to wait at most.
+        Returns:
+            list: The queued frames, empty on timeout or eviction.
+        """
+        with self._condition:
+            if self._wakeup is None:
+                self._loop, self._wakeup = asyncio.get_running_loop(), asyncio.Event()
+            if self._frames or self.closed:
+                return self.take()
+            self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        with self._condition:
+            return self.take()
+
+
+class BrokerBackend:
+    """
+    Carries published frames to the brokers of all processes.
+    A backend gets every frame published in its process and must call
+    ``broker.deliver(channel, frame)`` in every process, including this one.
+    Select one with ``EVENTS['BACKEND']``; ``EVENTS['OPTIONS']`` are passed to it.
+    Attributes:
+        cross_process (bool): Whether frames reach other processes. If not, nothing
+            is published while this process has no subscribers.
+    """
+    cross_process = True
+
+    def start(self, broker):
+        """
+        Connects the backend to the broker of this process.
+        Args:
+            broker (Broker): The broker to deliver to.
+        """
+        self.broker = broker
+
+    def publish(self, channel, frame):
+        """
+        Publishes a frame to all processes.
+        Args:
+            channel (str): The channel.
+            frame (bytes): The encoded event.
+        """
+        raise NotImplementedError
+
+    def stop(self):
+        """
+        Releases the backend's resources.
+        """
+
+
+class LocalBackend(BrokerBackend):
+    """
+    Delivers frames within this process only. Enough for a single worker process;
+    with several, clients only see changes made through the worker they are connected to.
+    """
+    cross_process = False
+
+    def publish(self, channel, frame):
+        """
+        Delivers a frame to the local broker.
+        Args:
+            channel (str): The channel.
+            frame (bytes): The encoded event.
+        """
+        self.broker.deliver(channel, frame)
+
+
+class RedisBackend(BrokerBackend):
+    """
+    Fans frames out to all processes through Redis pub/sub (needs the redis package).
+    Each process listens on ``PREFIX*`` in a background thread.
+    """
+    def __init__(self, URL='redis://localhost:6379/0', PREFIX='join-events:'):
+        """
+        Creates the backend.
+        Args:
+            URL (str, optional): The Redis URL.
+            PREFIX (str, optional): Prefix of the Redis channels.
+        Raises:
+            ImproperlyConfigured: If the redis package is not installed.
+        """
+        if redis is None:
+            raise ImproperlyConfigured('RedisBackend needs the redis package.')
+        self.client = redis.Redis.from_url(URL)
+        self.prefix = PREFIX
+        self.pubsub = None
+        self.thread = None
+
+    def start(self, broker):
+        """
+        Subscribes to the channels and starts the listener thread.
+        Args:
+            broker (Broker): The broker to deliver to.
+        """
+        super().start(broker)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.psubscribe(**{self.prefix + '*': self.on_message})
+        self.thread = self.pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def on_message(self, message):
+        """
+        Delivers a frame received from Redis to the local broker.
+        Args:
+            message (dict): The pub/sub message.
+        """
+        self.broker.deliver(message['channel'].decode('utf-8')[len(self.prefix):], message['data'])
+
+    def publish(self, channel, frame):
+        """
+        Publishes a frame on Redis.
+        Args:
+            channel (str): The channel.
+            frame (bytes): The encoded event.
+        """
+        self.client.publish(self.prefix + channel, frame)
+
+    def stop(self):
+        """
+        Stops the listener thread.
+        """
+        if self.thread is not None:
+            self.thread.stop()
+            self.pubsub.close()
+
+
+class Broker:
+    """
+    In-process registry of subscriptions, fed by a backend.
+    Attributes:
+        backend (BrokerBackend): The backend carrying frames between processes.
+        max_queue (int): Maximum number of queued frames per subscription.
+        max_subscribers (int): Maximum number of subscriptions of this process.
+        evicted (int): Number of subscriptions evicted as slow consumers.
+    """
+    def __init__(self, backend=None, max_queue=256, max_subscribers=1000):
+        """
+        Creates a broker and starts its backend.
+        Args:
+            backend (BrokerBackend, optional): The backend, a LocalBackend by default.
+            max_queue (int, optional): Maximum number of queued frames per subscription.
+            max_subscribers (int, optional): Maximum number of subscriptions.
+        """
+        self.backend = backend or LocalBackend()
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self.evicted = 0
+        self._channels = {}
+        self._count = 0
+        self._threaded = 0
+        self._lock = threading.Lock()
+        self.backend.start(self)
+
+    def subscribe(self, channels, max_threaded=None):
+        """
+        Registers a new subscription.
+        Args:
+            channels (iterable): The channels to subscribe to.
+            max_threaded (int, optional): If given, a thread blocks on the subscription,
+                which is refused once this many such subscriptions are open.
+        Returns:
+            Subscription or None: The subscription, or None if the broker is full.
+        """
+        subscription = Subscription(tuple(channels), self.max_queue, threaded=max_threaded is not None)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            if subscription.threaded:
+                if self._threaded >= max_threaded:
+                    return None
+                self._threaded += 1
+            self._count += 1
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Removes a subscription. Removing it twice is harmless.
+        Args:
+            subscription (Subscription): The subscription.
+        """
+        with self._lock:
+            removed = False
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None and subscription in subscribers:
+                    subscribers.discard(subscription)
+                    removed = True
+                    if not subscribers:
+                        del self._channels[channel]
+            if removed:
+                self._count -= 1
+                self._threaded -= subscription.threaded
+
+    @property
+    def listening(self):
+        """
+        Whether a published frame can reach a subscriber.
+        Returns:
+            bool: True if the backend is cross-process or this process has subscribers.
+        """
+        return self.backend.cross_process or self._count > 0
+
+    def publish(self, channel, frame):
+        """
+        Publishes a frame to the subscribers of a channel in all processes.
+        Args:
+            channel (str): The channel.
+            frame (bytes): The encoded event.
+        """
+        self.backend.publish(channel, frame)
+
+    def deliver(self, channel, frame):
+        """
+        Queues a frame for the local subscribers of a channel, evicting the ones that fell behind.
+        Args:
+            channel (str): The channel.
+            frame (bytes): The encoded event.
+        """
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            if not subscription.push(frame):
+                self.unsubscribe(subscription)
+                with self._lock:
+                    self.evicted += 1
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """
+    Returns the broker of this process, created from ``EVENTS`` on first use.
+    Returns:
+        Broker: The broker.
+    """
+    options = get_event_settings()
+    backend = import_string(options['BACKEND'])(**options['OPTIONS'])
+    return Broker(backend, options['MAX_QUEUE'], options['MAX_SUBSCRIBERS'])
+
+
+def publish(event, data, event_id=None, channel=BOARD_CHANNEL):
+    """
+    Publishes an event once the current transaction commits, so subscribers never
+    see a change that is rolled back or not yet visible to their requests.
+    A failing backend is logged and does not affect the write.
+    Args:
+        event (str): The event name.
+        data: The JSON payload.
+        event_id (int, optional): The change version of the event.
+        channel (str, optional): The channel.
+    """
+    if not get_broker().listening:
+        return
+    frame = encode_event(event, data, event_id)
+    transaction.on_commit(lambda: get_broker().publish(channel, frame), robust=True)
+
+
+def publish_row(instance, op, fields=None):
+    """
+    Publishes a change of a task or contact as ``<model>.<op>``, e.g. 'task.updated'.
+    The payload holds the id, the version and the serialized ``fields`` that changed
+    (all fields if ``fields`` is None).
+    Args:
+        instance (Model): The saved Task or Contact.
+        op (str): 'created' or 'updated'.
+        fields (iterable, optional): The names of the changed fields.
+    """
+    if not get_broker().listening:
+        return
+    serializer_class = SERIALIZERS[type(instance)]
+    if fields is not None:
+        fields = set(fields) | {'version'}
+        fields = [name for name in serializer_class.readable_field_names() if name in fields]
+    publish(f'{instance._meta.model_name}.{op}', {
+        'id': instance.pk,
+        'version': instance.version,
+        'fields': serializer_class(instance, fields=fields).data,
+    }, instance.version)
+
+
+def publish_deleted(model, pk):
+    """
+    Publishes the deletion of a task or contact as ``<model>.deleted``.
+    Args:
+        model (type): The model class.
+        pk (int): The primary key of the deleted row.
+    """
+    publish(f'{model._meta.model_name}.deleted', {'id': pk})
+
+
+def publish_sync(*models):
+    """
+    Publishes a ``sync`` event for changes too large to describe row by row (bulk
+    writes, imports, counter refreshes). Clients fetch them from /sync/ with the
+    last version they have seen.
+    Args:
+        *models (type): The model classes that changed.
+    """
+    if not get_broker().listening:
+        return
+    names = [model._meta.model_name for model in models]
+
+    def send():
+        version = current_version()
+        get_broker().publish(BOARD_CHANNEL, encode_event('sync', {'models': names, 'version': version}, version))
+    transaction.on_commit(send, robust=True)
+
+
+def resync_frame(last_event_id):
+    """
+    Returns the frame a reconnecting client gets first if it missed changes.
+    Args:
+        last_event_id (str or None): The Last-Event-ID header (or ``?since=``).
+    Returns:
+        bytes: A ``sync`` frame if the board changed since that version, otherwise b''.
+    """
+    if not last_event_id or not last_event_id.isdigit():
+        return b''
+    version = current_version()
+    if version <= int(last_event_id):
+        return b''
+    return encode_event('sync', {'models': [model._meta.model_name for model in SERIALIZERS], 'version': version}, version)
+
+
+def event_stream(broker, subscription, options, prelude=b''):
+    """
+    Yields the frames of a subscription for a sync (WSGI) response, holding the thread.
+    A comment line is sent every HEARTBEAT seconds without events, so proxies keep
+    the connection open and a disconnected client is noticed. An evicted client is
+    told so and the stream ends; the browser reconnects after RETRY milliseconds.
+    Args:
+        broker (Broker): The broker of the subscription.
+        subscription (Subscription): The subscription.
+        options (dict): The event settings.
+        prelude (bytes, optional): Frames to send first.
+    Yields:
+        bytes: Chunks of the event stream.
+    """
+    try:
+        yield b'retry: %d\n\n' % options['RETRY'] + prelude
+        while True:
+            frames = subscription.get(options['HEARTBEAT'])
+            if subscription.closed:
+                yield b''.join(frames) + encode_event('evicted', {'reason': 'slow consumer'})
+                return
+            yield b''.join(frames) if frames else HEARTBEAT_FRAME
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def aevent_stream(broker, subscription, options, prelude=b''):
+    """
+    Async variant of event_stream() for ASGI, waiting on the event loop instead of a thread.
+    Args:
+        broker (Broker): The broker of the subscription.
+        subscription (Subscription): The subscription.
+        options (dict): The event settings.
+        prelude (bytes, optional): Frames to send first.
+    Yields:
+        bytes: Chunks of the event stream.
+    """
+    try:
+        yield b'retry: %d\n\n' % options['RETRY'] + prelude
+        while True:
+            frames = await subscription.aget(options['HEARTBEAT'])
+            if subscription.closed:
+                yield b''.join(frames) + encode_event('evicted', {'reason': 'slow consumer'})
+                return
+            yield b''.join(frames) if frames else HEARTBEAT_FRAME
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,208 @@
+import csv
+import io
+from rest_framework.negotiation import DefaultContentNegotiation
+from .renderers import FastJSONRenderer
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """
+    Content negotiation for the export views, which pick their format with ``?type=``.
+    Accept headers such as ``text/csv`` must not fail with 406, so the first renderer
+    (JSON, used for error responses) is always selected.
+    """
+    def select_renderer(self, request, renderers, format_suffix=None):
+        """
+        Selects the first renderer regardless of the Accept header.
+        Args:
+            request (Request): The incoming request.
+            renderers (list): The renderers of the view.
+            format_suffix (str, optional): Unused.
+        Returns:
+            tuple: The renderer and its media type.
+        """
+        return (renderers[0], renderers[0].media_type)
+
+
+def chunked(iterator, size):
+    """
+    Groups an iterator into lists of at most ``size`` items.
+    Args:
+        iterator (iterable): The items.
+        size (int): The chunk size.
+    Yields:
+        list: The next chunk.
+    """
+    chunk = []
+    for item in iterator:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def serialized_chunks(queryset, serializer, chunk_size):
+    """
+    Reads a queryset with a database cursor and serializes it chunk by chunk.
+    Only one chunk of rows is held in memory at a time, and related objects (such as
+    assignees) are loaded with one query per chunk.
+    Args:
+        queryset (QuerySet): The rows to export, ordered.
+        serializer (ValuesSerializer): The serializer of the rows.
+        chunk_size (int): The number of rows fetched and serialized at once.
+    Yields:
+        list: The serialized rows of the next chunk.
+    """
+    rows = serializer.values(queryset).iterator(chunk_size=chunk_size)
+    for chunk in chunked(rows, chunk_size):
+        yield serializer.serialize(chunk)
+
+
+async def aserialized_chunks(queryset, serializer, chunk_size):
+    """
+    Async variant of serialized_chunks(), for responses streamed under ASGI. Each chunk
+    is fetched with the async ORM, so the event loop is free between chunks and only
+    one chunk is held in memory.
+    Args:
+        queryset (QuerySet): The rows to export, ordered.
+        serializer (ValuesSerializer): The serializer of the rows.
+        chunk_size (int): The number of rows fetched and serialized at once.
+    Yields:
+        list: The serialized rows of the next chunk.
+    """
+    chunk = []
+    async for row in serializer.values(queryset).aiterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield await serializer.aserialize(chunk)
+            chunk = []
+    if chunk:
+        yield await serializer.aserialize(chunk)
+
+
+def encode_ndjson(chunk, renderer):
+    """
+    Encodes a serialized chunk as newline-delimited JSON, one object per line.
+    Args:
+        chunk (list): The serialized rows.
+        renderer (FastJSONRenderer): The JSON renderer.
+    Returns:
+        bytes: The lines.
+    """
+    return b''.join(renderer.render(item) + b'\n' for item in chunk)
+
+
+def ndjson_lines(chunks):
+    """
+    Encodes serialized chunks as newline-delimited JSON, one object per line.
+    Args:
+        chunks (iterable): Lists of serialized rows.
+    Yields:
+        bytes: The lines of a chunk.
+    """
+    renderer = FastJSONRenderer()
+    for chunk in chunks:
+        yield encode_ndjson(chunk, renderer)
+
+
+async def andjson_lines(chunks):
+    """
+    Async variant of ndjson_lines().
+    Args:
+        chunks (AsyncIterable): Lists of serialized rows.
+    Yields:
+        bytes: The lines of a chunk.
+    """
+    renderer = FastJSONRenderer()
+    async for chunk in chunks:
+        yield encode_ndjson(chunk, renderer)
+
+
+def csv_value(value):
+    """
+    Converts a serialized value to a CSV cell. Lists and objects are written as JSON.
+    Args:
+        value: The serialized value.
+    Returns:
+        The cell value.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return FastJSONRenderer().render(value).decode('utf-8')
+    return value
+
+
+class CSVEncoder:
+    """
+    Encodes serialized chunks as CSV lines, reusing one buffer.
+    Attributes:
+        fields (list): The column names, in order.
+    """
+    def __init__(self, fields):
+        """
+        Creates an encoder.
+        Args:
+            fields (list): The column names, in order.
+        """
+        self.fields = fields
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def header(self):
+        """
+        Returns the header row.
+        Returns:
+            bytes: The encoded header line.
+        """
+        return self.encode_rows([self.fields])
+
+    def encode(self, chunk):
+        """
+        Returns the lines of a serialized chunk.
+        Args:
+            chunk (list): The serialized rows.
+        Returns:
+            bytes: The encoded lines.
+        """
+        return self.encode_rows([csv_value(item[field]) for field in self.fields] for item in chunk)
+
+    def encode_rows(self, rows):
+        """
+        Writes rows of cells to the buffer and returns them encoded.
+        """
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.writer.writerows(rows)
+        return self.buffer.getvalue().encode('utf-8')
+
+
+def csv_lines(chunks, fields):
+    """
+    Encodes serialized chunks as CSV with a header row.
+    Args:
+        chunks (iterable): Lists of serialized rows.
+        fields (list): The column names, in order.
+    Yields:
+        bytes: The header, then the lines of a chunk.
+    """
+    encoder = CSVEncoder(fields)
+    yield encoder.header()
+    for chunk in chunks:
+        yield encoder.encode(chunk)
+
+
+async def acsv_lines(chunks, fields):
+    """
+    Async variant of csv_lines().
+    Args:
+        chunks (AsyncIterable): Lists of serialized rows.
+        fields (list): The column names, in order.
+    Yields:
+        bytes: The header, then the lines of a chunk.
+    """
+    encoder = CSVEncoder(fields)
+    yield encoder.header()
+    async for chunk in chunks:
+        yield encoder.encode(chunk)
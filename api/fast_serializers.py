@@ -0,0 +1,194 @@
+import copy
+from functools import lru_cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from .serializers import DateOnlyField, AssigneesField
+
+
+# Fields whose to_representation() returns database values unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.FloatField,
+    serializers.BooleanField,
+    serializers.JSONField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+    DateOnlyField,
+)
+
+
+class ValuesSerializer:
+    """
+    Read-only list serializer working on ``values()`` rows instead of model instances.
+    It is compiled once from a ModelSerializer and renders the same dicts, with the
+    same keys in the same order, without creating a model instance or binding DRF
+    fields per row. Many-to-many fields (like AssigneesField) are loaded with one
+    query on the through table per page.
+    Attributes:
+        model (type): The model of the serializer.
+        columns (list): The columns to select with ``values()``.
+        accessors (list): Tuples of (output name, column, converter or None) in output order.
+            Many-to-many fields have the model field as column.
+    """
+    def __init__(self, serializer_class):
+        """
+        Compiles the field accessors of a serializer.
+        Args:
+            serializer_class (type): A ModelSerializer with plain model fields only.
+        Raises:
+            ImproperlyConfigured: If the serializer has fields that cannot be read from a row.
+        """
+        self.model = serializer_class.Meta.model
+        self.columns = []
+        self.accessors = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, AssigneesField):
+                model_field = self.model._meta.get_field(field.source)
+                self.accessors.append((name, model_field, None))
+                continue
+            if field.source == '*' or '.' in field.source or isinstance(field, serializers.BaseSerializer):
+                raise ImproperlyConfigured(f'{serializer_class.__name__}.{name} cannot be read from values() rows.')
+            convert = None if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation
+            self.columns.append(field.source)
+            self.accessors.append((name, field.source, convert))
+        if 'id' not in self.columns:
+            self.columns.append('id')
+
+    def project(self, fields):
+        """
+        Returns a serializer limited to some of the fields, which also selects only their columns.
+        Args:
+            fields (list or None): The field names to keep, or None for all.
+        Returns:
+            ValuesSerializer: The limited serializer (self if fields is None).
+        """
+        if fields is None:
+            return self
+        projected = copy.copy(self)
+        projected.accessors = [accessor for accessor in self.accessors if accessor[0] in fields]
+        projected.columns = [column for _, column, _ in projected.accessors if isinstance(column, str)]
+        if 'id' not in projected.columns:
+            projected.columns.append('id')
+        return projected
+
+    def values(self, queryset, extra=()):
+        """
+        Returns the queryset as ``values()`` rows holding the columns this serializer reads.
+        Args:
+            queryset (QuerySet): The queryset to read.
+            extra (iterable, optional): Further columns to select, e.g. for a pagination keyset.
+        Returns:
+            QuerySet: The rows as dicts.
+        """
+        return queryset.values(*self.columns, *[column for column in extra if column not in self.columns])
+
+    def load_related(self, model_field, ids):
+        """
+        Loads a many-to-many field for a page of rows with one query on the through table.
+        Args:
+            model_field (ManyToManyField): The relation to load.
+            ids (list): The primary keys of the rows.
+        Returns:
+            dict: The related primary keys per row, ordered by primary key.
+        """
+        related = {}
+        for pk, related_pk in self.related_pairs(model_field, ids):
+            related.setdefault(pk, []).append(related_pk)
+        return related
+
+    async def aload_related(self, model_field, ids):
+        """
+        Async variant of load_related().
+        Args:
+            model_field (ManyToManyField): The relation to load.
+            ids (list): The primary keys of the rows.
+        Returns:
+            dict: The related primary keys per row, ordered by primary key.
+        """
+        related = {}
+        async for pk, related_pk in self.related_pairs(model_field, ids):
+            related.setdefault(pk, []).append(related_pk)
+        return related
+
+    def related_pairs(self, model_field, ids):
+        """
+        Returns the query on the through table of a many-to-many field for a page of rows.
+        Args:
+            model_field (ManyToManyField): The relation to load.
+            ids (list): The primary keys of the rows.
+        Returns:
+            QuerySet: Pairs of row and related primary key, ordered by the related key.
+        """
+        through = model_field.remote_field.through
+        source, target = model_field.m2m_field_name(), model_field.m2m_reverse_field_name()
+        return (through.objects.filter(**{f'{source}_id__in': ids})
+                .order_by(f'{target}_id').values_list(f'{source}_id', f'{target}_id'))
+
+    def related_fields(self):
+        """
+        Returns the many-to-many fields the serializer outputs.
+        Returns:
+            list: The model fields.
+        """
+        return [model_field for _, model_field, _ in self.accessors if not isinstance(model_field, str)]
+
+    def serialize(self, rows):
+        """
+        Renders ``values()`` rows the way the serializer renders the matching instances.
+        Args:
+            rows (iterable): Rows returned by values().
+        Returns:
+            list: The serialized rows.
+        """
+        rows = list(rows)
+        ids = [row['id'] for row in rows]
+        return self.build(rows, {model_field: self.load_related(model_field, ids) for model_field in self.related_fields()})
+
+    async def aserialize(self, rows):
+        """
+        Async variant of serialize(), for async views.
+        Args:
+            rows (list or QuerySet): Rows returned by values(); a queryset is fetched with async iteration.
+        Returns:
+            list: The serialized rows.
+        """
+        rows = [row async for row in rows] if hasattr(rows, '__aiter__') else list(rows)
+        ids = [row['id'] for row in rows]
+        return self.build(rows, {model_field: await self.aload_related(model_field, ids)
+                                 for model_field in self.related_fields()})
+
+    def build(self, rows, related):
+        """
+        Renders rows with their loaded many-to-many values.
+        Args:
+            rows (list): Rows returned by values().
+            related (dict): The related primary keys per row, per many-to-many model field.
+        Returns:
+            list: The serialized rows.
+        """
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in self.accessors:
+                if not isinstance(column, str):
+                    item[name] = related[column].get(row['id'], [])
+                    continue
+                value = row[column]
+                item[name] = value if convert is None or value is None else convert(value)
+            data.append(item)
+        return data
+
+
+@lru_cache(maxsize=None)
+def values_serializer(serializer_class):
+    """
+    Returns the compiled ValuesSerializer of a serializer class, compiling it on first use.
+    Args:
+        serializer_class (type): The ModelSerializer to mirror.
+    Returns:
+        ValuesSerializer: The compiled serializer.
+    """
+    return ValuesSerializer(serializer_class)
@@ -0,0 +1,67 @@
+from datetime import date
+from rest_framework.exceptions import ValidationError
+
+
+TASK_CHOICE_FILTERS = ('status', 'category', 'priority')
+
+
+def parse_date(value, param):
+    """
+    Parse a date query parameter in the format YYYY-MM-DD.
+    Args:
+        value (str): The raw query parameter value.
+        param (str): The name of the query parameter, used in the error message.
+    Returns:
+        datetime.date: The parsed date.
+    Raises:
+        ValidationError: If the value is not a valid date.
+    """
+    try:
+        if len(value) != 10:
+            raise ValueError(value)
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({param: ['Date has wrong format. Use YYYY-MM-DD.']})
+
+
+def filter_tasks(queryset, params):
+    """
+    Narrow a Task queryset down by the filters given in the query parameters.
+    Supported parameters:
+    - status, category, priority: exact match, several values separated by commas.
+    - due_date__gte, due_date__lte: inclusive due date range (YYYY-MM-DD).
+    - author: id of the user who created the task.
+    - assignee: id of a contact the task is assigned to.
+    Every filter maps onto a column covered by one of the composite indexes on Task,
+    so the database can answer it with an index range scan.
+    Args:
+        queryset (QuerySet): The Task queryset to filter.
+        params (QueryDict): The query parameters of the request.
+    Returns:
+        QuerySet: The filtered queryset.
+    Raises:
+        ValidationError: If a parameter has an invalid value.
+    """
+    for field in TASK_CHOICE_FILTERS:
+        value = params.get(field)
+        if value:
+            values = [item for item in value.split(',') if item]
+            if len(values) == 1:
+                queryset = queryset.filter(**{field: values[0]})
+            else:
+                queryset = queryset.filter(**{f'{field}__in': values})
+    for param in ('due_date__gte', 'due_date__lte'):
+        value = params.get(param)
+        if value:
+            queryset = queryset.filter(**{param: parse_date(value, param)})
+    author = params.get('author')
+    if author:
+        if not author.isdigit():
+            raise ValidationError({'author': ['A valid integer is required.']})
+        queryset = queryset.filter(author_id=int(author))
+    assignee = params.get('assignee')
+    if assignee:
+        if not assignee.isdigit():
+            raise ValidationError({'assignee': ['A valid integer is required.']})
+        queryset = queryset.filter(assignments__contact_id=int(assignee))
+    return queryset
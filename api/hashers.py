@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+
+
+def hasher_param(name, default):
+    """
+    Returns a cost parameter from the ``PASSWORD_HASHER_PARAMS`` setting.
+    Args:
+        name (str): The parameter name, e.g. 'PBKDF2_ITERATIONS'.
+        default (int): The Django default for the parameter.
+    Returns:
+        int: The configured value.
+    """
+    return getattr(settings, 'PASSWORD_HASHER_PARAMS', {}).get(name, default)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher whose iteration count comes from the settings.
+    It keeps the algorithm name of Django's hasher, so existing hashes are verified by
+    it. Hashes with a different iteration count are rewritten on the next login.
+    """
+    @property
+    def iterations(self):
+        return hasher_param('PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    Scrypt hasher whose cost parameters come from the settings.
+    """
+    @property
+    def work_factor(self):
+        return hasher_param('SCRYPT_WORK_FACTOR', ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return hasher_param('SCRYPT_BLOCK_SIZE', ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return hasher_param('SCRYPT_PARALLELISM', ScryptPasswordHasher.parallelism)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 hasher whose cost parameters come from the settings. Requires argon2-cffi.
+    """
+    @property
+    def time_cost(self):
+        return hasher_param('ARGON2_TIME_COST', Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return hasher_param('ARGON2_MEMORY_COST', Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return hasher_param('ARGON2_PARALLELISM', Argon2PasswordHasher.parallelism)
@@ -0,0 +1,253 @@
+import csv
+import json
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from .events import publish_sync
+from .exports import chunked
+from .models import Task, TaskAssignment, Contact, Subtask, column_ends, next_version
+from .serializers import TaskItemSerializer, ContactSerializer, AssigneesField
+from .subtasks import parse_subtasks
+
+
+IMPORT_TYPES = ('csv', 'ndjson')
+
+
+class UnreadableInput(Exception):
+    """
+    Raised when an import file cannot be decoded or parsed as a whole, e.g. it is not UTF-8.
+    """
+
+
+def read_ndjson(lines):
+    """
+    Parses newline-delimited JSON lazily, one object per line. Blank lines are skipped.
+    Args:
+        lines (iterable): The text lines.
+    Yields:
+        tuple: The line number and the parsed object, or a ValidationError for a bad line.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, ValidationError({'non_field_errors': [f'Invalid JSON: {exc}']})
+            continue
+        if not isinstance(row, dict):
+            row = ValidationError({'non_field_errors': ['Expected a JSON object.']})
+        yield number, row
+
+
+def read_csv(lines, json_columns=()):
+    """
+    Parses CSV with a header row lazily. Empty cells are left out, so defaults apply;
+    cells of ``json_columns`` holding JSON (as written by the export) are decoded.
+    Args:
+        lines (iterable): The text lines.
+        json_columns (iterable): The columns that hold JSON values.
+    Yields:
+        tuple: The line number of the record and the row as a dict.
+    """
+    reader = csv.DictReader(lines)
+    for record in reader:
+        row = {}
+        for column, value in record.items():
+            if column is None or value in ('', None):
+                continue
+            if column in json_columns and value[:1] in ('[', '{', '"'):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            row[column] = value
+        yield reader.line_num, row
+
+
+class BoardImporter:
+    """
+    Imports rows into a table in chunks, using a model serializer for validation.
+    Each chunk of ``batch_size`` rows is validated with one reused serializer and
+    written with bulk_create, so memory is bounded by the chunk and the number of
+    queries by the number of chunks. The whole import runs in one transaction. If any
+    row is invalid nothing is written, unless ``skip_invalid`` is set, in which case
+    the valid rows are kept. The change version is reserved once, just before the
+    commit, and stamped on the imported rows then: reserving it locks the global sync
+    counter until the commit, which would otherwise block every other write for the
+    duration of the import.
+    Attributes:
+        model (type): The model to import into.
+        serializer_class (type): The serializer validating a row.
+        batch_size (int): Number of rows validated and inserted at once.
+        skip_invalid (bool): Whether to keep the valid rows if some rows are invalid.
+        error_limit (int): Maximum number of row errors reported in detail.
+    """
+    model = None
+    serializer_class = None
+    error_limit = 100
+
+    def __init__(self, batch_size=1000, skip_invalid=False, user=None):
+        """
+        Creates an importer.
+        Args:
+            batch_size (int, optional): Number of rows validated and inserted at once.
+            skip_invalid (bool, optional): Keep the valid rows if some rows are invalid.
+            user (User, optional): The user performing the import.
+        """
+        self.batch_size = batch_size
+        self.skip_invalid = skip_invalid
+        self.user = user
+
+    def json_columns(self):
+        """
+        Returns the columns whose CSV cells may hold JSON.
+        Returns:
+            list: The column names.
+        """
+        return [name for name, field in self.serializer_class().fields.items()
+                if isinstance(field, (serializers.JSONField, AssigneesField))]
+
+    def read(self, lines, import_type):
+        """
+        Parses the input lazily. Errors of the whole input, unlike those of a row, abort the import.
+        Args:
+            lines (iterable): The text lines.
+            import_type (str): 'csv' or 'ndjson'.
+        Yields:
+            tuple: Pairs of line number and row (or ValidationError).
+        Raises:
+            UnreadableInput: If the input is not UTF-8 or cannot be parsed.
+        """
+        rows = read_csv(lines, self.json_columns()) if import_type == 'csv' else read_ndjson(lines)
+        try:
+            yield from rows
+        except UnicodeDecodeError:
+            raise UnreadableInput('The file is not UTF-8 encoded.')
+        except (csv.Error, ValueError) as exc:
+            raise UnreadableInput(f'The file cannot be read: {exc}')
+
+    def run(self, lines, import_type):
+        """
+        Validates and writes all rows.
+        Args:
+            lines (iterable): The text lines.
+            import_type (str): 'csv' or 'ndjson'.
+        Returns:
+            dict: The number of 'created' rows, the 'error_count' and the first
+            ``error_limit`` 'errors', each with the line number of the failing row.
+        Raises:
+            UnreadableInput: If the input cannot be read; nothing is written then.
+        """
+        serializer = self.serializer_class()
+        created, errors, error_count, written = 0, [], 0, []
+        with transaction.atomic():
+            for chunk in chunked(self.read(lines, import_type), self.batch_size):
+                valid = []
+                for line, row in chunk:
+                    try:
+                        if isinstance(row, ValidationError):
+                            raise row
+                        valid.append(serializer.run_validation(self.prepare(row)))
+                    except ValidationError as exc:
+                        error_count += 1
+                        if len(errors) < self.error_limit:
+                            errors.append({'line': line, 'errors': exc.detail})
+                if valid and (self.skip_invalid or not error_count):
+                    written.extend(obj.pk for obj in self.write(valid))
+                    created += len(valid)
+            if error_count and not self.skip_invalid:
+                transaction.set_rollback(True)
+                created = 0
+            elif created:
+                self.stamp(written)
+                publish_sync(self.model)
+        return {'created': created, 'error_count': error_count, 'errors': errors}
+
+    def prepare(self, row):
+        """
+        Adjusts a parsed row before validation.
+        Args:
+            row (dict): The parsed row.
+        Returns:
+            dict: The row to validate.
+        """
+        return row
+
+    def write(self, rows):
+        """
+        Inserts a chunk of validated rows. Their change version is set later by stamp().
+        Args:
+            rows (list): The validated data of the rows.
+        Returns:
+            list: The inserted instances.
+        """
+        return self.model.objects.bulk_create([self.model(**data) for data in rows], batch_size=self.batch_size)
+
+    def stamp(self, pks):
+        """
+        Reserves one change version for the imported rows and stamps it on them, with one UPDATE per chunk.
+        Args:
+            pks (list): The primary keys of the imported rows.
+        """
+        version = next_version(scope=self.model._meta.model_name)
+        for chunk in chunked(pks, self.batch_size):
+            self.model.objects.filter(pk__in=chunk).update(version=version)
+
+
+class ContactImporter(BoardImporter):
+    """
+    Imports contacts.
+    """
+    model = Contact
+    serializer_class = ContactSerializer
+
+
+class TaskImporter(BoardImporter):
+    """
+    Imports tasks, with their subtasks and assignees. The importing user becomes the
+    author; assignees given as ``assignedTo`` are resolved against the existing contacts.
+    Tasks without a ``position`` are ranked below the last card of their column, in file order.
+    """
+    model = Task
+    serializer_class = TaskItemSerializer
+
+    def prepare(self, row):
+        """
+        Drops the author column, the importing user is recorded as author instead.
+        """
+        row = dict(row)
+        row.pop('author', None)
+        return row
+
+    def write(self, rows):
+        """
+        Inserts a chunk of tasks, then their subtasks and assignments, with one bulk INSERT each.
+        """
+        tasks, subtasks, assignees = [], [], []
+        ends = column_ends({data['status'] for data in rows if data.get('position') is None})
+        for data in rows:
+            data = dict(data)
+            if data.get('position') is None:
+                data['position'] = ends[data['status']]
+                ends[data['status']] += 1
+            assignees.append(data.pop('assignees', []))
+            subtasks.append(parse_subtasks(data.get('subtasks')))
+            tasks.append(Task(**data, author=self.user, subtasks_total=len(subtasks[-1]),
+                              subtasks_done=sum(subtask['done'] for subtask in subtasks[-1])))
+        Task.objects.bulk_create(tasks, batch_size=self.batch_size)
+        Subtask.objects.bulk_create(
+            [Subtask(task=task, **subtask) for task, parsed in zip(tasks, subtasks) for subtask in parsed],
+            batch_size=self.batch_size
+        )
+        TaskAssignment.objects.bulk_create(
+            [TaskAssignment(task=task, contact_id=pk) for task, ids in zip(tasks, assignees) for pk in ids],
+            batch_size=self.batch_size
+        )
+        return tasks
+
+
+IMPORTERS = {
+    'tasks': TaskImporter,
+    'contacts': ContactImporter,
+}
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from io import BytesIO
+from types import ModuleType
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+from django.urls import path, reverse
+from rest_framework.authtoken.models import Token
+from api.async_views import AsyncTasksItemView
+from api.models import Task
+from api.views import TasksItemView
+
+
+class ThreadSampler:
+    """
+    Records the highest number of live threads while a benchmark runs.
+    Attributes:
+        peak (int): The highest thread count seen, without the sampler itself.
+    """
+    def __init__(self, interval=0.005):
+        """
+        Creates a sampler.
+        Args:
+            interval (float, optional): Seconds between samples.
+        """
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        """
+        Samples the thread count until stopped.
+        """
+        while not self._stop.is_set():
+            self.peak = max(self.peak, threading.active_count() - 1)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+class AdaptationCounter(logging.Handler):
+    """
+    Counts Django's "adapted for middleware" debug messages, each one a thread hop per request.
+    Attributes:
+        count (int): The number of adaptations logged.
+    """
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.count = 0
+
+    def emit(self, record):
+        if 'adapted for middleware' in record.getMessage():
+            self.count += 1
+
+
+def task_urlconf(view):
+    """
+    Returns a URLconf serving the task list and detail with a view, so both modes
+    are measured under the same paths whatever ``ASYNC_VIEWS`` is set to.
+    Args:
+        view (type): The view class.
+    Returns:
+        ModuleType: The URLconf module.
+    """
+    urlconf = ModuleType(f'benchmark_urls_{view.__name__}')
+    urlconf.urlpatterns = [
+        path('tasks/', view.as_view(), name='tasks'),
+        path('tasks/<int:pk>/', view.as_view(), name='task-detail'),
+    ]
+    return urlconf
+
+
+class Command(BaseCommand):
+    """
+    Compares the sync task views served by Django's WSGI handler from a thread pool,
+    like a threaded WSGI server, with the async views served by the ASGI handler on
+    one event loop, like an ASGI server, at several concurrency levels. Requests go
+    through the full middleware stack (no network), against the configured database:
+    a user, a token and the tasks are created for the run and deleted afterwards.
+    The number of middleware adaptations is reported for the ASGI handler; anything
+    above 0 means a sync-only middleware moves every request into a thread.
+    """
+    help = 'Benchmark the async (ASGI) task views against the sync (WSGI) ones at high concurrency.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line options.
+        Args:
+            parser (ArgumentParser): The parser of the command.
+        """
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per measurement.')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 500],
+                            help='Numbers of requests in flight at once.')
+        parser.add_argument('--tasks', type=int, default=500, help='Number of tasks on the board.')
+
+    def handle(self, *args, **options):
+        """
+        Runs the benchmark for every concurrency level.
+        Args:
+            **options: The parsed options.
+        """
+        user = User.objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:12]}')
+        token = Token.objects.create(user=user)
+        today = date.today()
+        tasks = Task.objects.bulk_create([Task(
+            author=user, title=f'Task {i}', description='Benchmark', due_date=today + timedelta(days=i % 365),
+            status=('todo', 'progress', 'done')[i % 3], bgcolor={}, position=float(i),
+        ) for i in range(options['tasks'])], batch_size=500)
+        headers = {'authorization': f'Token {token.key}', 'host': 'localhost'}
+        with override_settings(ROOT_URLCONF=task_urlconf(TasksItemView)):
+            scenarios = {
+                'list': [reverse('tasks')] * options['requests'],
+                'detail': [reverse('task-detail', args=[task.pk])
+                           for task in (tasks * (options['requests'] // len(tasks) + 1))[:options['requests']]],
+            }
+        try:
+            for concurrency in options['concurrency']:
+                for name, requests in scenarios.items():
+                    for mode, run in (('wsgi', self.run_sync), ('asgi', self.run_async)):
+                        elapsed, peak = run(requests, concurrency, headers)
+                        self.stdout.write(f'{name}, {concurrency} concurrent, {mode}: {len(requests) / elapsed:.0f} req/s, '
+                                          f'{elapsed:.2f}s, peak {peak} threads')
+        finally:
+            user.delete()
+
+    def run_sync(self, requests, concurrency, headers):
+        """
+        Serves the requests with the WSGI handler and the sync view from a pool of ``concurrency`` threads.
+        Args:
+            requests (list): The paths requested.
+            concurrency (int): Number of threads.
+            headers (dict): The request headers.
+        Returns:
+            tuple: The elapsed seconds and the peak number of threads.
+        """
+        with override_settings(ROOT_URLCONF=task_urlconf(TasksItemView)):
+            handler = WSGIHandler()
+
+            def call(path):
+                environ = {
+                    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                    'REMOTE_ADDR': '127.0.0.1', 'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http',
+                    **{'HTTP_' + name.upper(): value for name, value in headers.items()},
+                }
+                statuses = []
+                try:
+                    response = handler(environ, lambda status, response_headers: statuses.append(status))
+                    b''.join(response)
+                    response.close()
+                    return int(statuses[0].split()[0])
+                finally:
+                    connections.close_all()
+
+            with ThreadSampler() as sampler:
+                started = time.perf_counter()
+                with ThreadPoolExecutor(concurrency) as pool:
+                    statuses = list(pool.map(call, requests))
+                elapsed = time.perf_counter() - started
+        self.check_statuses(statuses)
+        return elapsed, sampler.peak
+
+    def run_async(self, requests, concurrency, headers):
+        """
+        Serves the requests with the ASGI handler and the async view on one event loop, ``concurrency`` at a time.
+        Args:
+            requests (list): The paths requested.
+            concurrency (int): Number of requests in flight.
+            headers (dict): The request headers.
+        Returns:
+            tuple: The elapsed seconds and the peak number of threads.
+        """
+        logger = logging.getLogger('django.request')
+        counter = AdaptationCounter()
+        level = logger.level
+        logger.addHandler(counter)
+        logger.setLevel(logging.DEBUG)
+        try:
+            with override_settings(ROOT_URLCONF=task_urlconf(AsyncTasksItemView)):
+                handler = ASGIHandler()
+                elapsed, peak, statuses = self.serve_async(handler, requests, concurrency, headers)
+        finally:
+            logger.removeHandler(counter)
+            logger.setLevel(level)
+        self.check_statuses(statuses)
+        self.stdout.write(f'asgi middleware adaptations: {counter.count}')
+        return elapsed, peak
+
+    def serve_async(self, handler, requests, concurrency, headers):
+        """
+        Sends the requests to an ASGI application.
+        Args:
+            handler (ASGIHandler): The application.
+            requests (list): The paths requested.
+            concurrency (int): Number of requests in flight.
+            headers (dict): The request headers.
+        Returns:
+            tuple: The elapsed seconds, the peak number of threads and the status codes.
+        """
+        raw_headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()]
+
+        async def serve():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def call(path):
+                scope = {
+                    'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                    'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+                    'root_path': '', 'headers': raw_headers, 'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+                }
+                received = False
+                statuses = []
+
+                async def receive():
+                    nonlocal received
+                    if received:
+                        await asyncio.Event().wait()
+                    received = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        statuses.append(message['status'])
+
+                async with semaphore:
+                    await handler(scope, receive, send)
+                return statuses[0]
+            return await asyncio.gather(*(call(path) for path in requests))
+
+        with ThreadSampler() as sampler:
+            started = time.perf_counter()
+            statuses = asyncio.run(serve())
+            elapsed = time.perf_counter() - started
+        return elapsed, sampler.peak, statuses
+
+    def check_statuses(self, statuses):
+        """
+        Warns about failed requests, which would make the numbers meaningless.
+        Args:
+            statuses (list): The status codes of the responses.
+        """
+        failed = [code for code in statuses if code != 200]
+        if failed:
+            self.stderr.write(f'{len(failed)} requests failed, e.g. with status {failed[0]}.')
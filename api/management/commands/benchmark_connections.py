@@ -0,0 +1,100 @@
+import statistics
+import time
+import uuid
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from api.models import Task
+
+
+class Command(BaseCommand):
+    """
+    Measures per-request latency with connection reuse (persistent connections, as
+    set by ``DB_CONN_MAX_AGE``) and without it (``CONN_MAX_AGE=0``, a new connection
+    per request). Requests go through the full middleware stack with the test client;
+    the client disconnects Django's close_old_connections handlers, so they are called
+    around every request here, closing or keeping the connection as in production.
+    Run it against the configured database: on Postgres the difference is the
+    connection handshake (and TLS/authentication), on SQLite it is small. A user, a
+    token and a task are created for the run and deleted afterwards.
+    """
+    help = 'Benchmark request latency with and without persistent database connections.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line options.
+        Args:
+            parser (ArgumentParser): The parser of the command.
+        """
+        parser.add_argument('--requests', type=int, default=500, help='Requests per measurement.')
+        parser.add_argument('--database', default='default', help='The database alias to benchmark.')
+        parser.add_argument('--conn-max-age', type=int, default=600,
+                            help='CONN_MAX_AGE of the persistent measurement, in seconds.')
+
+    def handle(self, *args, **options):
+        """
+        Runs the measurement without and with connection reuse.
+        Args:
+            **options: The parsed options.
+        """
+        connection = connections[options['database']]
+        configured = connection.settings_dict['CONN_MAX_AGE']
+        user = User.objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:12]}')
+        token = Token.objects.create(user=user)
+        task = Task.objects.create(author=user, title='Task', description='Benchmark', due_date=date.today(),
+                                   status='todo', bgcolor={})
+        client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Token {token.key}')
+        path = reverse('task-detail', args=[task.pk])
+        try:
+            for name, max_age in (('per request', 0), ('persistent', options['conn_max_age'])):
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                timings, opened = self.measure(client, path, options['requests'], connection.alias)
+                self.stdout.write(
+                    f'{name} (CONN_MAX_AGE={max_age}): mean {statistics.fmean(timings):.2f} ms, '
+                    f'p50 {statistics.median(timings):.2f} ms, '
+                    f'p95 {statistics.quantiles(timings, n=20)[-1]:.2f} ms, {opened} connections opened'
+                )
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = configured
+            user.delete()
+
+    def measure(self, client, path, count, alias):
+        """
+        Sends the requests one after another.
+        Args:
+            client (Client): The test client carrying the token.
+            path (str): The path requested.
+            count (int): Number of requests.
+            alias (str): The database alias whose new connections are counted.
+        Returns:
+            tuple: The latencies in milliseconds and the number of connections opened.
+        """
+        opened = 0
+
+        def count_connection(sender, connection, **kwargs):
+            nonlocal opened
+            if connection.alias == alias:
+                opened += 1
+
+        connection_created.connect(count_connection)
+        timings, failed = [], 0
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                close_old_connections()
+                response = client.get(path)
+                close_old_connections()
+                timings.append((time.perf_counter() - started) * 1000)
+                failed += response.status_code != 200
+        finally:
+            connection_created.disconnect(count_connection)
+        if failed:
+            self.stderr.write(f'{failed} requests failed, the numbers are not meaningful.')
+        return timings, opened
@@ -0,0 +1,85 @@
+import time
+from datetime import date, timedelta
+from io import BytesIO
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from api.renderers import FastJSONRenderer, FastJSONParser, MessagePackRenderer, MessagePackParser, msgpack, orjson
+
+
+class Command(BaseCommand):
+    """
+    Compares render and parse time and payload size of the response formats on a
+    synthetic board shaped like the task list. No database access is needed.
+    """
+    help = 'Benchmark the JSON and MessagePack renderers on large synthetic boards.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line options.
+        Args:
+            parser (ArgumentParser): The parser of the command.
+        """
+        parser.add_argument('--tasks', type=int, nargs='+', default=[10000, 50000],
+                            help='Numbers of tasks on the board.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, the best one counts.')
+
+    def handle(self, *args, **options):
+        """
+        Runs the benchmark for every board size.
+        Args:
+            **options: The parsed options.
+        """
+        formats = [('json (stdlib)', JSONRenderer(), JSONParser())]
+        if orjson is not None:
+            formats.append(('json (orjson)', FastJSONRenderer(), FastJSONParser()))
+        else:
+            self.stdout.write('orjson is not installed, FastJSONRenderer falls back to stdlib.')
+        if msgpack is not None:
+            formats.append(('msgpack', MessagePackRenderer(), MessagePackParser()))
+        else:
+            self.stdout.write('msgpack is not installed, skipping MessagePack.')
+        for count in options['tasks']:
+            board = self.build_board(count)
+            for name, renderer, parser in formats:
+                body = renderer.render(board)
+                render = self.measure(options['repeat'], lambda: renderer.render(board))
+                parse = self.measure(options['repeat'], lambda: parser.parse(BytesIO(body)))
+                self.stdout.write(f'{count} tasks, {name}: render {render:.3f}s, parse {parse:.3f}s, '
+                                  f'{len(body) / 1024:.0f} KiB')
+
+    def build_board(self, count):
+        """
+        Builds serialized tasks with nested JSON like real boards carry.
+        Args:
+            count (int): Number of tasks.
+        Returns:
+            list: The serialized tasks.
+        """
+        today = date.today()
+        return [{
+            'id': i, 'due_date': today + timedelta(days=i % 365), 'assignees': [i % 20, (i + 1) % 20],
+            'author': 1, 'title': f'Task {i}', 'description': 'Write the quarterly report ' * 3,
+            'status': ('todo', 'progress', 'done')[i % 3], 'category': 'Work', 'priority': 'medium',
+            'assignedTo': [{'name': 'Jane', 'surname': 'Doe', 'email': 'jane.doe@example.com', 'bgcolor': '#FF7A00'}],
+            'bgcolor': {'category': '#0038FF', 'priority': '#FFA800'},
+            'subtasks': [{'title': f'Step {n}', 'done': n % 2 == 0} for n in range(3)],
+            'version': i, 'position': float(i), 'subtasks_done': 2, 'subtasks_total': 3,
+        } for i in range(count)]
+
+    def measure(self, repeat, run):
+        """
+        Times a callable.
+        Args:
+            repeat (int): Number of runs.
+            run (callable): The code to time.
+        Returns:
+            float: The fastest run in seconds.
+        """
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,87 @@
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from api.fast_serializers import values_serializer
+from api.models import Task, TaskAssignment, Contact
+from api.serializers import TaskItemSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compares TaskItemSerializer with the values()-based list serializer.
+    Synthetic tasks are created inside a transaction that is rolled back at the end,
+    so the command leaves the database unchanged.
+    """
+    help = 'Benchmark task list serialization on synthetic data (rolled back).'
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line options.
+        Args:
+            parser (ArgumentParser): The parser of the command.
+        """
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000],
+                            help='Numbers of tasks to serialize.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, the best one counts.')
+
+    def handle(self, *args, **options):
+        """
+        Runs the benchmark for every row count.
+        Args:
+            **options: The parsed options.
+        """
+        with transaction.atomic():
+            contacts = Contact.objects.bulk_create(
+                [Contact(name=f'Contact {i}', surname='Bench', email=f'bench{i}@example.com') for i in range(20)])
+            created = 0
+            for rows in sorted(options['rows']):
+                self.create_tasks(created, rows, contacts)
+                created = rows
+                queryset = Task.objects.order_by('id')[:rows]
+                slow = self.measure(options['repeat'], lambda: TaskItemSerializer(
+                    queryset.prefetch_related('assignees'), many=True).data)
+                fast_serializer = values_serializer(TaskItemSerializer)
+                fast = self.measure(options['repeat'], lambda: fast_serializer.serialize(
+                    fast_serializer.values(queryset)))
+                self.stdout.write(f'{rows} tasks: ModelSerializer {slow:.3f}s, values() {fast:.3f}s, '
+                                  f'speedup {slow / fast:.1f}x')
+            transaction.set_rollback(True)
+
+    def create_tasks(self, start, stop, contacts):
+        """
+        Creates the synthetic tasks numbered start to stop, each with two assignees.
+        Args:
+            start (int): Number of tasks created so far.
+            stop (int): Number of tasks to have afterwards.
+            contacts (list): The contacts to assign.
+        """
+        today = date.today()
+        tasks = Task.objects.bulk_create([
+            Task(title=f'Task {i}', description='Benchmark task', due_date=today + timedelta(days=i % 365),
+                 status=('todo', 'progress', 'done')[i % 3], category='Bench', priority='low',
+                 assignedTo=[], bgcolor={'color': '#0038FF'}, subtasks=[], position=i, version=1)
+            for i in range(start, stop)
+        ], batch_size=500)
+        TaskAssignment.objects.bulk_create([
+            TaskAssignment(task=task, contact=contacts[(task.pk + offset) % len(contacts)])
+            for task in tasks for offset in (0, 1)
+        ], batch_size=500)
+
+    def measure(self, repeat, serialize):
+        """
+        Times serialization including JSON rendering.
+        Args:
+            repeat (int): Number of runs.
+            serialize (callable): Returns the serialized data.
+        Returns:
+            float: The fastest run in seconds.
+        """
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            JSONRenderer().render(serialize())
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
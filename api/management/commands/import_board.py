@@ -0,0 +1,62 @@
+import io
+import os
+import sys
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from api.imports import IMPORTERS, IMPORT_TYPES, UnreadableInput
+
+
+class Command(BaseCommand):
+    """
+    Imports tasks or contacts from a CSV or NDJSON file (as written by the export views).
+    The file is parsed as a stream and written in chunks with bulk_create inside one
+    transaction; invalid rows are reported at the end.
+    """
+    help = 'Import tasks or contacts from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments.
+        Args:
+            parser (ArgumentParser): The parser of the command.
+        """
+        parser.add_argument('kind', choices=sorted(IMPORTERS), help='What to import.')
+        parser.add_argument('path', help='The file to import, - for stdin.')
+        parser.add_argument('--type', choices=IMPORT_TYPES, help='The file format, by default taken from the extension.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and inserted at once.')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Keep the valid rows even if some rows are invalid.')
+        parser.add_argument('--user', help='Username recorded as author of imported tasks.')
+
+    def handle(self, *args, **options):
+        """
+        Runs the import and reports the result.
+        Args:
+            **options: The parsed options.
+        Raises:
+            CommandError: If the input or the user cannot be found or read, or rows were invalid.
+        """
+        import_type = options['type'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if import_type not in IMPORT_TYPES:
+            raise CommandError('Cannot tell the file format, pass --type.')
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f'User "{options["user"]}" does not exist.')
+        importer = IMPORTERS[options['kind']](options['batch_size'], options['skip_invalid'], user)
+        try:
+            if options['path'] == '-':
+                result = importer.run(io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline=''), import_type)
+            else:
+                with open(options['path'], encoding='utf-8', newline='') as lines:
+                    result = importer.run(lines, import_type)
+        except (OSError, UnreadableInput) as exc:
+            raise CommandError(str(exc))
+        for error in result['errors']:
+            self.stderr.write(f'Line {error["line"]}: {error["errors"]}')
+        if result['error_count'] > len(result['errors']):
+            self.stderr.write(f'... and {result["error_count"] - len(result["errors"])} more invalid row(s).')
+        self.stdout.write(f'Imported {result["created"]} {options["kind"]}, {result["error_count"]} invalid row(s).')
+        if result['error_count'] and not options['skip_invalid']:
+            raise CommandError('Nothing was imported because of invalid rows, fix them or pass --skip-invalid.')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from api.authentication import get_token_ttl
+
+
+class Command(BaseCommand):
+    """
+    Deletes API tokens that have not been used for longer than ``TOKEN_TTL``.
+    Tokens are deleted in batches by primary key, so the command can run against a
+    large token table without holding long locks. Run it periodically, e.g. from cron.
+    """
+    help = 'Delete API tokens that have expired.'
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line options.
+        Args:
+            parser (ArgumentParser): The parser of the command.
+        """
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of tokens deleted per query.')
+
+    def handle(self, *args, **options):
+        """
+        Deletes the expired tokens batch by batch.
+        Args:
+            **options: The parsed options.
+        """
+        cutoff = timezone.now() - get_token_ttl()
+        expired = Token.objects.filter(created__lt=cutoff)
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            deleted += Token.objects.filter(key__in=keys).delete()[0]
+        self.stdout.write(f'Deleted {deleted} expired token(s).')
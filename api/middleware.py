@@ -0,0 +1,293 @@
+import gzip
+import hashlib
+import zlib
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import has_vary_header, patch_vary_headers
+from django.utils.text import compress_sequence
+from .routers import apin_primary, areplica_for, pin_primary, reading_from, replica_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+DEFAULT_COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'CONTENT_TYPES': ['application/json', 'application/msgpack', 'text/html', 'text/csv', 'application/x-ndjson'],
+    'ENCODINGS': ['br', 'zstd', 'gzip'],
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'ZSTD_LEVEL': 3,
+    'CACHE': 'default',
+    'CACHE_TIMEOUT': 300,
+}
+
+
+def get_compression_settings():
+    """
+    Returns the compression settings, ``COMPRESSION`` merged over the defaults.
+    Returns:
+        dict: The settings.
+    """
+    return {**DEFAULT_COMPRESSION, **getattr(settings, 'COMPRESSION', {})}
+
+
+def compress_gzip(data, options):
+    """
+    Compresses with gzip. The header carries no timestamp, so equal input gives equal output.
+    """
+    return gzip.compress(data, compresslevel=options['GZIP_LEVEL'], mtime=0)
+
+
+def compress_brotli(data, options):
+    """
+    Compresses with brotli.
+    """
+    return brotli.compress(data, quality=options['BROTLI_QUALITY'])
+
+
+def compress_zstd(data, options):
+    """
+    Compresses with zstandard.
+    """
+    return zstandard.ZstdCompressor(level=options['ZSTD_LEVEL']).compress(data)
+
+
+async def acompress_sequence(sequence, options):
+    """
+    Compresses an async stream with gzip, flushing after every chunk so each is sent without delay.
+    Args:
+        sequence (AsyncIterable): The chunks of the body.
+        options (dict): The compression settings.
+    Yields:
+        bytes: The compressed chunks.
+    """
+    compressor = zlib.compressobj(options['GZIP_LEVEL'], zlib.DEFLATED, 31)
+    async for chunk in sequence:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# The available encodings; brotli and zstd only if their modules are installed.
+COMPRESSORS = {'gzip': compress_gzip}
+if brotli is not None:
+    COMPRESSORS['br'] = compress_brotli
+if zstandard is not None:
+    COMPRESSORS['zstd'] = compress_zstd
+
+
+def parse_accept_encoding(header):
+    """
+    Parses an Accept-Encoding header into quality values.
+    Args:
+        header (str): The header value, e.g. 'gzip;q=0.8, br'.
+    Returns:
+        dict: The quality (float) of every listed coding, lowercased.
+    """
+    qualities = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def choose_encoding(header, encodings):
+    """
+    Picks the content coding for a response.
+    The client's quality values decide; among equally weighted codings the server's
+    order in ``encodings`` wins. A quality of 0 rules a coding out.
+    Args:
+        header (str): The Accept-Encoding header of the request.
+        encodings (list): The available codings in order of preference.
+    Returns:
+        str or None: The chosen coding, or None to send the response uncompressed.
+    """
+    qualities = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best coding the client accepts (see ``COMPRESSION``).
+    Only responses with an allowed content type and at least MIN_SIZE bytes are
+    compressed, and only if that makes them smaller. Responses with an ETag are the
+    same bytes for as long as the ETag holds, so their compressed form is kept in the
+    cache under the ETag and the user and reused, sparing hot boards a recompression
+    on every hit. HTML pages (the browsable API embeds the user and a CSRF token) and
+    responses varying on Cookie or Authorization are never taken from the cache.
+    Streaming responses are compressed on the fly with gzip.
+    Compressing changes the bytes, so strong ETags are weakened like GZipMiddleware does.
+    The middleware runs in sync and async mode, so under ASGI async views stay on the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+        Sets up the middleware.
+        Args:
+            get_response (callable): The next middleware or view.
+        """
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """
+        Handles a request and compresses the response.
+        Args:
+            request (HttpRequest): The incoming request.
+        Returns:
+            HttpResponse: The possibly compressed response.
+        """
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        """
+        Async variant of __call__().
+        """
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        """
+        Compresses a response if it qualifies.
+        Args:
+            request (HttpRequest): The request.
+            response (HttpResponse): The response.
+        Returns:
+            HttpResponse: The response.
+        """
+        options = get_compression_settings()
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if response.has_header('Content-Encoding') or content_type not in options['CONTENT_TYPES']:
+            return response
+        if not response.streaming and len(response.content) < options['MIN_SIZE']:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encodings = [encoding for encoding in options['ENCODINGS'] if encoding in COMPRESSORS]
+        if response.streaming:
+            encodings = ['gzip'] if 'gzip' in encodings else []
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), encodings)
+        if encoding is None:
+            return response
+        if response.streaming and response.is_async:
+            response.streaming_content = acompress_sequence(response.streaming_content, options)
+            del response.headers['Content-Length']
+        elif response.streaming:
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = self.compressed_content(request, response, encoding, options)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def compressed_content(self, request, response, encoding, options):
+        """
+        Returns the compressed body, from the cache if the same user got a response with
+        the same ETag compressed before.
+        Args:
+            request (HttpRequest): The request.
+            response (HttpResponse): The uncompressed response.
+            encoding (str): The content coding.
+            options (dict): The compression settings.
+        Returns:
+            bytes: The compressed body.
+        """
+        etag = response.get('ETag')
+        if not etag or etag.startswith('W/') or not options['CACHE_TIMEOUT'] or response.status_code != 200:
+            return COMPRESSORS[encoding](response.content, options)
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type == 'text/html' or any(has_vary_header(response, header) for header in ('Cookie', 'Authorization')):
+            return COMPRESSORS[encoding](response.content, options)
+        cache = caches[options['CACHE']]
+        user = getattr(getattr(request, 'user', None), 'pk', None)
+        key = f'compressed:{encoding}:{user}:' + hashlib.sha1(etag.encode('utf-8')).hexdigest()
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = COMPRESSORS[encoding](response.content, options)
+            cache.set(key, compressed, options['CACHE_TIMEOUT'])
+        return compressed
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends the reads of eligible requests to a read replica (see ``REPLICA_ROUTING`` and
+    api.routers.replica_for) and keeps a client on the primary for a while after it writes.
+    Queries made after the response is returned (streamed bodies) go to the primary.
+    The middleware runs in sync and async mode, so under ASGI async views stay on the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+        Sets up the middleware.
+        Args:
+            get_response (callable): The next middleware or view.
+        """
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """
+        Handles a request with its reads routed, and pins the client to the primary after a write.
+        Args:
+            request (HttpRequest): The incoming request.
+        Returns:
+            HttpResponse: The response.
+        """
+        if self.async_mode:
+            return self.__acall__(request)
+        with reading_from(replica_for(request)):
+            response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            pin_primary(request)
+        return response
+
+    async def __acall__(self, request):
+        """
+        Async variant of __call__(), reading and setting the pin without blocking the event loop.
+        """
+        with reading_from(await areplica_for(request)):
+            response = await self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            await apin_primary(request)
+        return response
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-17 18:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_task_author'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['due_date', 'id'], name='task_due_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.4 on 2026-10-17 18:57
+
+from django.db import migrations, models
+
+
+def stamp_existing_rows(apps, schema_editor):
+    """
+    Gives all existing tasks and contacts version 1 so that a sync from version 0 returns them.
+    """
+    ChangeCounter = apps.get_model('api', 'ChangeCounter')
+    Task = apps.get_model('api', 'Task')
+    Contact = apps.get_model('api', 'Contact')
+    db = schema_editor.connection.alias
+    Task.objects.using(db).update(version=1)
+    Contact.objects.using(db).update(version=1)
+    ChangeCounter.objects.using(db).create(name='sync', value=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_task_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('version', models.BigIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model_name', 'version'], name='tombstone_model_version_idx')],
+            },
+        ),
+        migrations.RunPython(stamp_existing_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-17 18:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_change_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changecounter',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.4 on 2026-10-17 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def rank_existing_tasks(apps, schema_editor):
+    """
+    Gives existing tasks distinct ranks in creation order.
+    """
+    Task = apps.get_model('api', 'Task')
+    Task.objects.using(schema_editor.connection.alias).update(position=F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_changecounter_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='position',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'position', 'id'], name='task_status_position_idx'),
+        ),
+        migrations.RunPython(rank_existing_tasks, migrations.RunPython.noop),
+    ]
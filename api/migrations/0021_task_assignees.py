@@ -0,0 +1,139 @@
+# Generated by Django 5.0.4 on 2026-10-17 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class ContactIndex:
+    """
+    In-memory lookup of contacts used to resolve task assignees. A copy of
+    api.assignees.ContactIndex as of this migration, so later changes to it do not
+    change what the migration does.
+    Legacy clients describe assignees in the ``assignedTo`` JSON as contact objects
+    or names. The index maps those descriptions to contact ids without a query per
+    entry, so a whole batch of tasks is resolved with the single query that loads it.
+    Attributes:
+        ids (set): The ids of all contacts.
+    """
+    def __init__(self, rows):
+        """
+        Builds the index.
+        Args:
+            rows (iterable): Tuples of (id, name, surname, email) for every contact.
+        """
+        self.ids = set()
+        self.by_email = {}
+        self.by_name = {}
+        for pk, name, surname, email in rows:
+            self.ids.add(pk)
+            if email:
+                self.by_email.setdefault(email.lower(), pk)
+            full_name = f'{name} {surname}'.strip().lower()
+            self.by_name.setdefault(full_name, pk)
+            self.by_name.setdefault((name or '').strip().lower(), pk)
+
+    @classmethod
+    def load(cls, contacts):
+        """
+        Loads the index with one query.
+        Args:
+            contacts (QuerySet): The Contact queryset (or historical model manager) to index.
+        Returns:
+            ContactIndex: The loaded index.
+        """
+        return cls(contacts.values_list('id', 'name', 'surname', 'email'))
+
+    def resolve(self, assigned_to):
+        """
+        Resolves an ``assignedTo`` value to contact ids.
+        Entries may be contact ids, dicts with an 'id', 'email' or 'name'/'surname',
+        or plain strings holding a full name. Entries that match no contact are skipped.
+        Args:
+            assigned_to: The legacy ``assignedTo`` JSON value.
+        Returns:
+            list: The ids of the matching contacts, without duplicates, in input order.
+        """
+        if assigned_to is None:
+            return []
+        entries = assigned_to if isinstance(assigned_to, list) else [assigned_to]
+        resolved = []
+        for entry in entries:
+            pk = self._resolve_entry(entry)
+            if pk is not None and pk not in resolved:
+                resolved.append(pk)
+        return resolved
+
+    def _resolve_entry(self, entry):
+        """
+        Resolves a single entry of ``assignedTo``.
+        Args:
+            entry: An id, dict or name.
+        Returns:
+            int or None: The contact id, or None if nothing matches.
+        """
+        if isinstance(entry, bool):
+            return None
+        if isinstance(entry, int):
+            return entry if entry in self.ids else None
+        if isinstance(entry, str):
+            return self.by_name.get(entry.strip().lower())
+        if isinstance(entry, dict):
+            pk = entry.get('id')
+            if isinstance(pk, int) and not isinstance(pk, bool) and pk in self.ids:
+                return pk
+            email = entry.get('email')
+            if isinstance(email, str) and email.lower() in self.by_email:
+                return self.by_email[email.lower()]
+            name = f"{entry.get('name') or ''} {entry.get('surname') or ''}".strip().lower()
+            return self.by_name.get(name) if name else None
+        return None
+
+
+def copy_assigned_to(apps, schema_editor):
+    """
+    Creates an assignment for every contact found in the assignedTo JSON of existing tasks.
+    """
+    Task = apps.get_model('api', 'Task')
+    Contact = apps.get_model('api', 'Contact')
+    TaskAssignment = apps.get_model('api', 'TaskAssignment')
+    db = schema_editor.connection.alias
+    index = ContactIndex.load(Contact.objects.using(db))
+    assignments = []
+    for task_id, assigned_to in Task.objects.using(db).exclude(assignedTo=None).values_list('id', 'assignedTo').iterator():
+        assignments.extend(TaskAssignment(task_id=task_id, contact_id=pk) for pk in index.resolve(assigned_to))
+        if len(assignments) >= 1000:
+            TaskAssignment.objects.using(db).bulk_create(assignments)
+            assignments = []
+    TaskAssignment.objects.using(db).bulk_create(assignments)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_task_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='api.contact')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='api.task')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='assignees',
+            field=models.ManyToManyField(blank=True, related_name='assigned_tasks', through='api.TaskAssignment', to='api.contact'),
+        ),
+        migrations.AddIndex(
+            model_name='taskassignment',
+            index=models.Index(fields=['contact', 'task'], name='task_assignment_contact_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskassignment',
+            constraint=models.UniqueConstraint(fields=('task', 'contact'), name='task_assignment_unique'),
+        ),
+        migrations.RunPython(copy_assigned_to, migrations.RunPython.noop),
+    ]
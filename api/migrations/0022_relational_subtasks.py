@@ -0,0 +1,100 @@
+# Generated by Django 5.0.4 on 2026-10-17 19:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+TITLE_KEYS = ('title', 'name', 'text', 'subtask')
+DONE_KEYS = ('done', 'completed', 'checked', 'isDone')
+
+
+def parse_subtasks(value):
+    """
+    Reads the legacy ``subtasks`` JSON of a task into plain subtask descriptions.
+    A copy of api.subtasks.parse_subtasks() as of this migration, so later changes
+    to it do not change what the migration does.
+    Entries may be strings (the title) or dicts with a title under one of TITLE_KEYS
+    and a done flag under one of DONE_KEYS or as ``"status": "done"``. Entries
+    without a title are skipped.
+    Args:
+        value: The legacy ``subtasks`` JSON value.
+    Returns:
+        list: Dicts with 'title', 'done' and 'position' for every subtask, in order.
+    """
+    if value is None:
+        return []
+    entries = value if isinstance(value, list) else [value]
+    parsed = []
+    for entry in entries:
+        if isinstance(entry, str):
+            title, done = entry, False
+        elif isinstance(entry, dict):
+            title = next((entry[key] for key in TITLE_KEYS if isinstance(entry.get(key), str)), None)
+            done = any(entry.get(key) is True for key in DONE_KEYS) or entry.get('status') == 'done'
+        else:
+            continue
+        if title and title.strip():
+            parsed.append({'title': title.strip()[:100], 'done': done, 'position': len(parsed)})
+    return parsed
+
+
+def copy_subtasks(apps, schema_editor):
+    """
+    Creates Subtask rows from the subtasks JSON of existing tasks and fills the counters.
+    """
+    Task = apps.get_model('api', 'Task')
+    Subtask = apps.get_model('api', 'Subtask')
+    db = schema_editor.connection.alias
+    for task in Task.objects.using(db).exclude(subtasks=None).only('id', 'subtasks').iterator():
+        parsed = parse_subtasks(task.subtasks)
+        if not parsed:
+            continue
+        Subtask.objects.using(db).bulk_create([Subtask(task_id=task.id, **subtask) for subtask in parsed])
+        Task.objects.using(db).filter(pk=task.id).update(
+            subtasks_total=len(parsed),
+            subtasks_done=sum(subtask['done'] for subtask in parsed),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_task_assignees'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='subtask',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.AddField(
+            model_name='subtask',
+            name='done',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='subtask',
+            name='position',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='subtask',
+            name='task',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subtask_items', to='api.task'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtasks_done',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtasks_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['task', 'position'], name='subtask_task_position_idx'),
+        ),
+        migrations.RunPython(copy_subtasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.4 on 2026-10-17 20:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Indexes the creation time of API tokens, which purge_expired_tokens filters on.
+    The authtoken table belongs to rest_framework, so the index is created with SQL.
+    """
+
+    dependencies = [
+        ('api', '0022_relational_subtasks'),
+        ('authtoken', '0003_tokenproxy'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS authtoken_token_created_idx ON authtoken_token (created)',
+            reverse_sql='DROP INDEX IF EXISTS authtoken_token_created_idx',
+        ),
+    ]
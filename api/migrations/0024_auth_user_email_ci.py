@@ -0,0 +1,53 @@
+# Generated by Django 5.0.4 on 2026-10-17 20:31
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """
+    Stops the migration with a list of the users sharing an email address regardless of
+    case, which the unique index below would reject. Merging accounts is left to an
+    administrator: change or clear the emails of the extra accounts, then migrate again.
+    """
+    User = apps.get_model('auth', 'User')
+    users = User.objects.using(schema_editor.connection.alias).exclude(email='').annotate(email_ci=Lower('email'))
+    duplicates = users.values('email_ci').annotate(count=Count('id')).filter(count__gt=1).values_list('email_ci', flat=True)
+    groups = {}
+    for pk, username, email, email_ci in users.filter(email_ci__in=list(duplicates)).order_by('email_ci', 'id').values_list(
+            'id', 'username', 'email', 'email_ci'):
+        groups.setdefault(email_ci, []).append(f'{username} (id {pk}, {email})')
+    if groups:
+        listing = '\n'.join(f'  {email}: {", ".join(accounts)}' for email, accounts in groups.items())
+        raise RuntimeError(
+            f'{len(groups)} email address(es) are used by several users, ignoring case. Emails must be '
+            f'unique for the email login; change or clear them on all but one account each and migrate again:\n{listing}'
+        )
+
+
+class Migration(migrations.Migration):
+    """
+    Makes user emails unique regardless of case and indexes them for the email login.
+    Existing duplicates are listed and stop the migration (see check_duplicate_emails()).
+    The unique index skips empty emails, which Django allows for several users. SQLite
+    only uses a partial index when the query repeats its WHERE clause literally, so the
+    login lookup gets a plain expression index of its own.
+    """
+
+    dependencies = [
+        ('api', '0023_authtoken_created_idx'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX IF NOT EXISTS auth_user_email_ci_uniq ON auth_user (LOWER(email)) WHERE email <> ''",
+            reverse_sql='DROP INDEX IF EXISTS auth_user_email_ci_uniq',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (LOWER(email))',
+            reverse_sql='DROP INDEX IF EXISTS auth_user_email_lower_idx',
+        ),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+from contextvars import ContextVar
+from django.db import models, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import User 
 from django.contrib.postgres.fields import ArrayField
 
@@ -15,6 +19,15 @@ class Task(models.Model):
         assignedTo (JSON, optional): JSON field representing users assigned to the task. Defaults to None.
         bgcolor (JSON, optional): JSON field representing background color settings. Defaults to None.
         subtasks (JSON, optional): JSON field representing subtasks. Defaults to None.
+        assignees (ManyToMany): Contacts assigned to the task, stored in TaskAssignment.
+            Kept in sync with ``assignedTo`` for clients that still send the JSON.
+        version (int): Change version of the last write to the task, see next_version().
+        position (float): Sort rank of the task inside its status column. New cards go to
+            the bottom of their column (see column_ends()). Moving a card assigns a rank
+            between its new neighbours, so no other row is touched until the midpoints
+            run out (see renumber_column()).
+        subtasks_done (int): Number of checked-off Subtask rows, see refresh_subtask_counters().
+        subtasks_total (int): Number of Subtask rows.
     """
     author = models.ForeignKey(User, on_delete=models.CASCADE, null=True)
     title = models.CharField(max_length=100)
@@ -26,6 +39,21 @@ class Task(models.Model):
     assignedTo = models.JSONField(null=True, blank=True)
     bgcolor = models.JSONField(blank=True)
     subtasks = models.JSONField(null=True, blank=True)
+    assignees = models.ManyToManyField('Contact', through='TaskAssignment', related_name='assigned_tasks', blank=True)
+    version = models.BigIntegerField(default=0, db_index=True)
+    position = models.FloatField(default=0)
+    subtasks_done = models.PositiveIntegerField(default=0)
+    subtasks_total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'position', 'id'], name='task_status_position_idx'),
+            models.Index(fields=['due_date', 'id'], name='task_due_date_id_idx'),
+            models.Index(fields=['author', 'status', 'due_date'], name='task_author_status_due_idx'),
+            models.Index(fields=['status', 'due_date', 'id'], name='task_status_due_date_idx'),
+            models.Index(fields=['category', 'due_date'], name='task_category_due_date_idx'),
+            models.Index(fields=['priority', 'due_date'], name='task_priority_due_date_idx'),
+        ]
     
     def __str__(self):
         """
@@ -34,6 +62,14 @@ class Task(models.Model):
             str: The title of the task.
         """
         return f"{self.title}"
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the task and stamps it with a new change version in the same transaction.
+        """
+        with transaction.atomic():
+            stamp_version(self, kwargs)
+            super().save(*args, **kwargs)
     
     
 class Contact(models.Model):
@@ -45,12 +81,14 @@ class Contact(models.Model):
         email (str): The email address of the contact. Can be null.
         telefon (str): The telephone number of the contact. Can be null.
         bgcolor (str): The background color associated with the contact. Default is "#0038FF".
+        version (int): Change version of the last write to the contact, see next_version().
     """
     name = models.CharField(max_length=100)
     surname = models.CharField(max_length=100)
     email = models.EmailField(max_length=254, null=True, blank=True) 
     telefon = models.CharField(max_length=30, null=True, blank=True)
     bgcolor = models.CharField(max_length=7, default="#0038FF", blank=True)
+    version = models.BigIntegerField(default=0, db_index=True)
 
     
     def __str__(self):
@@ -60,15 +98,64 @@ class Contact(models.Model):
             str: The name of the contact.
         """
         return f"{self.name}"
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the contact and stamps it with a new change version in the same transaction.
+        """
+        with transaction.atomic():
+            stamp_version(self, kwargs)
+            super().save(*args, **kwargs)
     
 
+class TaskAssignment(models.Model):
+    """
+    Assigns a contact to a task.
+    The unique constraint doubles as the index for "contacts of a task", the second
+    index answers "tasks of a contact".
+    Attributes:
+        task (Task): The assigned task.
+        contact (Contact): The contact the task is assigned to.
+    """
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='assignments')
+    contact = models.ForeignKey(Contact, on_delete=models.CASCADE, related_name='assignments')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'contact'], name='task_assignment_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['contact', 'task'], name='task_assignment_contact_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the assignment.
+        Returns:
+            str: The task and the contact.
+        """
+        return f"{self.task_id} -> {self.contact_id}"
+
+
 class Subtask(models.Model):
     """
     Represents a subtask in a task management system.
     Attributes:
+        task (Task): The task the subtask belongs to.
         title (str): The title of the subtask.
+        done (bool): Whether the subtask is checked off.
+        position (int): Sort rank of the subtask inside its task.
     """
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='subtask_items', null=True)
     title = models.CharField(max_length=100)
+    done = models.BooleanField(default=False)
+    position = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['position', 'id']
+        indexes = [
+            models.Index(fields=['task', 'position'], name='subtask_task_position_idx'),
+        ]
     
     def __str__(self):
         """
@@ -76,4 +163,211 @@ class Subtask(models.Model):
         Returns:
             str: The title of the subtask.
         """
-        return f"{self.title}"
\ No newline at end of file
+        return f"{self.title}"
+
+
+class ChangeCounter(models.Model):
+    """
+    A named, monotonically increasing counter.
+    The row named SYNC_COUNTER hands out the change versions of Task and Contact.
+    Rows named after a model ("task", "contact") hold the version of the last write
+    to that table and are used as cheap per-table validators for conditional GETs.
+    Attributes:
+        name (str): The unique name of the counter.
+        value (int): The last value handed out.
+        updated_at (datetime): When the counter was last changed.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        """
+        Returns a string representation of the counter.
+        Returns:
+            str: The name and value of the counter.
+        """
+        return f"{self.name}={self.value}"
+
+
+class Tombstone(models.Model):
+    """
+    Marks a deleted Task or Contact so that delta-sync clients learn about the deletion.
+    Attributes:
+        model_name (str): The name of the deleted model, e.g. "task" or "contact".
+        object_id (int): The primary key the deleted row had.
+        version (int): Change version of the deletion.
+    """
+    model_name = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    version = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model_name', 'version'], name='tombstone_model_version_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the tombstone.
+        Returns:
+            str: The model name and id of the deleted row.
+        """
+        return f"{self.model_name} {self.object_id}"
+
+
+SYNC_COUNTER = 'sync'
+
+tombstones_written = ContextVar('tombstones_written', default=False)
+
+
+def next_version(count=1, scope=None):
+    """
+    Reserves the next change version(s) from the sync counter.
+    The counter row stays locked until the surrounding transaction commits, so a
+    version only becomes visible together with the rows stamped with it.
+    Args:
+        count (int, optional): Number of consecutive versions to reserve. Defaults to 1.
+        scope (str, optional): Name of the table being written, e.g. "task". Its
+            per-table counter is moved to the reserved version as well.
+    Returns:
+        int: The highest reserved version. The reserved range ends with it.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        if not ChangeCounter.objects.filter(name=SYNC_COUNTER).update(value=F('value') + count, updated_at=now):
+            ChangeCounter.objects.get_or_create(name=SYNC_COUNTER)
+            ChangeCounter.objects.filter(name=SYNC_COUNTER).update(value=F('value') + count, updated_at=now)
+        version = ChangeCounter.objects.values_list('value', flat=True).get(name=SYNC_COUNTER)
+        if scope is not None:
+            if not ChangeCounter.objects.filter(name=scope).update(value=version, updated_at=now):
+                ChangeCounter.objects.update_or_create(name=scope, defaults={'value': version, 'updated_at': now})
+        return version
+
+
+def current_version():
+    """
+    Returns the highest committed change version.
+    Returns:
+        int: The current value of the sync counter, 0 if nothing was written yet.
+    """
+    return ChangeCounter.objects.filter(name=SYNC_COUNTER).values_list('value', flat=True).first() or 0
+
+
+def stamp_version(instance, save_kwargs):
+    """
+    Assigns a new change version to a model instance that is about to be saved.
+    Args:
+        instance (Model): The Task or Contact being saved.
+        save_kwargs (dict): The keyword arguments passed to save(). If they restrict
+            the saved columns with update_fields, the version column is added.
+    """
+    instance.version = next_version(scope=instance._meta.model_name)
+    update_fields = save_kwargs.get('update_fields')
+    if update_fields is not None:
+        save_kwargs['update_fields'] = set(update_fields) | {'version'}
+
+
+def delete_tracked(queryset):
+    """
+    Deletes all rows of a queryset, recording their tombstones with a single INSERT.
+    The per-row post_delete handler is skipped for these rows, so the number of
+    queries does not grow with the number of deleted rows.
+    Args:
+        queryset (QuerySet): The Task or Contact rows to delete.
+    Returns:
+        list: The primary keys of the deleted rows.
+    """
+    model_name = queryset.model._meta.model_name
+    with transaction.atomic():
+        ids = list(queryset.values_list('pk', flat=True))
+        if not ids:
+            return ids
+        version = next_version(scope=model_name)
+        Tombstone.objects.bulk_create(
+            [Tombstone(model_name=model_name, object_id=pk, version=version) for pk in ids]
+        )
+        token = tombstones_written.set(True)
+        try:
+            queryset.model.objects.filter(pk__in=ids).delete()
+        finally:
+            tombstones_written.reset(token)
+    return ids
+
+
+def column_ends(statuses):
+    """
+    Returns the rank after the last card of each status column, with one query.
+    Args:
+        statuses (iterable): The status columns.
+    Returns:
+        dict: The rank of a card appended to each column; 0 for an empty column.
+    """
+    ends = dict.fromkeys(statuses, 0.0)
+    if ends:
+        for status, last in Task.objects.filter(status__in=ends).values_list('status').annotate(last=Max('position')):
+            ends[status] = last + 1
+    return ends
+
+
+def renumber_column(status, after, moved_id, version):
+    """
+    Spaces the ranks of a status column out again when a card cannot be ranked between
+    its neighbours, because their ranks are equal or too close for a float midpoint.
+    The other cards keep their order and get the ranks 0, 1, 2, ..., with one rank left
+    free after the last card ranked ``after``; they are written with one bulk UPDATE and
+    stamped with ``version``.
+    Args:
+        status (str): The column the card is dropped into.
+        after (float): The rank of the card above the drop point.
+        moved_id (int): The primary key of the moved card, which is left out.
+        version (int): The change version of the move.
+    Returns:
+        float: The free rank for the moved card.
+    """
+    tasks = list(Task.objects.filter(status=status).exclude(pk=moved_id).order_by('position', 'id')
+                 .only('id', 'position'))
+    slot = sum(1 for task in tasks if task.position <= after)
+    for rank, task in enumerate(tasks):
+        task.position = float(rank if rank < slot else rank + 1)
+        task.version = version
+    Task.objects.bulk_update(tasks, ['position', 'version'], batch_size=500)
+    return float(slot)
+
+
+def refresh_subtask_counters(task_ids):
+    """
+    Recomputes the denormalized subtask counters of the given tasks with one UPDATE
+    and stamps the tasks with a new change version.
+    Args:
+        task_ids (iterable): The ids of the tasks whose subtasks changed.
+    """
+    task_ids = {pk for pk in task_ids if pk is not None}
+    if not task_ids:
+        return
+    counts = (Subtask.objects.filter(task=OuterRef('pk')).order_by().values('task')
+              .annotate(total=Count('pk'), done=Count('pk', filter=Q(done=True))))
+    with transaction.atomic():
+        Task.objects.filter(pk__in=task_ids).update(
+            subtasks_total=Coalesce(Subquery(counts.values('total')), Value(0)),
+            subtasks_done=Coalesce(Subquery(counts.values('done')), Value(0)),
+            version=next_version(scope='task'),
+        )
+
+
+def replace_subtasks(subtasks, batch_size=None):
+    """
+    Replaces the Subtask rows of tasks whose legacy ``subtasks`` JSON was rewritten,
+    with one DELETE and one INSERT. The caller stores the matching counters on the tasks.
+    Args:
+        subtasks (dict): The parsed subtasks (see parse_subtasks()) by task id.
+        batch_size (int, optional): Rows per INSERT.
+    """
+    if not subtasks:
+        return
+    with transaction.atomic():
+        Subtask.objects.filter(task_id__in=list(subtasks)).delete()
+        Subtask.objects.bulk_create(
+            [Subtask(task_id=pk, **subtask) for pk, parsed in subtasks.items() for subtask in parsed],
+            batch_size=batch_size
+        )
@@ -0,0 +1,211 @@
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TaskCursorPagination(BasePagination):
+    """
+    Keyset (cursor) pagination for the task list.
+    Pages are addressed by an opaque cursor holding the sort key of the last row
+    of the previous page. The next page is fetched with a range condition on that
+    key instead of an OFFSET, so every page is an index range scan no matter how
+    many tasks exist.
+    Attributes:
+        page_size (int): Default number of tasks per page.
+        max_page_size (int): Hard cap for a page size requested by the client.
+        page_size_query_param (str): Query parameter for a client-chosen page size.
+        cursor_query_param (str): Query parameter carrying the opaque cursor.
+        ordering_query_param (str): Query parameter selecting one of the orderings.
+        orderings (dict): The available orderings, the first one is the default.
+            Each is a tuple of fields the keyset is built on; the last one must be unique.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'order'
+    orderings = {
+        'due_date': ('due_date', 'id'),
+        'position': ('position', 'id'),
+    }
+    ordering = orderings['due_date']
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return a single page of the queryset, starting after the requested cursor.
+        Args:
+            queryset (QuerySet): The queryset to paginate.
+            request (Request): The incoming request.
+            view (APIView, optional): The view performing the pagination.
+        Returns:
+            list: The rows of the current page.
+        Raises:
+            NotFound: If the cursor is malformed.
+        """
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async variant of paginate_queryset(), fetching the page with async iteration.
+        Args:
+            queryset (QuerySet): The queryset to paginate.
+            request (Request): The incoming request.
+            view (View, optional): The view performing the pagination.
+        Returns:
+            list: The rows of the current page.
+        Raises:
+            NotFound: If the cursor is malformed.
+        """
+        return self.set_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """
+        Narrow the queryset down to the rows of the requested page, plus one to tell if there is a next page.
+        Args:
+            queryset (QuerySet): The queryset to paginate.
+            request (Request): The incoming request.
+        Returns:
+            QuerySet: The sliced, ordered queryset.
+        Raises:
+            NotFound: If the cursor is malformed.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(position))
+        return queryset.order_by(*self.ordering)[:self.page_size + 1]
+
+    def set_page(self, rows):
+        """
+        Remember whether another page follows and where it starts.
+        Args:
+            rows (list): The rows fetched by page_queryset().
+        Returns:
+            list: The rows of the current page.
+        """
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        """
+        Wrap the serialized page together with the link to the next page.
+        Args:
+            data (list): The serialized rows of the current page.
+        Returns:
+            Response: Response containing 'next' and 'results'.
+        """
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        """
+        Determine the page size, honouring the client's wish up to the hard cap.
+        Args:
+            request (Request): The incoming request.
+        Returns:
+            int: The page size to use.
+        """
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if requested <= 0:
+            return self.page_size
+        return min(requested, self.max_page_size)
+
+    def get_ordering(self, request):
+        """
+        Determine the ordering requested by the client, falling back to the default.
+        Args:
+            request (Request): The incoming request.
+        Returns:
+            tuple: The fields to order by.
+        """
+        return self.orderings.get(request.query_params.get(self.ordering_query_param), self.ordering)
+
+    def get_keyset_filter(self, position):
+        """
+        Build the condition selecting all rows sorting strictly after the given position.
+        For the ordering (a, b) this is ``a > x OR (a = x AND b > y)``.
+        Args:
+            position (list): The values of the ordering fields of the last seen row.
+        Returns:
+            Q: The filter condition.
+        """
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            prefix = {name: value for name, value in zip(self.ordering[:index], position)}
+            condition |= Q(**prefix, **{f'{field}__gt': position[index]})
+        return condition
+
+    def get_position(self, row):
+        """
+        Read the values of the ordering fields from a row.
+        Args:
+            row (Model or dict): A model instance or a ``values()`` row.
+        Returns:
+            list: The values of the ordering fields, JSON compatible.
+        """
+        values = [row[field] if isinstance(row, dict) else getattr(row, field) for field in self.ordering]
+        return [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+
+    def decode_cursor(self, request, model):
+        """
+        Decode the opaque cursor from the request.
+        The values of the position are converted to the types of their model fields,
+        so a cursor that decodes but carries values of the wrong shape never reaches the database.
+        Args:
+            request (Request): The incoming request.
+            model (type): The model class of the paginated queryset.
+        Returns:
+            list or None: The position encoded in the cursor, or None for the first page.
+        Raises:
+            NotFound: If the cursor is malformed or was issued for another ordering.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            ordering, position = payload['o'], payload['p']
+            if ordering != list(self.ordering) or not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError("Cursor does not match the ordering")
+            position = [model._meta.get_field(field).to_python(value) for field, value in zip(self.ordering, position)]
+            if None in position:
+                raise ValueError("Cursor holds an empty value")
+        except (ValueError, TypeError, KeyError, ValidationError):
+            raise NotFound(detail="Invalid cursor", code=404)
+        return position
+
+    def encode_cursor(self, position):
+        """
+        Encode a position as an opaque cursor.
+        Args:
+            position (list): The values of the ordering fields.
+        Returns:
+            str: The URL-safe cursor.
+        """
+        payload = json.dumps({'o': list(self.ordering), 'p': position}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        """
+        Build the absolute URL of the next page.
+        Returns:
+            str or None: The URL of the next page, or None on the last page.
+        """
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
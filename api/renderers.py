@@ -0,0 +1,134 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def encode_default(obj):
+    """
+    Converts values the fast encoders do not support natively, the way DRF's JSON encoder does.
+    Args:
+        obj: The value to convert.
+    Returns:
+        The value as a type the encoder supports.
+    """
+    return encoders.JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer using orjson, with the same output as DRF's JSONRenderer.
+    Falls back to the stdlib encoder when orjson is not installed, for indented
+    output (e.g. the browsable API), for non-compact or ASCII-only settings, and for
+    data orjson rejects (such as integers beyond 64 bits).
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render `data` into JSON, returning a bytestring.
+        Args:
+            data: The data to render.
+            accepted_media_type (str, optional): The negotiated media type.
+            renderer_context (dict, optional): The context of the view.
+        Returns:
+            bytes: The JSON document.
+        """
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escape \u2028 and \u2029 like JSONRenderer, so the output stays a strict javascript subset.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser using orjson, falling back to the stdlib parser when it is not installed.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Parses the incoming bytestream as JSON and returns the resulting data.
+        Args:
+            stream: The request body.
+            media_type (str, optional): The content type of the request.
+            parser_context (dict, optional): The context of the parser.
+        Returns:
+            The parsed data.
+        Raises:
+            ParseError: If the body is not valid JSON.
+        """
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+        try:
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders responses as MessagePack for clients that ask for ``application/msgpack``.
+    Dates and other values without a MessagePack type are encoded like in JSON.
+    Requires the msgpack package.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render `data` into MessagePack, returning a bytestring.
+        Args:
+            data: The data to render.
+            accepted_media_type (str, optional): The negotiated media type.
+            renderer_context (dict, optional): The context of the view.
+        Returns:
+            bytes: The packed data.
+        """
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses ``application/msgpack`` request bodies. Requires the msgpack package.
+    """
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Parses the incoming bytestream as MessagePack and returns the resulting data.
+        Args:
+            stream: The request body.
+            media_type (str, optional): The content type of the request.
+            parser_context (dict, optional): The context of the parser.
+        Returns:
+            The unpacked data.
+        Raises:
+            ParseError: If the body is not valid MessagePack.
+        """
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
@@ -0,0 +1,177 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import Resolver404, resolve
+
+
+DEFAULT_REPLICA_ROUTING = {
+    'DATABASES': [],
+    'ROUTES': ['tasks', 'task-detail', 'contacts', 'contacts-detail', 'user-list', 'user-detail'],
+    'PRIMARY_MODELS': ['authtoken.token', 'authtoken.tokenproxy', 'sessions.session'],
+    'LAG': 5,
+    'CACHE': 'default',
+}
+
+# Sent by clients that must read from the primary, like the ``?primary=true`` parameter.
+PRIMARY_HEADER = 'X-Read-Primary'
+PRIMARY_PARAM = 'primary'
+
+# The database the reads of the current request go to; None reads from the primary.
+_read_database = ContextVar('read_database', default=None)
+
+
+def get_replica_settings():
+    """
+    Returns the replica routing settings, ``REPLICA_ROUTING`` merged over the defaults.
+    Returns:
+        dict: The settings.
+    """
+    return {**DEFAULT_REPLICA_ROUTING, **getattr(settings, 'REPLICA_ROUTING', {})}
+
+
+@contextmanager
+def reading_from(alias):
+    """
+    Sends the reads inside the block to a database, e.g. the primary while filling a cache.
+    Args:
+        alias (str or None): The database alias; None reads from the primary.
+    """
+    token = _read_database.set(alias)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def pin_key(request):
+    """
+    Returns the cache key of the read-after-write pin of the client sending a request.
+    Clients are told apart by their Authorization header, or by their IP address if they send none.
+    Args:
+        request (HttpRequest): The request.
+    Returns:
+        str: The cache key.
+    """
+    client = request.META.get('HTTP_AUTHORIZATION') or request.META.get('REMOTE_ADDR', '')
+    return 'replica-routing:pin:' + hashlib.sha1(client.encode('utf-8')).hexdigest()
+
+
+def pin_primary(request):
+    """
+    Sends the client's reads to the primary for ``LAG`` seconds after a write, so it
+    does not read from a replica that has not caught up with its own write yet.
+    Args:
+        request (HttpRequest): The writing request.
+    """
+    options = get_replica_settings()
+    if options['DATABASES'] and options['LAG'] > 0:
+        caches[options['CACHE']].set(pin_key(request), 1, options['LAG'])
+
+
+async def apin_primary(request):
+    """
+    Async variant of pin_primary().
+    """
+    options = get_replica_settings()
+    if options['DATABASES'] and options['LAG'] > 0:
+        await caches[options['CACHE']].aset(pin_key(request), 1, options['LAG'])
+
+
+def routable(request, options):
+    """
+    Tells whether a request may read from a replica: a safe request to one of the
+    ``ROUTES`` (URL names) that did not ask for the primary with the X-Read-Primary
+    header or ``?primary=true``.
+    Args:
+        request (HttpRequest): The incoming request.
+        options (dict): The replica routing settings.
+    Returns:
+        bool: Whether the request may read from a replica.
+    """
+    if not options['DATABASES'] or request.method not in ('GET', 'HEAD'):
+        return False
+    try:
+        url_name = resolve(request.path_info, getattr(request, 'urlconf', None)).url_name
+    except Resolver404:
+        return False
+    if url_name not in options['ROUTES']:
+        return False
+    if request.headers.get(PRIMARY_HEADER, '').lower() in ('1', 'true', 'yes'):
+        return False
+    return request.GET.get(PRIMARY_PARAM, '').lower() not in ('1', 'true', 'yes')
+
+
+def replica_for(request):
+    """
+    Picks the database the reads of a request go to: a replica if the request is
+    routable and the client did not write within the last ``LAG`` seconds.
+    Args:
+        request (HttpRequest): The incoming request.
+    Returns:
+        str or None: A replica alias, or None to read from the primary.
+    """
+    options = get_replica_settings()
+    if not routable(request, options) or caches[options['CACHE']].get(pin_key(request)):
+        return None
+    return random.choice(options['DATABASES'])
+
+
+async def areplica_for(request):
+    """
+    Async variant of replica_for().
+    """
+    options = get_replica_settings()
+    if not routable(request, options) or await caches[options['CACHE']].aget(pin_key(request)):
+        return None
+    return random.choice(options['DATABASES'])
+
+
+class ReplicaRouter:
+    """
+    Database router sending the reads of a request to the replica chosen for it by
+    ReplicaRoutingMiddleware. Writes, reads outside such requests and reads of the
+    ``PRIMARY_MODELS`` (tokens, sessions) always go to the primary.
+    """
+    def db_for_read(self, model, **hints):
+        """
+        Returns the database to read a model from.
+        Args:
+            model (type): The model.
+            **hints: Router hints.
+        Returns:
+            str or None: The replica of the current request, or None for the default.
+        """
+        alias = _read_database.get()
+        if alias is None or model._meta.label_lower in get_replica_settings()['PRIMARY_MODELS']:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        """
+        Returns the primary, also for instances that were read from a replica.
+        Args:
+            model (type): The model.
+            **hints: Router hints.
+        Returns:
+            str: The primary alias.
+        """
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+        Allows relations between objects of the primary and its replicas, as they hold the same data.
+        Args:
+            obj1 (Model): An object.
+            obj2 (Model): Another object.
+            **hints: Router hints.
+        Returns:
+            bool or None: True if both come from the primary or a replica.
+        """
+        databases = {DEFAULT_DB_ALIAS, *get_replica_settings()['DATABASES']}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -1,11 +1,96 @@
-from datetime import datetime
+import math
+from collections.abc import Mapping
+from datetime import date
 from django.contrib.auth.models import User 
 from django.contrib.auth import authenticate
+from django.db import transaction
 from rest_framework import serializers
-from .models import Task, Contact, Subtask
+from .models import Task, Contact, Subtask, column_ends, replace_subtasks
+from .assignees import ContactIndex
+from .subtasks import parse_subtasks
+from .backends import filter_by_email
 
 
-class UserSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Mixin for model serializers that can be limited to a subset of their fields.
+    Pass ``fields`` to keep only the named fields. Views read the subset a client
+    asks for with ``?fields=`` and/or ``?exclude=`` through requested_fields() and
+    use model_columns() to load only the matching columns.
+    """
+    field_names_cache = {}
+
+    def __init__(self, *args, **kwargs):
+        """
+        Creates the serializer, dropping all fields not listed in ``fields``.
+        Args:
+            *args: Arguments of the serializer.
+            **kwargs: Keyword arguments of the serializer, plus ``fields`` (iterable, optional).
+        """
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def readable_field_names(cls):
+        """
+        Returns the names of the fields the serializer outputs, in output order.
+        Returns:
+            list: The field names.
+        """
+        if cls not in cls.field_names_cache:
+            cls.field_names_cache[cls] = [name for name, field in cls().fields.items() if not field.write_only]
+        return cls.field_names_cache[cls]
+
+    @classmethod
+    def requested_fields(cls, request):
+        """
+        Reads the fields selected with ``?fields=`` and ``?exclude=`` (comma separated).
+        Args:
+            request (Request): The incoming request.
+        Returns:
+            list or None: The selected field names in output order, or None for all fields.
+        Raises:
+            serializers.ValidationError: If a parameter names an unknown field.
+        """
+        available = cls.readable_field_names()
+        selected = available
+        for param in ('fields', 'exclude'):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            names = {name.strip() for name in value.split(',') if name.strip()}
+            unknown = sorted(names - set(available))
+            if unknown:
+                raise serializers.ValidationError({param: [f'Unknown field(s): {", ".join(unknown)}.']})
+            if param == 'fields':
+                selected = [name for name in selected if name in names]
+            else:
+                selected = [name for name in selected if name not in names]
+        return None if selected is available else selected
+
+    @classmethod
+    def model_columns(cls, fields):
+        """
+        Returns the model columns behind a subset of fields, for use with ``only()``.
+        Many-to-many fields are left out; the primary key is always included.
+        Args:
+            fields (list): The selected field names.
+        Returns:
+            list: The column names.
+        """
+        opts = cls.Meta.model._meta
+        columns = ['id']
+        for name in fields:
+            field = opts.get_field(name)
+            if field.concrete and not field.many_to_many and name not in columns:
+                columns.append(name)
+        return columns
+
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for creating and updating User instances.
     This serializer is responsible for serializing/deserializing User instances
@@ -23,6 +108,23 @@ class UserSerializer(serializers.ModelSerializer):
             'password': {'write_only': True}
         }
 
+    def validate_email(self, value):
+        """
+        Rejects an email address that another user already has, ignoring case.
+        Args:
+            value (str): The submitted email address.
+        Returns:
+            str: The email address.
+        Raises:
+            serializers.ValidationError: If the address is taken.
+        """
+        users = filter_by_email(User.objects.all(), value) if value else User.objects.none()
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        if users.exists():
+            raise serializers.ValidationError('A user with this email already exists.')
+        return value
+
     def create(self, validated_data):
         """
         Create a new User instance.
@@ -64,16 +166,45 @@ class EmailAuthTokenSerializer(serializers.Serializer):
         Raises:
             serializers.ValidationError: If provided credentials are invalid.
         """
-        user = User.objects.filter(email=data['email']).first()
-        if not user:
-            raise serializers.ValidationError({'non_field_errors': ['User does not exist.']})
-        
-        user = authenticate(username=user.username, password=data['password'])
+        user = authenticate(self.context.get('request'), email=data['email'], password=data['password'])
         if not user:
             raise serializers.ValidationError({'non_field_errors': ['Unable to log in with provided credentials.']})
 
         return {'user': user}
     
+class PartialUpdateMixin:
+    """
+    Mixin for model serializers that writes only the submitted columns on partial updates.
+    A PATCH then issues ``UPDATE ... SET`` for the given fields (and the change version)
+    instead of rewriting the whole row; a PATCH of relations only updates the version.
+    """
+    def update(self, instance, validated_data):
+        """
+        Update an instance, restricting the saved columns on partial updates.
+        Args:
+            instance (Model): The instance to update.
+            validated_data (dict): The validated fields to change.
+        Returns:
+            Model: The updated instance.
+        """
+        if not self.partial:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        relations = {field: validated_data.pop(field) for field in list(validated_data)
+                     if instance._meta.get_field(field).many_to_many}
+        if not validated_data and not relations:
+            return instance
+        with transaction.atomic():
+            for field, value in validated_data.items():
+                setattr(instance, field, value)
+            for field, value in relations.items():
+                getattr(instance, field).set(value)
+            # Saved also if only relations changed: the new change version tells
+            # list ETags and /sync/ that the row changed.
+            instance.save(update_fields=list(validated_data))
+        return instance
+
+
 class DateOnlyField(serializers.Field):
     """
     A custom serializer field for handling date-only values.
@@ -82,6 +213,10 @@ class DateOnlyField(serializers.Field):
     Attributes:
         format (str): The format string for date representation, default is '%Y-%m-%d'.
     """
+    default_error_messages = {
+        'invalid': 'Date has wrong format. Use one of these formats instead: YYYY-MM-DD.',
+    }
+
     def to_representation(self, value):
         """
         Convert the internal representation to a primitive data type for serialization.
@@ -99,45 +234,241 @@ class DateOnlyField(serializers.Field):
             data (str): The primitive data type to be converted to the internal representation.
         Returns:
             datetime.date: The internal representation of the date.
+        Raises:
+            serializers.ValidationError: If the value is not a YYYY-MM-DD date.
         """
-        return datetime.strptime(data, '%Y-%m-%d').date()
+        # date.fromisoformat() is much faster than strptime() but also accepts the
+        # compact and week forms (YYYYMMDD, YYYY-Www-D), hence the shape check.
+        if not isinstance(data, str) or len(data) != 10 or data[4] != '-' or data[7] != '-':
+            self.fail('invalid')
+        try:
+            return date.fromisoformat(data)
+        except ValueError:
+            self.fail('invalid')
     
-class TaskItemSerializer(serializers.ModelSerializer):
+class AssigneesField(serializers.Field):
+    """
+    A serializer field for the contacts assigned to a task, represented as a list of contact ids.
+    Ids are checked against the contact index of the parent serializer, which is loaded
+    once per serializer instance: for a single write only the submitted ids are loaded,
+    for a batch of tasks all contacts, so either costs one query.
+    """
+    default_error_messages = {
+        'not_a_list': 'Expected a list of contact ids.',
+        'does_not_exist': 'Invalid pk "{pk}" - object does not exist.',
+    }
+
+    def to_representation(self, value):
+        """
+        Convert the related manager to a list of contact ids.
+        Uses the prefetched contacts if the task was loaded with prefetch_related('assignees').
+        Args:
+            value (Manager): The related manager of the assigned contacts.
+        Returns:
+            list: The contact ids in ascending order.
+        """
+        return sorted(contact.pk for contact in value.all())
+
+    def to_internal_value(self, data):
+        """
+        Validate a list of contact ids.
+        Args:
+            data (list): The contact ids.
+        Returns:
+            list: The validated contact ids without duplicates.
+        """
+        if not isinstance(data, list):
+            self.fail('not_a_list')
+        ids = []
+        for pk in data:
+            if isinstance(pk, bool) or not isinstance(pk, int) or pk not in self.parent.contact_index.ids:
+                self.fail('does_not_exist', pk=pk)
+            if pk not in ids:
+                ids.append(pk)
+        return ids
+
+
+class RankField(serializers.FloatField):
+    """
+    A float rank of a card; NaN and infinite values are rejected, as they cannot be ordered.
+    """
+    def to_internal_value(self, data):
+        """
+        Convert the submitted rank to a finite float.
+        Args:
+            data: The submitted value.
+        Returns:
+            float: The rank.
+        Raises:
+            serializers.ValidationError: If the value is not a finite number.
+        """
+        value = super().to_internal_value(data)
+        if not math.isfinite(value):
+            self.fail('invalid')
+        return value
+
+
+class TaskItemSerializer(DynamicFieldsMixin, PartialUpdateMixin, serializers.ModelSerializer):
     """
     Serializer for converting Task model instances to JSON format and vice versa.    
     Attributes:
         due_date (DateOnlyField): Custom field for handling date without time.    
+        assignees (AssigneesField): Ids of the assigned contacts. If a client only sends the
+            legacy ``assignedTo`` JSON, the assignees are resolved from it.
+        position (RankField, optional): Rank in the status column; new tasks without one
+            go to the bottom of their column.
     Meta:
         model (Task): The model class to serialize.
         fields (str): Indicates to serialize all fields of the Task model.
     """
     due_date = DateOnlyField()
+    assignees = AssigneesField(required=False)
+    position = RankField(required=False)
     class Meta:
         model = Task
         fields = '__all__'
+        read_only_fields = ['version', 'subtasks_done', 'subtasks_total']
+
+    @property
+    def contact_index(self):
+        """
+        The contacts used to validate and resolve assignees, loaded on first use.
+        A serializer given ``data`` validates a single write and loads only the contacts
+        its assignees may refer to. One reused for many rows (bulk operations, imports)
+        loads all contacts once.
+        Returns:
+            ContactIndex: The index of the contacts.
+        """
+        if not hasattr(self, '_contact_index'):
+            data = getattr(self, 'initial_data', None)
+            if isinstance(data, Mapping):
+                self._contact_index = ContactIndex.load_matching(Contact.objects.all(), data.get('assignees'),
+                                                                 data.get('assignedTo'))
+            else:
+                self._contact_index = ContactIndex.load(Contact.objects.all())
+        return self._contact_index
+
+    def validate(self, data):
+        """
+        Derives the assignees from the legacy ``assignedTo`` JSON when only that is sent.
+        Args:
+            data (dict): The validated fields.
+        Returns:
+            dict: The validated fields, including 'assignees' if they could be derived.
+        """
+        if 'assignedTo' in data and 'assignees' not in data:
+            data['assignees'] = self.contact_index.resolve(data['assignedTo'])
+        return data
         
     def create(self, validated_data):
         """
         Creates a new Task instance based on the provided validated data.        
+        Subtasks sent in the legacy ``subtasks`` JSON are also created as Subtask rows.
+        Without a ``position`` the task is ranked below the last card of its column.
+        The requesting user from the serializer context becomes the author.
+        The task and its relations are written in one transaction, so the new change
+        version is never visible without them.
         Args:
             validated_data (dict): The validated data to create a new Task instance.            
         Returns:
             Task: The newly created Task instance.
         """
-        taskslist = Task.objects.create(
-            priority=validated_data['priority'],
-            title=validated_data['title'],
-            description=validated_data['description'],
-            due_date=validated_data['due_date'],
-            status=validated_data['status'],
-            category=validated_data['category'],
-            assignedTo=validated_data['assignedTo'],
-            bgcolor=validated_data['bgcolor'],
-            subtasks=validated_data['subtasks']
-        )
+        subtasks = parse_subtasks(validated_data['subtasks'])
+        position = validated_data.get('position')
+        if position is None:
+            position = column_ends([validated_data['status']])[validated_data['status']]
+        with transaction.atomic():
+            taskslist = Task.objects.create(
+                author=self.context['request'].user,
+                priority=validated_data['priority'],
+                title=validated_data['title'],
+                description=validated_data['description'],
+                due_date=validated_data['due_date'],
+                status=validated_data['status'],
+                category=validated_data['category'],
+                assignedTo=validated_data['assignedTo'],
+                bgcolor=validated_data['bgcolor'],
+                subtasks=validated_data['subtasks'],
+                position=position,
+                subtasks_total=len(subtasks),
+                subtasks_done=sum(subtask['done'] for subtask in subtasks)
+            )
+            if subtasks:
+                Subtask.objects.bulk_create([Subtask(task=taskslist, **subtask) for subtask in subtasks])
+            if validated_data.get('assignees'):
+                taskslist.assignees.set(validated_data['assignees'])
         return taskslist
+
+    def update(self, instance, validated_data):
+        """
+        Updates a Task instance, see PartialUpdateMixin.update().
+        If the legacy ``subtasks`` JSON is written, the Subtask rows and the counters
+        are rebuilt from it in the same transaction.
+        Args:
+            instance (Task): The task to update.
+            validated_data (dict): The validated fields to change.
+        Returns:
+            Task: The updated task.
+        """
+        if 'subtasks' not in validated_data:
+            return super().update(instance, validated_data)
+        subtasks = parse_subtasks(validated_data['subtasks'])
+        validated_data['subtasks_total'] = len(subtasks)
+        validated_data['subtasks_done'] = sum(subtask['done'] for subtask in subtasks)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            replace_subtasks({instance.pk: subtasks})
+        return instance
     
-class ContactSerializer(serializers.ModelSerializer):
+class TaskMoveSerializer(serializers.Serializer):
+    """
+    Serializer validating a card move on the kanban board.
+    The new rank is either given directly as ``position`` or derived from the ranks of
+    the neighbours the card is dropped between (``after`` and/or ``before``). If there is
+    no float between the neighbours' ranks, ``renumber_after`` asks the view to space the
+    column out again (see renumber_column()).
+    Attributes:
+        status (serializers.CharField, optional): The column the card moves to.
+        position (RankField, optional): The new rank of the card.
+        after (RankField, optional): Rank of the card above the drop point.
+        before (RankField, optional): Rank of the card below the drop point.
+        version (serializers.IntegerField, optional): Version the client last saw. If given,
+            the move only succeeds while the task still has this version.
+    """
+    status = serializers.CharField(max_length=20, required=False)
+    position = RankField(required=False)
+    after = RankField(required=False)
+    before = RankField(required=False)
+    version = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        """
+        Resolves the new rank of the card.
+        Args:
+            data (dict): The validated fields.
+        Returns:
+            dict: The 'status' (if given), 'position' or 'renumber_after' and 'version'
+            (if given) of the move.
+        Raises:
+            serializers.ValidationError: If neither a column nor a rank is given.
+        """
+        after, before = data.pop('after', None), data.pop('before', None)
+        if 'position' not in data:
+            if after is not None and before is not None:
+                if after < (after + before) / 2 < before:
+                    data['position'] = (after + before) / 2
+                else:
+                    data['renumber_after'] = after
+            elif after is not None:
+                data['position'] = after + 1
+            elif before is not None:
+                data['position'] = before - 1
+        if 'status' not in data and 'position' not in data and 'renumber_after' not in data:
+            raise serializers.ValidationError({'non_field_errors': ['Provide a status and/or a position.']})
+        return data
+
+
+class ContactSerializer(DynamicFieldsMixin, PartialUpdateMixin, serializers.ModelSerializer):
     """
     Serializer class for Contact model.
     This serializer is used to serialize/deserialize Contact objects.
@@ -148,6 +479,7 @@ class ContactSerializer(serializers.ModelSerializer):
     class Meta:
         model = Contact
         fields = '__all__'
+        read_only_fields = ['version']
         
     def create(self, validated_data):
         """
@@ -169,13 +501,13 @@ class ContactSerializer(serializers.ModelSerializer):
         return contact
     
     
-class SubtaskSerializer(serializers.ModelSerializer):
+class SubtaskSerializer(PartialUpdateMixin, serializers.ModelSerializer):
     """
     Serializer for Subtask model.
     This serializer handles the serialization and deserialization of Subtask instances.
     """
     class Meta:
-        model = Task
+        model = Subtask
         fields = '__all__'
         
     def create(self, validated_data):
@@ -189,6 +521,24 @@ class SubtaskSerializer(serializers.ModelSerializer):
             KeyError: If the required data for creating the Subtask is missing.
         """
         subtask = Subtask.objects.create(
-            title=validated_data['title']
+            task=validated_data.get('task'),
+            title=validated_data['title'],
+            done=validated_data.get('done', False),
+            position=validated_data.get('position', 0)
         )
-        return subtask 
\ No newline at end of file
+        return subtask
+
+
+class SubtaskBatchItemSerializer(serializers.Serializer):
+    """
+    Serializer for one entry of a batched subtask update (toggle and/or reorder).
+    Attributes:
+        id (serializers.IntegerField): The id of the subtask to change.
+        title (serializers.CharField, optional): The new title.
+        done (serializers.BooleanField, optional): The new done flag.
+        position (serializers.IntegerField, optional): The new rank inside the task.
+    """
+    id = serializers.IntegerField()
+    title = serializers.CharField(max_length=100, required=False)
+    done = serializers.BooleanField(required=False)
+    position = serializers.IntegerField(required=False) 
\ No newline at end of file
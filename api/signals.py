@@ -0,0 +1,121 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_delete, post_delete, post_save, m2m_changed
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import forget_token
+from .events import publish_row, publish_deleted, publish_sync
+from .models import Task, Contact, Tombstone, next_version, tombstones_written
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Contact)
+def record_tombstone(sender, instance, **kwargs):
+    """
+    Records a tombstone for every deleted Task or Contact, including cascaded deletes.
+    Deletes done through delete_tracked() have written their tombstones already.
+    Args:
+        sender (type): The model class of the deleted instance.
+        instance (Model): The deleted instance.
+        **kwargs: Further signal arguments.
+    """
+    if tombstones_written.get():
+        return
+    Tombstone.objects.create(
+        model_name=sender._meta.model_name,
+        object_id=instance.pk,
+        version=next_version(scope=sender._meta.model_name)
+    )
+
+
+@receiver(pre_delete, sender=Contact)
+def touch_assigned_tasks(sender, instance, **kwargs):
+    """
+    Stamps the tasks assigned to a contact about to be deleted with a new version,
+    because their assignees change when the assignments cascade away.
+    Args:
+        sender (type): The Contact model.
+        instance (Contact): The contact being deleted.
+        **kwargs: Further signal arguments.
+    """
+    tasks = Task.objects.filter(assignments__contact=instance)
+    if tasks.exists():
+        tasks.update(version=next_version(scope='task'))
+        publish_sync(Task)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Contact)
+def publish_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Publishes a saved Task or Contact to the event stream, with only the saved
+    fields if the save was restricted to them.
+    Args:
+        sender (type): The model class of the saved instance.
+        instance (Model): The saved instance.
+        created (bool): Whether the row was inserted.
+        update_fields (frozenset, optional): The saved fields, None for all.
+        **kwargs: Further signal arguments.
+    """
+    publish_row(instance, 'created' if created else 'updated', None if created else update_fields)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Contact)
+def publish_removed(sender, instance, **kwargs):
+    """
+    Publishes a deleted Task or Contact to the event stream.
+    Deletes done through delete_tracked() are published once by their caller.
+    Args:
+        sender (type): The model class of the deleted instance.
+        instance (Model): The deleted instance.
+        **kwargs: Further signal arguments.
+    """
+    if tombstones_written.get():
+        return
+    publish_deleted(sender, instance.pk)
+
+
+@receiver(m2m_changed, sender=Task.assignees.through)
+def publish_assignees(sender, instance, action, reverse, **kwargs):
+    """
+    Publishes changed assignees: the new assignees of a task, or a ``sync`` event if
+    tasks were added to or removed from a contact.
+    Args:
+        sender (type): The TaskAssignment model.
+        instance (Model): The task, or the contact if ``reverse``.
+        action (str): The m2m_changed action, e.g. 'post_add'.
+        reverse (bool): Whether the relation was changed from the contact's side.
+        **kwargs: Further signal arguments.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        publish_sync(Task)
+    else:
+        publish_row(instance, 'updated', ['assignees'])
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    """
+    Drops a deleted token from the authentication cache.
+    Args:
+        sender (type): The Token model.
+        instance (Token): The deleted token.
+        **kwargs: Further signal arguments.
+    """
+    forget_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def evict_user_tokens(sender, instance, **kwargs):
+    """
+    Drops the tokens of a saved user from the authentication cache, so that changes
+    such as deactivation apply to the next request.
+    Args:
+        sender (type): The User model.
+        instance (User): The saved user.
+        **kwargs: Further signal arguments.
+    """
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        forget_token(key)
@@ -0,0 +1,30 @@
+TITLE_KEYS = ('title', 'name', 'text', 'subtask')
+DONE_KEYS = ('done', 'completed', 'checked', 'isDone')
+
+
+def parse_subtasks(value):
+    """
+    Reads the legacy ``subtasks`` JSON of a task into plain subtask descriptions.
+    Entries may be strings (the title) or dicts with a title under one of TITLE_KEYS
+    and a done flag under one of DONE_KEYS or as ``"status": "done"``. Entries
+    without a title are skipped.
+    Args:
+        value: The legacy ``subtasks`` JSON value.
+    Returns:
+        list: Dicts with 'title', 'done' and 'position' for every subtask, in order.
+    """
+    if value is None:
+        return []
+    entries = value if isinstance(value, list) else [value]
+    parsed = []
+    for entry in entries:
+        if isinstance(entry, str):
+            title, done = entry, False
+        elif isinstance(entry, dict):
+            title = next((entry[key] for key in TITLE_KEYS if isinstance(entry.get(key), str)), None)
+            done = any(entry.get(key) is True for key in DONE_KEYS) or entry.get('status') == 'done'
+        else:
+            continue
+        if title and title.strip():
+            parsed.append({'title': title.strip()[:100], 'done': done, 'position': len(parsed)})
+    return parsed
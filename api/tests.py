@@ -4,10 +4,48 @@ from rest_framework.test import APIClient, force_authenticate
 from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 from django.test import SimpleTestCase, Client, TestCase, RequestFactory
-from api.models import Task, Contact, Subtask
-from api.views import UserView, LoginView, LogoutView, TasksItemView, ContactView
-from api.serializers import SubtaskSerializer
+from api.models import Task, Contact, Subtask, ChangeCounter, current_version, next_version
+from api.views import UserView, LoginView, LogoutView, TasksItemView, ContactView, TaskExportView
+from api.serializers import SubtaskSerializer, TaskItemSerializer, ContactSerializer
+from api.fast_serializers import values_serializer
+from rest_framework.renderers import JSONRenderer
+from api.authentication import TokenCache, token_cache
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+import base64
+import gzip
+import math
+from threading import Timer
+import csv
+import json
+from types import SimpleNamespace
+from api.middleware import COMPRESSORS, choose_encoding, compress_gzip
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from api.renderers import FastJSONRenderer, FastJSONParser, MessagePackRenderer, MessagePackParser, msgpack
+from io import StringIO
+import os
+from tempfile import TemporaryDirectory
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import CommandError
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, AsyncClient
+from django.core.handlers.base import BaseHandler
+from django.db import connections
+from api.routers import ReplicaRouter, reading_from
+from api.async_views import AsyncTasksItemView, AsyncContactView
+from api.events import Broker, BrokerBackend, encode_event
+import time
 
 class UserViewTests(TestCase):
     def setUp(self):
@@ -138,6 +176,7 @@ class TasksItemViewTests(TestCase):
             }
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Task.objects.get(pk=response.data['id']).author, self.user)
 
     def test_put_task(self):
         """
@@ -165,7 +204,18 @@ class TasksItemViewTests(TestCase):
         url_detail = reverse('task-detail', kwargs={'pk': self.task.pk})
         response = self.client.delete(url_detail)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        
+
+    def test_delete_missing_or_foreign_task(self):
+        """
+        Deleting a task that does not exist or was created by another user answers 404.
+        """
+        other = Task.objects.create(title="Other", description="", due_date="2024-05-01", status="todo", bgcolor="#fff",
+                                    author=User.objects.create_user(username='other'))
+        for pk in (other.pk, other.pk + 1000):
+            response = self.client.delete(reverse('task-detail', kwargs={'pk': pk}))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Task.objects.filter(pk=other.pk).exists())
+
 
     def test_unauthorized_access(self):
         """
@@ -367,4 +417,1940 @@ class ContactViewTests(TestCase):
         Test deleting a contact that does not exist.
         """
         response = self.client.delete(self.contact_detail_url(999), format='json')
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class TaskPaginationTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and create a few tasks with colliding due dates.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        for index in range(5):
+            Task.objects.create(
+                title=f"Task {index}",
+                description="Description",
+                due_date="2024-01-0%d" % (index % 2 + 1),
+                status="todo",
+                bgcolor='#FFFFFF',
+                author=self.user
+            )
+        self.url = reverse('tasks')
+
+    def test_pages_follow_cursor(self):
+        """
+        Walking the next links returns every task exactly once, ordered by due date and id.
+        """
+        seen = []
+        url = self.url + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(response.data['results'])
+            url = response.data['next']
+        expected = list(Task.objects.order_by('due_date', 'id').values_list('id', flat=True))
+        self.assertEqual([task['id'] for task in seen], expected)
+
+    def test_page_size_is_capped(self):
+        """
+        The requested page size never exceeds the hard cap.
+        """
+        response = self.client.get(self.url + '?page_size=100000')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        """
+        A tampered cursor is rejected with 404.
+        """
+        response = self.client.get(self.url + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor_payloads(self):
+        """
+        Cursors that decode cleanly but carry positions of the wrong shape or type are rejected with 404,
+        by the sync and the async task list alike.
+        """
+        payloads = [
+            {'o': ['due_date', 'id'], 'p': 5},
+            {'o': ['due_date', 'id'], 'p': ['garbage', 1]},
+            {'o': ['due_date', 'id'], 'p': [None, None]},
+            {'o': ['due_date', 'id'], 'p': ['2024-01-01', 'x']},
+            {'o': ['due_date', 'id'], 'p': ['2024-01-01']},
+            {'o': ['position', 'id'], 'p': ['2024-01-01', 1]},
+            ['due_date', 'id'],
+        ]
+        factory = AsyncRequestFactory()
+        for payload in payloads:
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+            with self.subTest(payload=payload):
+                response = self.client.get(self.url, {'cursor': cursor})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+                request = factory.get(self.url, {'cursor': cursor}, headers={'authorization': 'Token ' + self.token.key})
+                response = async_to_sync(AsyncTasksItemView.as_view())(request)
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unpaginated_opt_in(self):
+        """
+        The complete list is still available as a plain array with ?paginate=false.
+        """
+        response = self.client.get(self.url + '?paginate=false')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 5)
+
+
+class TaskFilterTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and create tasks in different columns.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.other = User.objects.create_user(username='otheruser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.url = reverse('tasks')
+        rows = [
+            ('todo', 'User Story', 'urgent', '2024-01-01', self.user),
+            ('todo', 'Technical Task', 'low', '2024-02-01', self.other),
+            ('done', 'User Story', 'medium', '2024-03-01', self.user),
+        ]
+        for task_status, category, priority, due_date, author in rows:
+            Task.objects.create(
+                title="Task",
+                description="Description",
+                due_date=due_date,
+                status=task_status,
+                category=category,
+                priority=priority,
+                bgcolor='#FFFFFF',
+                author=author
+            )
+
+    def _fetch(self, query):
+        """
+        Fetch the filtered list and return the matching (status, priority) pairs.
+        """
+        response = self.client.get(self.url + query + '&paginate=false')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted((task['status'], task['priority']) for task in response.data)
+
+    def test_filter_by_status(self):
+        """
+        Only tasks of the requested column are returned.
+        """
+        self.assertEqual(self._fetch('?status=todo'), [('todo', 'low'), ('todo', 'urgent')])
+
+    def test_filter_by_several_values(self):
+        """
+        Comma separated values match any of them.
+        """
+        self.assertEqual(self._fetch('?priority=urgent,medium'), [('done', 'medium'), ('todo', 'urgent')])
+
+    def test_filter_by_category_and_author(self):
+        """
+        Filters are combined with AND.
+        """
+        self.assertEqual(self._fetch(f'?category=User Story&author={self.user.pk}&status=todo'), [('todo', 'urgent')])
+
+    def test_filter_by_due_date_range(self):
+        """
+        The due date range is inclusive on both ends.
+        """
+        self.assertEqual(self._fetch('?due_date__gte=2024-02-01&due_date__lte=2024-03-01'), [('done', 'medium'), ('todo', 'low')])
+
+    def test_invalid_filter_values(self):
+        """
+        Malformed dates and author ids are rejected with 400.
+        """
+        response = self.client.get(self.url + '?due_date__gte=01.02.2024')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url + '?author=abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SyncViewTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and create a task and a contact.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.url = reverse('sync')
+        self.task = Task.objects.create(
+            title="Task", description="Description", due_date="2024-01-01",
+            status="todo", bgcolor='#FFFFFF', author=self.user
+        )
+        self.contact = Contact.objects.create(name="Jane", surname="Doe")
+
+    def test_full_sync(self):
+        """
+        A sync from version 0 returns every row and the current version.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in response.data['tasks']], [self.task.pk])
+        self.assertEqual([contact['id'] for contact in response.data['contacts']], [self.contact.pk])
+        self.assertEqual(response.data['version'], self.contact.version)
+
+    def test_delta_sync(self):
+        """
+        Only rows changed after the given version are returned, deletions as tombstones.
+        """
+        since = self.client.get(self.url).data['version']
+        self.task.title = "Renamed"
+        self.task.save()
+        url_detail = reverse('contacts-detail', args=[self.contact.pk])
+        self.assertEqual(self.client.delete(url_detail).status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual([task['title'] for task in response.data['tasks']], ["Renamed"])
+        self.assertEqual(response.data['contacts'], [])
+        self.assertEqual(response.data['deleted'], {'tasks': [], 'contacts': [self.contact.pk]})
+        self.assertGreater(response.data['version'], since)
+
+        response = self.client.get(self.url, {'since': response.data['version']})
+        self.assertEqual(response.data['tasks'], [])
+        self.assertEqual(response.data['deleted'], {'tasks': [], 'contacts': []})
+
+    def test_versions_increase(self):
+        """
+        Every write stamps a higher version, and the version cannot be set by clients.
+        """
+        before = self.task.version
+        url_detail = reverse('task-detail', kwargs={'pk': self.task.pk})
+        data = {
+            'title': 'Task', 'description': 'Description', 'due_date': "2024-01-01",
+            'status': "done", 'category': None, 'priority': None, 'assignedTo': None,
+            'bgcolor': '#FFFFFF', 'subtasks': None, 'version': 0,
+        }
+        response = self.client.put(url_detail, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(response.data['version'], before)
+
+    def test_invalid_since(self):
+        """
+        A non-numeric version is rejected with 400.
+        """
+        response = self.client.get(self.url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and create a task and a contact.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.task = Task.objects.create(
+            title="Task", description="Description", due_date="2024-01-01",
+            status="todo", bgcolor='#FFFFFF', author=self.user
+        )
+        self.contact = Contact.objects.create(name="Jane", surname="Doe")
+
+    def test_list_not_modified(self):
+        """
+        Repeating a list request with its ETag yields 304 until the table changes.
+        """
+        for url in (reverse('tasks'), reverse('contacts')):
+            response = self.client.get(url)
+            etag = response['ETag']
+            self.assertIn('Last-Modified', response)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH='W/' + etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        Contact.objects.create(name="John", surname="Doe")
+        response = self.client.get(reverse('contacts'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_depends_on_query(self):
+        """
+        Different query parameters produce different ETags.
+        """
+        first = self.client.get(reverse('tasks'))['ETag']
+        second = self.client.get(reverse('tasks') + '?status=done')['ETag']
+        self.assertNotEqual(first, second)
+
+    def test_if_modified_since(self):
+        """
+        A list request with a current If-Modified-Since yields 304.
+        """
+        response = self.client.get(reverse('tasks'))
+        response = self.client.get(reverse('tasks'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_not_modified(self):
+        """
+        Detail routes use row-level ETags that change when the row changes.
+        """
+        url = reverse('task-detail', kwargs={'pk': self.task.pk})
+        etag = self.client.get(url)['ETag']
+        Task.objects.create(
+            title="Other", description="Description", due_date="2024-01-01",
+            status="todo", bgcolor='#FFFFFF', author=self.user
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.task.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class TaskBulkViewTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and create two tasks.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.url = reverse('tasks-bulk')
+        self.tasks = [
+            Task.objects.create(
+                title=f"Task {index}", description="Description", due_date="2024-01-01",
+                status="todo", bgcolor='#FFFFFF', author=self.user
+            ) for index in range(2)
+        ]
+
+    def _create_op(self, title):
+        """
+        Build a create operation for a task with the given title.
+        """
+        return {'op': 'create', 'data': {
+            'title': title, 'description': 'Description', 'due_date': '2024-02-01',
+            'status': 'todo', 'category': None, 'priority': 'low', 'assignedTo': None,
+            'bgcolor': '#FFFFFF', 'subtasks': None,
+        }}
+
+    def test_mixed_operations(self):
+        """
+        Creates, updates and deletes are applied and reported in request order.
+        """
+        operations = [
+            self._create_op('New Task'),
+            {'op': 'update', 'id': self.tasks[0].pk, 'data': {'status': 'done'}},
+            {'op': 'delete', 'id': self.tasks[1].pk},
+        ]
+        response = self.client.post(self.url, operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [201, 200, 204])
+        self.assertEqual(results[0]['data']['title'], 'New Task')
+        self.assertEqual(results[1]['data']['status'], 'done')
+        self.assertTrue(Task.objects.filter(title='New Task', author=self.user).exists())
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).title, 'Task 0')
+        self.assertFalse(Task.objects.filter(pk=self.tasks[1].pk).exists())
+        sync = self.client.get(reverse('sync'), {'since': self.tasks[1].version}).data
+        self.assertEqual(sync['deleted']['tasks'], [self.tasks[1].pk])
+        self.assertEqual(len(sync['tasks']), 2)
+
+    def test_invalid_batch_is_not_applied(self):
+        """
+        One invalid operation rejects the whole batch with per-item errors.
+        """
+        operations = [
+            self._create_op('New Task'),
+            {'op': 'update', 'id': 999999, 'data': {'status': 'done'}},
+            {'op': 'move'},
+        ]
+        response = self.client.post(self.url, operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertFalse(Task.objects.filter(title='New Task').exists())
+
+    def test_malformed_ids_are_rejected(self):
+        """
+        Update and delete ids that are not integers are reported per operation with 400.
+        """
+        operations = [
+            {'op': 'update', 'id': [1], 'data': {'status': 'done'}},
+            {'op': 'delete', 'id': {'pk': 1}},
+            {'op': 'delete', 'id': True},
+            {'op': 'update', 'id': self.tasks[0].pk, 'data': {'status': 'done'}},
+        ]
+        response = self.client.post(self.url, operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 1, 2])
+        self.assertIn('id', response.data['errors'][0]['errors'])
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).status, 'todo')
+
+    def test_query_count_is_bounded(self):
+        """
+        The number of queries does not depend on the number of operations
+        (as long as they fit into one INSERT batch of the database backend).
+        """
+        def count_queries(size):
+            operations = [self._create_op(f'Bulk {index}') for index in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, operations, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+        count_queries(1)
+        self.assertEqual(count_queries(5), count_queries(60))
+
+
+class TaskMoveViewTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and create a column of three cards.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.tasks = [
+            Task.objects.create(
+                title=f"Task {index}", description="Description", due_date="2024-01-01",
+                status="todo", bgcolor='#FFFFFF', author=self.user, position=index
+            ) for index in range(3)
+        ]
+
+    def _column(self, task_status):
+        """
+        Return the titles of a column in board order.
+        """
+        response = self.client.get(reverse('tasks'), {'status': task_status, 'order': 'position'})
+        return [task['title'] for task in response.data['results']]
+
+    def test_move_between_neighbours(self):
+        """
+        Dropping the last card between the first two only changes that card.
+        """
+        url = reverse('task-move', kwargs={'pk': self.tasks[2].pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'after': 0, 'before': 1}, format='json')
+        task_queries = [query['sql'] for query in queries if '"api_task"' in query['sql']]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['position'], 0.5)
+        self.assertEqual(len(task_queries), 1)
+        self.assertTrue(task_queries[0].startswith('UPDATE'))
+        self.assertEqual(self._column('todo'), ["Task 0", "Task 2", "Task 1"])
+
+    def test_move_to_other_column(self):
+        """
+        Moving a card changes its status.
+        """
+        url = reverse('task-move', kwargs={'pk': self.tasks[0].pk})
+        response = self.client.post(url, {'status': 'done', 'position': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._column('done'), ["Task 0"])
+        self.assertEqual(self._column('todo'), ["Task 1", "Task 2"])
+
+    def test_move_with_stale_version(self):
+        """
+        A move conditioned on an outdated version is rejected with 409.
+        """
+        url = reverse('task-move', kwargs={'pk': self.tasks[0].pk})
+        response = self.client.post(url, {'status': 'done', 'version': self.tasks[0].version - 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.client.post(url, {'status': 'done', 'version': self.tasks[0].version}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_move_renumbers_when_no_room(self):
+        """
+        Dropping a card between neighbours with equal or adjacent ranks renumbers the column instead of failing.
+        """
+        Task.objects.filter(pk=self.tasks[1].pk).update(position=math.nextafter(0.0, 1.0))
+        url = reverse('task-move', kwargs={'pk': self.tasks[2].pk})
+        response = self.client.post(url, {'after': 0.0, 'before': math.nextafter(0.0, 1.0)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._column('todo'), ["Task 0", "Task 2", "Task 1"])
+        positions = list(Task.objects.order_by('position').values_list('position', flat=True))
+        self.assertEqual(positions, [0.0, 1.0, 2.0])
+        Task.objects.update(position=0)
+        response = self.client.post(url, {'after': 0, 'before': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(set(Task.objects.values_list('position', flat=True))), 3)
+
+    def test_new_tasks_go_to_column_end(self):
+        """
+        A created task keeps a posted position, otherwise it is ranked below the last card of its column.
+        """
+        data = {'title': 'New', 'description': 'Text', 'due_date': '2024-01-01', 'status': 'todo',
+                'category': None, 'priority': None, 'assignedTo': None, 'bgcolor': '#fff', 'subtasks': None}
+        self.assertEqual(self.client.post(reverse('tasks'), {**data, 'position': 5.0}, format='json').data['position'], 5.0)
+        self.assertEqual(self.client.post(reverse('tasks'), data, format='json').data['position'], 6.0)
+        self.assertEqual(self.client.post(reverse('tasks'), {**data, 'status': 'done'}, format='json').data['position'], 0.0)
+        response = self.client.post(reverse('tasks-bulk'), [{'op': 'create', 'data': data}] * 2, format='json')
+        self.assertEqual([result['data']['position'] for result in response.data['results']], [7.0, 8.0])
+
+    def test_move_invalid(self):
+        """
+        Empty moves are rejected with 400 and unknown tasks with 404.
+        """
+        url = reverse('task-move', kwargs={'pk': self.tasks[0].pk})
+        self.assertEqual(self.client.post(url, {}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        url = reverse('task-move', kwargs={'pk': 999999})
+        response = self.client.post(url, {'status': 'done'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PartialUpdateTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and create a task and a contact.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.task = Task.objects.create(
+            title="Task", description="Description", due_date="2024-01-01",
+            status="todo", bgcolor='#FFFFFF', author=self.user, subtasks=[{'title': 'Step', 'done': False}]
+        )
+        self.contact = Contact.objects.create(name="Jane", surname="Doe", email="jane.doe@example.com")
+
+    def _update_statements(self, queries, table):
+        """
+        Return the UPDATE statements issued against the given table.
+        """
+        return [query['sql'] for query in queries if query['sql'].startswith(f'UPDATE "{table}"')]
+
+    def test_patch_task(self):
+        """
+        Patching a task writes only the submitted column and the version.
+        """
+        url = reverse('task-detail', kwargs={'pk': self.task.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {'status': 'done'}, format='json')
+        updates = self._update_statements(queries, 'api_task')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'done')
+        self.assertEqual(response.data['title'], 'Task')
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"status"', updates[0])
+        self.assertNotIn('"title"', updates[0])
+        self.assertNotIn('"subtasks"', updates[0])
+
+    def test_patch_contact(self):
+        """
+        Patching a contact validates and writes only the submitted fields.
+        """
+        url = reverse('contacts-detail', args=[self.contact.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {'telefon': '12345'}, format='json')
+        updates = self._update_statements(queries, 'api_contact')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['telefon'], '12345')
+        self.assertEqual(response.data['email'], 'jane.doe@example.com')
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"email"', updates[0])
+
+    def test_patch_assignees_only(self):
+        """
+        Patching only the assignees bumps the version, so list ETags and the sync feed see the change.
+        """
+        version = Task.objects.get(pk=self.task.pk).version
+        etag = self.client.get(reverse('tasks'))['ETag']
+        since = self.client.get(reverse('sync'), {'since': 0}).data['version']
+        url = reverse('task-detail', kwargs={'pk': self.task.pk})
+        for data in ({'assignees': [self.contact.pk]}, {'assignedTo': [{'email': 'jane.doe@example.com'}]}):
+            response = self.client.patch(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertGreater(Task.objects.get(pk=self.task.pk).version, version)
+            version = Task.objects.get(pk=self.task.pk).version
+        self.assertEqual(response.data['assignees'], [self.contact.pk])
+        self.assertEqual(self.client.get(reverse('tasks'), HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        synced = self.client.get(reverse('sync'), {'since': since}).data
+        self.assertEqual([task['id'] for task in synced['tasks']], [self.task.pk])
+
+    def test_patch_invalid(self):
+        """
+        Invalid submitted fields are rejected, unknown ids yield 404.
+        """
+        url = reverse('contacts-detail', args=[self.contact.pk])
+        response = self.client.patch(url, {'email': 'not-an-email'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        url = reverse('task-detail', kwargs={'pk': 999999})
+        response = self.client.patch(url, {'status': 'done'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskAssigneesTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and create two contacts.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.jane = Contact.objects.create(name="Jane", surname="Doe", email="jane.doe@example.com")
+        self.john = Contact.objects.create(name="John", surname="Smith")
+        self.data = {
+            'title': 'New Task', 'description': 'Description', 'due_date': '2024-01-01',
+            'status': 'todo', 'category': None, 'priority': 'low', 'bgcolor': '#FFFFFF', 'subtasks': None,
+        }
+
+    def test_assignees_from_legacy_json(self):
+        """
+        Assignees are resolved from the assignedTo JSON, which is returned unchanged.
+        """
+        assigned_to = [{'name': 'Jane', 'surname': 'Doe'}, {'email': 'JOHN@example.com'}, 'John Smith', 'Nobody']
+        response = self.client.post(reverse('tasks'), {**self.data, 'assignedTo': assigned_to}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['assignedTo'], assigned_to)
+        self.assertEqual(response.data['assignees'], [self.jane.pk, self.john.pk])
+
+    def test_explicit_assignees(self):
+        """
+        Contact ids can be sent directly and unknown ids are rejected.
+        """
+        data = {**self.data, 'assignedTo': None, 'assignees': [self.john.pk]}
+        response = self.client.post(reverse('tasks'), data, format='json')
+        self.assertEqual(response.data['assignees'], [self.john.pk])
+        url = reverse('task-detail', kwargs={'pk': response.data['id']})
+        response = self.client.patch(url, {'assignees': [self.jane.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['assignees'], [self.jane.pk])
+        response = self.client.patch(url, {'assignees': [999999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_single_write_loads_only_submitted_contacts(self):
+        """
+        A single write checks its assignee ids with one ``id IN (...)`` query instead of loading every contact.
+        """
+        task = Task.objects.create(title="Task", description="Description", due_date="2024-01-01",
+                                   status="todo", bgcolor='#FFFFFF', author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(reverse('task-detail', kwargs={'pk': task.pk}), {'assignees': [self.jane.pk]},
+                                         format='json')
+        self.assertEqual(response.data['assignees'], [self.jane.pk])
+        lookups = [query['sql'] for query in queries if 'FROM "api_contact"' in query['sql'] and 'JOIN' not in query['sql']]
+        self.assertEqual(len(lookups), 1)
+        self.assertTrue(lookups[0].endswith(f'WHERE "api_contact"."id" IN ({self.jane.pk})'))
+
+    def test_filter_and_constant_queries(self):
+        """
+        Tasks can be filtered by assignee, and listing costs the same number of queries for any page size.
+        """
+        for index in range(6):
+            task = Task.objects.create(
+                title=f"Task {index}", description="Description", due_date="2024-01-01",
+                status="todo", bgcolor='#FFFFFF', author=self.user
+            )
+            task.assignees.set([self.jane] if index % 2 else [self.jane, self.john])
+        response = self.client.get(reverse('tasks'), {'assignee': self.john.pk})
+        self.assertEqual(len(response.data['results']), 3)
+
+        def count_queries(page_size):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('tasks'), {'page_size': page_size})
+            return len(queries)
+        self.assertEqual(count_queries(1), count_queries(6))
+
+    def test_deleting_contact_touches_tasks(self):
+        """
+        Deleting an assigned contact stamps its tasks with a new version.
+        """
+        task = Task.objects.create(
+            title="Task", description="Description", due_date="2024-01-01",
+            status="todo", bgcolor='#FFFFFF', author=self.user
+        )
+        task.assignees.set([self.jane])
+        version = Task.objects.get(pk=task.pk).version
+        self.client.delete(reverse('contacts-detail', args=[self.jane.pk]))
+        task = Task.objects.get(pk=task.pk)
+        self.assertGreater(task.version, version)
+        self.assertEqual(list(task.assignees.all()), [])
+
+    def test_bulk_assignees(self):
+        """
+        The bulk endpoint writes assignees of created and updated tasks.
+        """
+        task = Task.objects.create(
+            title="Task", description="Description", due_date="2024-01-01",
+            status="todo", bgcolor='#FFFFFF', author=self.user
+        )
+        task.assignees.set([self.jane])
+        operations = [
+            {'op': 'create', 'data': {**self.data, 'assignedTo': ['Jane Doe']}},
+            {'op': 'update', 'id': task.pk, 'data': {'assignees': [self.john.pk]}},
+        ]
+        response = self.client.post(reverse('tasks-bulk'), operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['data']['assignees'] for result in response.data['results']], [[self.jane.pk], [self.john.pk]])
+        self.assertEqual(list(task.assignees.values_list('pk', flat=True)), [self.john.pk])
+
+
+class SubtaskViewTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and create a task with two subtasks from the legacy JSON.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        data = {
+            'title': 'Task', 'description': 'Description', 'due_date': '2024-01-01',
+            'status': 'todo', 'category': None, 'priority': 'low', 'assignedTo': None, 'bgcolor': '#FFFFFF',
+            'subtasks': [{'title': 'First', 'done': True}, 'Second'],
+        }
+        response = self.client.post(reverse('tasks'), data, format='json')
+        self.task_id = response.data['id']
+        self.subtasks = list(Subtask.objects.filter(task_id=self.task_id))
+
+    def _counters(self):
+        """
+        Return the (done, total) counters of the task as listed on the board.
+        """
+        task = self.client.get(reverse('task-detail', kwargs={'pk': self.task_id})).data
+        return task['subtasks_done'], task['subtasks_total']
+
+    def test_subtasks_created_from_json(self):
+        """
+        Subtasks sent as JSON become rows in order, and the counters match.
+        """
+        self.assertEqual([(subtask.title, subtask.done) for subtask in self.subtasks], [('First', True), ('Second', False)])
+        self.assertEqual(self._counters(), (1, 2))
+
+    def test_subtask_crud_updates_counters(self):
+        """
+        Creating, toggling and deleting subtasks keeps the counters of the task current.
+        """
+        response = self.client.post(reverse('subtasks'), {'task': self.task_id, 'title': 'Third', 'position': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._counters(), (1, 3))
+        url = reverse('subtask-detail', kwargs={'pk': self.subtasks[1].pk})
+        response = self.client.patch(url, {'done': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._counters(), (2, 3))
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._counters(), (1, 2))
+        response = self.client.get(reverse('subtasks'), {'task': self.task_id})
+        self.assertEqual([subtask['title'] for subtask in response.data], ['First', 'Third'])
+
+    def test_bulk_toggle_and_reorder(self):
+        """
+        Many subtasks are toggled and reordered in one request.
+        """
+        changes = [
+            {'id': self.subtasks[0].pk, 'done': False, 'position': 1},
+            {'id': self.subtasks[1].pk, 'done': True, 'position': 0},
+        ]
+        response = self.client.patch(reverse('subtasks-bulk'), changes, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._counters(), (1, 2))
+        response = self.client.get(reverse('subtasks'), {'task': self.task_id})
+        self.assertEqual([subtask['title'] for subtask in response.data], ['Second', 'First'])
+
+    def test_bulk_unknown_subtask(self):
+        """
+        A batch referencing an unknown subtask is rejected and nothing is written.
+        """
+        changes = [{'id': self.subtasks[1].pk, 'done': True}, {'id': 999999, 'done': True}]
+        response = self.client.patch(reverse('subtasks-bulk'), changes, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self._counters(), (1, 2))
+
+    def test_rewritten_json_rebuilds_rows(self):
+        """
+        PUT, PATCH and bulk updates of the subtasks JSON replace the rows and the counters.
+        """
+        url = reverse('task-detail', kwargs={'pk': self.task_id})
+        response = self.client.patch(url, {'subtasks': ['Only']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._counters(), (0, 1))
+        data = dict(self.client.get(url).data, subtasks=[{'title': 'A', 'done': True}, {'title': 'B', 'done': True}])
+        data.pop('assignees')
+        response = self.client.put(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._counters(), (2, 2))
+        operations = [{'op': 'update', 'id': self.task_id, 'data': {'subtasks': ['C', 'D', 'E']}}]
+        response = self.client.post(reverse('tasks-bulk'), operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._counters(), (0, 3))
+        titles = Subtask.objects.filter(task_id=self.task_id).values_list('title', flat=True)
+        self.assertEqual(list(titles), ['C', 'D', 'E'])
+
+
+class TaskSummaryViewTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and create tasks in several columns.
+        """
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.url = reverse('tasks-summary')
+        rows = [
+            ('todo', 'urgent', '2999-01-02'),
+            ('inprogress', 'urgent', '2999-01-01'),
+            ('done', 'urgent', '2998-01-01'),
+            ('todo', 'low', '2998-01-01'),
+        ]
+        for task_status, priority, due_date in rows:
+            Task.objects.create(
+                title="Task", description="Description", due_date=due_date,
+                status=task_status, priority=priority, bgcolor='#FFFFFF', author=self.user
+            )
+
+    def test_summary(self):
+        """
+        The summary counts tasks per status and priority and finds the next urgent deadline.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(response.data['by_status'], {'todo': 2, 'inprogress': 1, 'done': 1})
+        self.assertEqual(response.data['by_priority'], {'urgent': 3, 'low': 1})
+        self.assertEqual(response.data['urgent'], 3)
+        self.assertEqual(str(response.data['upcoming_deadline']), '2999-01-01')
+
+    def test_summary_is_cached_until_write(self):
+        """
+        A repeated request is served from the cache, a task write invalidates it.
+        """
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertFalse([query for query in queries if '"api_task"' in query['sql']])
+        Task.objects.create(
+            title="Task", description="Description", due_date="2999-01-01",
+            status="done", bgcolor='#FFFFFF', author=self.user
+        )
+        self.assertEqual(self.client.get(self.url).data['total'], 5)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client with a fresh token cache.
+        """
+        token_cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.url = reverse('contacts')
+
+    def _token_queries(self):
+        """
+        Perform a request and return the queries that touched the token table.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query for query in queries if 'authtoken_token' in query['sql']]
+
+    def test_token_lookup_is_cached(self):
+        """
+        Only the first request resolves the token in the database.
+        """
+        self.assertEqual(len(self._token_queries()), 1)
+        self.assertEqual(self._token_queries(), [])
+
+    def test_deleted_token_is_rejected_immediately(self):
+        """
+        Deleting a token evicts it from the cache.
+        """
+        self._token_queries()
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected_immediately(self):
+        """
+        Saving the user evicts its tokens from the cache.
+        """
+        self._token_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE={'USE_DJANGO_CACHE': True})
+    def test_shared_revocation_reaches_other_processes(self):
+        """
+        With the shared cache, a token deleted by another process is rejected although it is still in the local LRU.
+        """
+        cache.clear()
+        self._token_queries()
+        self.assertEqual(self._token_queries(), [])
+        key = self.token.key
+        cached = token_cache.get(key)
+        self.token.delete()
+        token_cache.set(key, cached)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_lru_eviction_and_ttl(self):
+        """
+        The cache keeps at most max_size entries and drops expired ones.
+        """
+        cache_under_test = TokenCache(max_size=2, ttl=60)
+        for key in ('a', 'b', 'c'):
+            cache_under_test.set(key, key)
+        self.assertIsNone(cache_under_test.get('a'))
+        self.assertEqual(cache_under_test.get('c'), 'c')
+        expired = TokenCache(max_size=2, ttl=-1)
+        expired.set('a', 'a')
+        self.assertIsNone(expired.get('a'))
+
+
+class TokenExpiryTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client with a token and a fresh token cache.
+        """
+        token_cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.url = reverse('contacts')
+
+    def _age_token(self, token, seconds):
+        """
+        Move the last use of a token into the past.
+        """
+        Token.objects.filter(key=token.key).update(created=timezone.now() - timedelta(seconds=seconds))
+
+    @override_settings(TOKEN_TTL=3600)
+    def test_expired_token_is_rejected_and_deleted(self):
+        """
+        A token unused for longer than TOKEN_TTL is rejected and deleted.
+        """
+        self._age_token(self.token, 7200)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+    @override_settings(TOKEN_TTL=3600)
+    def test_token_use_slides_expiry(self):
+        """
+        Using a token past half of its TTL moves its expiry forward.
+        """
+        self._age_token(self.token, 2400)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.token.refresh_from_db()
+        self.assertGreater(self.token.created, timezone.now() - timedelta(seconds=60))
+
+    def test_logout_revokes_token(self):
+        """
+        Logging out deletes the token, so later requests with it are rejected.
+        """
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_TTL=3600)
+    def test_purge_deletes_only_expired_tokens(self):
+        """
+        purge_expired_tokens deletes the expired tokens and keeps the valid ones.
+        """
+        expired = [Token.objects.create(user=User.objects.create_user(username=f'old{i}')) for i in range(3)]
+        for token in expired:
+            self._age_token(token, 7200)
+        call_command('purge_expired_tokens', batch_size=2, stdout=StringIO())
+        self.assertEqual(list(Token.objects.values_list('key', flat=True)), [self.token.key])
+
+
+class EmailLoginTests(TestCase):
+    def setUp(self):
+        """
+        Set up test case by creating a test user.
+        """
+        self.client = APIClient()
+        self.url = reverse('login')
+        self.user = User.objects.create_user(username='testuser', password='testpassword', email='TestUser@example.com')
+
+    def test_login_ignores_email_case(self):
+        """
+        The email address matches regardless of case.
+        """
+        response = self.client.post(self.url, {'email': 'testuser@EXAMPLE.com', 'password': 'testpassword'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user_id'], self.user.pk)
+
+    def test_login_reads_user_once(self):
+        """
+        Login fetches the user with a single query on the lowercased email.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'email': 'testuser@example.com', 'password': 'testpassword'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user_reads = [query['sql'] for query in queries if query['sql'].startswith('SELECT') and 'FROM "auth_user"' in query['sql']]
+        self.assertEqual(len(user_reads), 1)
+        self.assertIn('LOWER("auth_user"."email")', user_reads[0])
+
+    def test_register_rejects_duplicate_email(self):
+        """
+        Registering with an email that differs only in case is rejected.
+        """
+        data = {'username': 'other', 'first_name': 'Other', 'last_name': 'User',
+                'password': 'otherpassword', 'email': 'testuser@example.COM'}
+        response = self.client.post(reverse('user-list'), data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data['errors'])
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        """
+        Set up test case with a test user and empty throttle buckets.
+        """
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('login')
+        self.user = User.objects.create_user(username='testuser', password='testpassword', email='testuser@example.com')
+
+    def _login(self, email, password='wrongpassword', ip='10.0.0.1'):
+        """
+        Attempt a login from the given IP address.
+        """
+        return self.client.post(self.url, {'email': email, 'password': password}, format='json', REMOTE_ADDR=ip)
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'login_ip': '100/min', 'login_email': '3/min'}})
+    def test_email_bucket_limits_attempts_across_ips(self):
+        """
+        Attempts for one email are throttled even when they come from different IPs.
+        """
+        for i in range(3):
+            self.assertEqual(self._login('testuser@example.com', ip=f'10.0.0.{i}').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self._login('TestUser@example.com', password='testpassword', ip='10.0.0.9')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self._login('other@example.com').status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'login_ip': '2/min', 'login_email': '100/min'}})
+    def test_ip_bucket_limits_attempts(self):
+        """
+        Attempts from one IP are throttled whatever email they use.
+        """
+        self._login('a@example.com')
+        self._login('b@example.com')
+        self.assertEqual(self._login('c@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self._login('c@example.com', ip='10.0.0.2').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PasswordRehashTests(TestCase):
+    @override_settings(PASSWORD_HASHER_PARAMS={'PBKDF2_ITERATIONS': 1000})
+    def test_login_rehashes_with_configured_cost(self):
+        """
+        A hash made with another iteration count is rewritten on login.
+        """
+        cache.clear()
+        user = User.objects.create_user(username='testuser', email='testuser@example.com')
+        with self.settings(PASSWORD_HASHER_PARAMS={'PBKDF2_ITERATIONS': 2000}):
+            user.set_password('testpassword')
+            user.save()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+        response = APIClient().post(reverse('login'), {'email': 'testuser@example.com', 'password': 'testpassword'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+
+class ValuesSerializerTests(TestCase):
+    def setUp(self):
+        """
+        Set up tasks with and without optional values, assignees and an author.
+        """
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.jane = Contact.objects.create(name="Jane", surname="Doe", email="jane.doe@example.com")
+        self.john = Contact.objects.create(name="John", surname="Smith")
+        full = Task.objects.create(author=self.user, title="Full", description="Ä \u2028 <b>", due_date="2024-05-01",
+                                   status="todo", category="Work", priority="high", position=1.5,
+                                   assignedTo=[{'name': 'Jane'}], bgcolor={'a': [1, 2.5, None]}, subtasks=['x'])
+        full.assignees.set([self.john, self.jane])
+        Task.objects.create(title="Bare", description="", due_date="2024-05-02", status="done", bgcolor="#fff")
+
+    def test_output_matches_model_serializer(self):
+        """
+        The rendered JSON is identical to the one of TaskItemSerializer and ContactSerializer.
+        """
+        renderer = JSONRenderer()
+        tasks = Task.objects.prefetch_related('assignees').order_by('id')
+        fast = values_serializer(TaskItemSerializer)
+        self.assertEqual(renderer.render(fast.serialize(fast.values(Task.objects.order_by('id')))),
+                         renderer.render(TaskItemSerializer(tasks, many=True).data))
+        fast = values_serializer(ContactSerializer)
+        self.assertEqual(renderer.render(fast.serialize(fast.values(Contact.objects.order_by('id')))),
+                         renderer.render(ContactSerializer(Contact.objects.order_by('id'), many=True).data))
+
+    def test_page_costs_two_queries(self):
+        """
+        A page of tasks is read with one query for the rows and one for the assignees.
+        """
+        fast = values_serializer(TaskItemSerializer)
+        with self.assertNumQueries(2):
+            data = fast.serialize(fast.values(Task.objects.order_by('id')))
+        self.assertEqual(data[0]['assignees'], [self.jane.pk, self.john.pk])
+        self.assertEqual(data[1]['assignees'], [])
+
+    def test_invalid_due_date_is_rejected(self):
+        """
+        Due dates that are not YYYY-MM-DD are a validation error, not a server error.
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        for due_date in ['2024-13-01', '20240501', '2024-W18-3', 20240501]:
+            data = {'title': 'T', 'description': '', 'due_date': due_date, 'status': 'todo', 'bgcolor': '#fff'}
+            response = client.post(reverse('tasks'), data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, due_date)
+            self.assertIn('due_date', response.data)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = {
+        'title': 'Ä\u2028\u2029 "quoted" </script>',
+        'due_date': date(2024, 5, 1),
+        'updated': datetime(2024, 5, 1, 12, 30, 5, 123456, tzinfo=dt_timezone.utc),
+        'naive': datetime(2024, 5, 1, 12, 30),
+        'amount': Decimal('1.50'),
+        'nested': {'bgcolor': {'a': [1, 2.5, None, True]}, 1: 'int key'},
+        'lazy': gettext_lazy('Not found.'),
+    }
+
+    def test_output_matches_json_renderer(self):
+        """
+        The output is byte-for-byte the one of DRF's JSONRenderer.
+        """
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indent_falls_back_to_stdlib(self):
+        """
+        Indented output is left to the stdlib encoder.
+        """
+        media_type = 'application/json; indent=2'
+        self.assertEqual(FastJSONRenderer().render(self.data, media_type), JSONRenderer().render(self.data, media_type))
+
+    def test_parser_round_trip(self):
+        """
+        The parser reads what the renderer writes and rejects malformed JSON.
+        """
+        body = FastJSONRenderer().render({'title': 'Ä\u2028', 'ids': [1, 2]})
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), {'title': 'Ä\u2028', 'ids': [1, 2]})
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"title": '))
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_round_trip(self):
+        """
+        MessagePack bodies carry the same values as the JSON representation.
+        """
+        body = MessagePackRenderer().render({'due_date': date(2024, 5, 1), 'ids': [1, 2]})
+        self.assertEqual(MessagePackParser().parse(BytesIO(body)), {'due_date': '2024-05-01', 'ids': [1, 2]})
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and a few tasks.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword', email='test@example.com')
+        self.client.force_authenticate(user=self.user)
+        self.contact = Contact.objects.create(name="Jane", surname="Doe", email="jane.doe@example.com")
+        for i in range(3):
+            task = Task.objects.create(title=f"Task {i}", description="Long text", due_date=f"2024-05-0{i + 1}",
+                                       status="todo", bgcolor="#fff")
+            task.assignees.set([self.contact])
+
+    def test_list_fields_limit_output_and_columns(self):
+        """
+        ?fields= limits the keys of every task and the columns read from the database.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('tasks'), {'fields': 'title,id,assignees'})
+        task_queries = [query['sql'] for query in queries if 'FROM "api_task"' in query['sql']]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0], {'id': response.data['results'][0]['id'], 'title': 'Task 0',
+                                                       'assignees': [self.contact.pk]})
+        self.assertNotIn('description', task_queries[-1])
+
+    def test_exclude_and_pagination(self):
+        """
+        ?exclude= drops fields, and the cursor still works when its columns are not shown.
+        """
+        response = self.client.get(reverse('tasks'), {'exclude': 'description,due_date', 'page_size': 2})
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertNotIn('due_date', response.data['results'][0])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([task['title'] for task in response.data['results']], ['Task 2'])
+
+    def test_unknown_field_is_rejected(self):
+        """
+        Naming a field the serializer does not have is a client error.
+        """
+        response = self.client.get(reverse('contacts'), {'fields': 'name,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+
+    def test_detail_and_users(self):
+        """
+        Details and the user list honour the projection as well.
+        """
+        task = Task.objects.first()
+        response = self.client.get(reverse('task-detail', kwargs={'pk': task.pk}), {'fields': 'status'})
+        self.assertEqual(response.data, {'status': 'todo'})
+        self.assertIn('ETag', response)
+        response = self.client.get(reverse('contacts'), {'fields': 'name'})
+        self.assertEqual(response.data, [{'name': 'Jane'}])
+        response = self.client.get(reverse('user-list'), {'fields': 'username,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('user-list'), {'fields': 'username,email'})
+        self.assertEqual(response.data, [{'username': 'testuser', 'email': 'test@example.com'}])
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client, a board large enough to be compressed and an empty cache.
+        """
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        Task.objects.bulk_create([Task(title=f"Task {i}", description="Long text " * 10, due_date="2024-05-01",
+                                       status="todo", bgcolor="#fff") for i in range(50)])
+        self.url = reverse('tasks')
+
+    def test_gzip_for_large_json(self):
+        """
+        A large list is gzipped for clients accepting gzip, with Vary and a weak ETag.
+        """
+        plain = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br;q=0, gzip;q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_no_compression_when_refused_or_small(self):
+        """
+        Responses stay uncompressed if the client refuses gzip or they are below MIN_SIZE.
+        """
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.client.get(self.url, {'page_size': 1, 'fields': 'id'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_compressed_body_is_reused(self):
+        """
+        Requests for the same ETag reuse the cached compressed body until the data changes.
+        """
+        compress = Mock(side_effect=compress_gzip)
+        with patch.dict(COMPRESSORS, gzip=compress):
+            first = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(compress.call_count, 1)
+            self.assertEqual(first.content, second.content)
+            Task.objects.create(title="New", description="", due_date="2024-05-02", status="todo", bgcolor="#fff")
+            self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(compress.call_count, 2)
+
+    def test_compressed_pages_are_not_shared(self):
+        """
+        A compressed browsable-API page of one user is never served to another user with the same ETag.
+        """
+        task = Task.objects.first()
+        url = reverse('task-detail', args=[task.pk])
+        first = self.client.get(url, HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertIn(b'testuser', gzip.decompress(first.content))
+        other = APIClient()
+        other.force_authenticate(user=User.objects.create_user(username='otheruser', password='otherpassword'))
+        second = other.get(url, HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(second['ETag'], first['ETag'])
+        body = gzip.decompress(second.content)
+        self.assertIn(b'otheruser', body)
+        self.assertNotIn(b'testuser', body)
+
+    def test_choose_encoding(self):
+        """
+        The client's quality values decide, ties go to the server's preference.
+        """
+        self.assertEqual(choose_encoding('gzip, br', ['br', 'gzip']), 'br')
+        self.assertEqual(choose_encoding('gzip;q=1, br;q=0.5', ['br', 'gzip']), 'gzip')
+        self.assertEqual(choose_encoding('*;q=0.1', ['br', 'gzip']), 'br')
+        self.assertIsNone(choose_encoding('', ['gzip']))
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client, a task, a contact and an empty cache.
+        """
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.contact = Contact.objects.create(name="Jane", surname="Doe", email="jane.doe@example.com")
+        self.task = Task.objects.create(title="Task", description="", due_date="2024-05-01", status="todo", bgcolor="#fff")
+        self.task.assignees.set([self.contact])
+        self.url = reverse('tasks')
+
+    def test_repeated_list_is_served_from_cache(self):
+        """
+        A repeated request is answered with only the change counter lookup, a conditional one with 304.
+        """
+        first = self.client.get(self.url)
+        with self.assertNumQueries(2):
+            second = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_entries_are_per_user(self):
+        """
+        Another user does not get the first user's entry.
+        """
+        self.client.get(self.url)
+        other = APIClient()
+        other.force_authenticate(user=User.objects.create_user(username='other', password='otherpassword'))
+        with CaptureQueriesContext(connection) as queries:
+            other.get(self.url)
+        self.assertTrue(any('FROM "api_task"' in query['sql'] for query in queries))
+
+    def test_writes_invalidate_cached_lists(self):
+        """
+        Saves, moves, assignee changes and cascaded contact deletes are visible on the next read.
+        """
+        self.client.get(self.url)
+        self.client.post(reverse('task-move', kwargs={'pk': self.task.pk}), {'status': 'done'}, format='json')
+        self.assertEqual(self.client.get(self.url).data['results'][0]['status'], 'done')
+        self.task.title = "Renamed"
+        self.task.save()
+        self.assertEqual(self.client.get(self.url).data['results'][0]['title'], 'Renamed')
+        self.client.get(reverse('contacts'))
+        self.contact.delete()
+        self.assertEqual(self.client.get(self.url).data['results'][0]['assignees'], [])
+        self.assertEqual(self.client.get(reverse('contacts')).data, [])
+
+    def test_entries_follow_the_change_counter(self):
+        """
+        A committed write seen only through the change counter, like one made by another process, is visible on the next read.
+        """
+        self.client.get(self.url)
+        Task.objects.filter(pk=self.task.pk).update(title="Elsewhere", version=next_version(scope='task'))
+        self.assertEqual(self.client.get(self.url).data['results'][0]['title'], 'Elsewhere')
+
+    @override_settings(RESPONSE_CACHE={'WAIT': 2, 'POLL_INTERVAL': 0.01})
+    def test_concurrent_miss_waits_for_lock_holder(self):
+        """
+        While another request computes a miss, the request waits for its entry instead of querying.
+        """
+        request = SimpleNamespace(get_full_path=lambda: self.url, accepted_media_type='application/json',
+                                  user=self.user)
+        key = TasksItemView.response_cache.key(request)
+        cache.add(key + ':lock', 1, 10)
+        entry = {'content': b'{"next":null,"results":[]}', 'content_type': 'application/json',
+                 'headers': {'ETag': '"cached"'}}
+        Timer(0.1, cache.set, (key, entry)).start()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.content, entry['content'])
+        self.assertFalse(any('FROM "api_task"' in query['sql'] for query in queries))
+
+
+class ExportViewTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client with tasks, some of them assigned to a contact.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.contact = Contact.objects.create(name="Jane", surname="Doe", email="jane.doe@example.com")
+        for i in range(5):
+            task = Task.objects.create(title=f"Task {i}", description="Line one\nline two, \"quoted\"",
+                                       due_date="2024-05-01", status="todo", bgcolor={'color': '#fff'})
+            if i % 2:
+                task.assignees.set([self.contact])
+
+    def test_ndjson_matches_list(self):
+        """
+        The NDJSON export holds one line per task, equal to the list representation.
+        """
+        response = self.client.get(reverse('tasks-export'))
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        listed = self.client.get(reverse('tasks'), {'paginate': 'false', 'order': 'due_date'}).json()
+        self.assertEqual([json.loads(line) for line in lines], listed)
+
+    def test_reads_in_chunks(self):
+        """
+        Rows are fetched and serialized chunk by chunk, with one assignee query per chunk.
+        """
+        with patch.object(TaskExportView, 'chunk_size', 2):
+            with CaptureQueriesContext(connection) as queries:
+                lines = b''.join(self.client.get(reverse('tasks-export')).streaming_content).splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(len([query for query in queries if 'api_taskassignment' in query['sql']]), 3)
+
+    def test_csv_with_fields(self):
+        """
+        The CSV export has a header row and quotes values where needed, also when asked for with Accept.
+        """
+        response = self.client.get(reverse('tasks-export'), {'type': 'csv', 'fields': 'id,description,assignees,bgcolor'},
+                                   HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual(rows[0], ['id', 'assignees', 'description', 'bgcolor'])
+        self.assertEqual(rows[2][1:], [f'[{self.contact.pk}]', 'Line one\nline two, "quoted"', '{"color":"#fff"}'])
+        self.assertEqual(len(rows), 6)
+
+    def test_contacts_and_invalid_type(self):
+        """
+        Contacts are exported as well; unknown types are rejected.
+        """
+        response = self.client.get(reverse('contacts-export'), {'type': 'csv'})
+        self.assertIn('attachment; filename="contacts.csv"', response['Content-Disposition'])
+        self.assertEqual(self.client.get(reverse('contacts-export'), {'type': 'xml'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_async_stream_under_asgi(self):
+        """
+        Under ASGI the export is an async stream with the same rows, gzipped on the fly on request.
+        """
+        token = Token.objects.create(user=self.user)
+
+        async def fetch(params, **headers):
+            response = await AsyncClient().get(reverse('tasks-export'), params,
+                                               headers={'authorization': f'Token {token.key}', **headers})
+            self.assertTrue(response.is_async)
+            return response, b''.join([chunk async for chunk in response.streaming_content])
+
+        for params in ({}, {'type': 'csv', 'fields': 'id,description,assignees'}):
+            response, content = async_to_sync(fetch)(params)
+            self.assertEqual(content, b''.join(self.client.get(reverse('tasks-export'), params).streaming_content))
+        response, compressed = async_to_sync(fetch)({}, accept_encoding='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed), b''.join(self.client.get(reverse('tasks-export')).streaming_content))
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and a temporary directory for import files.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_file(self, name, content):
+        """
+        Writes an import file and returns its path.
+        """
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write(content)
+        return path
+
+    def test_command_imports_csv_contacts(self):
+        """
+        The command imports contacts from CSV, leaving defaults for empty cells.
+        """
+        path = self.write_file('contacts.csv', 'name,surname,email,bgcolor\r\nJane,Doe,jane@example.com,\r\n'
+                                               'John,Roe,,#123456\r\n')
+        out = StringIO()
+        call_command('import_board', 'contacts', path, stdout=out)
+        self.assertIn('Imported 2 contacts', out.getvalue())
+        jane, john = Contact.objects.order_by('name')
+        self.assertEqual((jane.email, jane.bgcolor), ('jane@example.com', '#0038FF'))
+        self.assertEqual((john.email, john.bgcolor), (None, '#123456'))
+        self.assertGreater(jane.version, 0)
+
+    def test_command_batches_queries(self):
+        """
+        Rows are inserted with one INSERT per chunk rather than per row.
+        """
+        path = self.write_file('contacts.ndjson', ''.join(
+            json.dumps({'name': f'Name {i}', 'surname': 'Doe'}) + '\n' for i in range(10)))
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_board', 'contacts', path, '--batch-size', '4', stdout=StringIO())
+        self.assertEqual(Contact.objects.count(), 10)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT INTO "api_contact"')]), 3)
+
+    def test_version_reserved_before_commit(self):
+        """
+        The sync counter is only locked after the last chunk is written, and all imported rows share its version.
+        """
+        path = self.write_file('contacts.ndjson', ''.join(
+            json.dumps({'name': f'Name {i}', 'surname': 'Doe'}) + '\n' for i in range(10)))
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_board', 'contacts', path, '--batch-size', '4', stdout=StringIO())
+        statements = [query['sql'] for query in queries]
+        inserts = [i for i, sql in enumerate(statements) if sql.startswith('INSERT INTO "api_contact"')]
+        counters = [i for i, sql in enumerate(statements) if sql.startswith('UPDATE "api_changecounter"')]
+        self.assertGreater(min(counters), max(inserts))
+        self.assertEqual(set(Contact.objects.values_list('version', flat=True)), {current_version()})
+
+    def test_invalid_row_rolls_back(self):
+        """
+        An invalid row is reported with its line number and nothing is imported.
+        """
+        path = self.write_file('contacts.ndjson', '{"name": "Jane", "surname": "Doe"}\n'
+                                                  '{"name": "John"}\n'
+                                                  'not json\n')
+        err = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('import_board', 'contacts', path, '--batch-size', '1', stdout=StringIO(), stderr=err)
+        self.assertFalse(Contact.objects.exists())
+        self.assertIn('Line 2', err.getvalue())
+        self.assertIn('Line 3', err.getvalue())
+
+    def test_unreadable_input_is_rejected(self):
+        """
+        Files that are not UTF-8 or not parseable are rejected with 400 by the view
+        and with CommandError by the command, and nothing is imported.
+        """
+        content = '{"name": "Jane", "surname": "Doe"}\n'.encode('utf-8') + '{"name": "Jöhn"}\n'.encode('latin-1')
+        upload = SimpleUploadedFile('contacts.ndjson', content)
+        response = self.client.post(reverse('contacts-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('UTF-8', response.json()['message'])
+        upload = SimpleUploadedFile('contacts.csv', b'name,surname\r\n' + b'x' * (csv.field_size_limit() + 1) + b',Doe\r\n')
+        response = self.client.post(reverse('contacts-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cannot be read', response.json()['message'])
+        path = os.path.join(self.directory.name, 'contacts.csv')
+        with open(path, 'wb') as file:
+            file.write(b'name,surname\r\nJ\xf6rg,Doe\r\n')
+        with self.assertRaisesMessage(CommandError, 'UTF-8'):
+            call_command('import_board', 'contacts', path, stdout=StringIO())
+        self.assertFalse(Contact.objects.exists())
+
+    def test_skip_invalid_keeps_valid_rows(self):
+        """
+        With --skip-invalid the valid rows are imported and the invalid ones reported.
+        """
+        path = self.write_file('contacts.ndjson', '{"name": "Jane", "surname": "Doe"}\n'
+                                                  '{"name": "John"}\n')
+        out = StringIO()
+        call_command('import_board', 'contacts', path, '--skip-invalid', stdout=out, stderr=StringIO())
+        self.assertIn('Imported 1 contacts, 1 invalid row(s)', out.getvalue())
+        self.assertEqual(list(Contact.objects.values_list('name', flat=True)), ['Jane'])
+
+    def test_export_round_trip(self):
+        """
+        A CSV task export imports back with its assignees and subtasks.
+        """
+        contact = Contact.objects.create(name="Jane", surname="Doe")
+        task = Task.objects.create(title="Task", description="Line one\nline two, \"quoted\"", due_date="2024-05-01",
+                                   status="todo", bgcolor={'color': '#fff'}, subtasks=[{'title': 'Step', 'done': True}])
+        task.assignees.set([contact])
+        exported = b''.join(self.client.get(reverse('tasks-export'), {'type': 'csv'}).streaming_content)
+        Task.objects.all().delete()
+        path = self.write_file('tasks.csv', exported.decode('utf-8'))
+        call_command('import_board', 'tasks', path, '--user', 'testuser', stdout=StringIO())
+        imported = Task.objects.get()
+        self.assertEqual((imported.description, imported.author, imported.bgcolor),
+                         (task.description, self.user, {'color': '#fff'}))
+        self.assertEqual(list(imported.assignees.all()), [contact])
+        self.assertEqual((imported.subtasks_total, imported.subtasks_done), (1, 1))
+        self.assertEqual(list(imported.subtask_items.values_list('title', flat=True)), ['Step'])
+
+    def test_upload_endpoint(self):
+        """
+        Uploading an NDJSON file imports its tasks with the uploader as author, ranked below the column in file order.
+        """
+        row = {'title': 'Imported', 'description': 'Text', 'due_date': '2024-05-01', 'status': 'todo', 'bgcolor': {'color': '#fff'}}
+        Task.objects.create(**row, position=3)
+        upload = SimpleUploadedFile('tasks.ndjson', (json.dumps(row) + '\n').encode('utf-8') * 2)
+        response = self.client.post(reverse('tasks-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['created'], 2)
+        imported = Task.objects.filter(author=self.user).order_by('pk')
+        self.assertEqual([task.position for task in imported], [4.0, 5.0])
+
+    def test_upload_invalid_rows(self):
+        """
+        Invalid rows in an upload are answered with 400 and their errors.
+        """
+        upload = SimpleUploadedFile('contacts.csv', b'name,surname\r\nJane,\r\n')
+        response = self.client.post(reverse('contacts-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['errors'][0]['line'], 2)
+        self.assertIn('surname', response.json()['errors'][0]['errors'])
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        """
+        Set up a user with a token, contacts and tasks.
+        """
+        cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.factory = AsyncRequestFactory()
+        self.headers = {'authorization': f'Token {self.token.key}'}
+        self.contact = Contact.objects.create(name="Jane", surname="Doe", email="jane.doe@example.com")
+        for i in range(5):
+            task = Task.objects.create(title=f"Task {i}", description="Text", due_date=f"2024-05-0{i + 1}",
+                                       status="todo" if i % 2 else "done", bgcolor={'color': '#fff'})
+            if i % 2:
+                task.assignees.set([self.contact])
+
+    def call(self, view, request, **kwargs):
+        """
+        Runs an async view on a request from the factory.
+        """
+        return async_to_sync(view.as_view())(request, **kwargs)
+
+    def test_middleware_not_adapted(self):
+        """
+        Under ASGI no middleware needs adapting, so async views are not moved into a thread.
+        """
+        with override_settings(DEBUG=True), self.assertNoLogs('django.request', level='DEBUG'):
+            BaseHandler().load_middleware(is_async=True)
+
+    def test_list_matches_sync_view(self):
+        """
+        Filtered, paginated and sparse task lists equal the ones of the sync view.
+        """
+        for params in ({}, {'page_size': 2}, {'paginate': 'false', 'status': 'todo'}, {'fields': 'id,assignees'}):
+            response = self.call(AsyncTasksItemView, self.factory.get(reverse('tasks'), params, headers=self.headers))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content), self.client.get(reverse('tasks'), params).json())
+        response = self.call(AsyncContactView, self.factory.get(reverse('contacts'), headers=self.headers))
+        self.assertEqual(json.loads(response.content), self.client.get(reverse('contacts')).json())
+
+    def test_detail_and_not_modified(self):
+        """
+        A task reads like in the sync view and is answered with 304 while its ETag is current.
+        """
+        task = Task.objects.get(title="Task 1")
+        path = reverse('task-detail', args=[task.pk])
+        response = self.call(AsyncTasksItemView, self.factory.get(path, headers=self.headers), pk=task.pk)
+        synced = self.client.get(path)
+        self.assertEqual(json.loads(response.content), synced.json())
+        self.assertEqual(response['ETag'], synced['ETag'])
+        response = self.call(AsyncTasksItemView, self.factory.get(path, headers={**self.headers, 'if-none-match': response['ETag']}),
+                             pk=task.pk)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.call(AsyncTasksItemView, self.factory.get(reverse('task-detail', args=[9999]), headers=self.headers),
+                             pk=9999)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_is_cached(self):
+        """
+        A repeated list request is served from the response cache without querying tasks.
+        """
+        self.call(AsyncTasksItemView, self.factory.get(reverse('tasks'), headers=self.headers))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.call(AsyncTasksItemView, self.factory.get(reverse('tasks'), headers=self.headers))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries if 'api_task' in query['sql']])
+
+    def test_token_required(self):
+        """
+        Requests without a valid token are rejected with 401, expired tokens are deleted.
+        """
+        response = self.call(AsyncContactView, AsyncRequestFactory().get(reverse('contacts')))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+        response = self.call(AsyncContactView, AsyncRequestFactory().get(
+            reverse('contacts'), headers={'authorization': 'Token invalid'}))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        Token.objects.filter(pk=self.token.pk).update(created=timezone.now() - timedelta(days=30))
+        response = self.call(AsyncContactView, self.factory.get(reverse('contacts'), headers=self.headers))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Token.objects.filter(pk=self.token.pk).exists())
+
+    def test_writes_use_sync_view(self):
+        """
+        Writes are served by the sync view, and the next async list shows them.
+        """
+        self.call(AsyncContactView, self.factory.get(reverse('contacts'), headers=self.headers))
+        response = self.call(AsyncContactView, self.factory.post(
+            reverse('contacts'), {'name': 'John', 'surname': 'Roe', 'email': 'john@example.com', 'telefon': '123', 'bgcolor': '#123456'},
+            content_type='application/json',
+            headers=self.headers))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.call(AsyncContactView, self.factory.get(reverse('contacts'), headers=self.headers))
+        self.assertEqual(sorted(contact['name'] for contact in json.loads(response.content)), ['Jane', 'John'])
+
+    def test_errors(self):
+        """
+        Unknown fields are answered with 400, and the browsable API is rendered by the sync view.
+        """
+        response = self.call(AsyncTasksItemView, self.factory.get(reverse('tasks'), {'fields': 'nope'}, headers=self.headers))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', json.loads(response.content))
+        response = self.call(AsyncContactView, self.factory.get(reverse('contacts'), headers={**self.headers, 'accept': 'text/html'}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+
+
+class RecordingBackend(BrokerBackend):
+    """
+    Backend recording the published frames instead of delivering them.
+    """
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, frame):
+        self.published.append((channel, frame))
+
+
+def parse_events(chunks):
+    """
+    Parses Server-Sent Events frames into (event, data) pairs, skipping comments.
+    """
+    events = []
+    for block in b''.join(chunks).decode('utf-8').split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class EventTests(TestCase):
+    def setUp(self):
+        """
+        Set up the test client and a fresh broker used by the views and signals.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.broker = Broker(max_queue=3)
+        for target in ('api.events.get_broker', 'api.views.get_broker'):
+            patcher = patch(target, return_value=self.broker)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.task = Task.objects.create(title="Task", description="Text", due_date="2024-05-01", status="todo",
+                                        bgcolor={'color': '#fff'}, author=self.user)
+
+    def test_broker_evicts_slow_consumer(self):
+        """
+        A subscriber that does not read is evicted once its queue is full, others keep receiving.
+        """
+        reader, stalled = self.broker.subscribe(['board']), self.broker.subscribe(['board'])
+        for i in range(4):
+            self.broker.publish('board', encode_event('test', {'n': i}))
+            self.assertEqual(len(reader.get(0)), 1)
+        self.assertTrue(stalled.closed)
+        self.assertEqual(stalled.get(0), [])
+        self.assertEqual(self.broker.evicted, 1)
+        self.assertFalse(reader.closed)
+
+    def test_subscriber_limit_and_backend(self):
+        """
+        Subscriptions beyond MAX_SUBSCRIBERS are refused, and frames go through the configured backend.
+        """
+        backend = RecordingBackend()
+        broker = Broker(backend, max_subscribers=1)
+        self.assertIsNotNone(broker.subscribe(['board']))
+        self.assertIsNone(broker.subscribe(['board']))
+        broker.publish('board', b'frame')
+        self.assertEqual(backend.published, [('board', b'frame')])
+
+    def test_async_reader_is_woken(self):
+        """
+        A reader waiting on the event loop is woken by a frame published from another thread.
+        """
+        subscription = self.broker.subscribe(['board'])
+        Timer(0.05, self.broker.publish, ['board', b'frame']).start()
+        started = time.monotonic()
+        self.assertEqual(async_to_sync(subscription.aget)(5), [b'frame'])
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_writes_publish_diffs(self):
+        """
+        Creating, patching, moving and deleting tasks publishes events with the changed fields.
+        """
+        subscription = self.broker.subscribe(['board'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('task-detail', args=[self.task.pk]), {'title': 'Renamed'}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('task-move', args=[self.task.pk]), {'status': 'done', 'position': 2.0},
+                             format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('tasks-bulk'), [{'op': 'delete', 'id': self.task.pk}], format='json')
+        events = parse_events(subscription.get(0))
+        self.assertEqual([event for event, data in events], ['task.updated', 'task.updated', 'sync'])
+        self.assertEqual(events[0][1]['fields'], {'title': 'Renamed', 'version': events[0][1]['version']})
+        self.assertEqual(events[1][1]['fields']['status'], 'done')
+        self.assertEqual(events[2][1]['models'], ['task'])
+        contact = Contact.objects.create(name="Jane", surname="Doe")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('contacts-detail', args=[contact.pk]))
+        self.assertEqual(parse_events(subscription.get(0)), [('contact.deleted', {'id': contact.pk})])
+
+    def test_nothing_published_on_rollback(self):
+        """
+        Events are only published once the transaction commits.
+        """
+        subscription = self.broker.subscribe(['board'])
+        with self.captureOnCommitCallbacks(execute=False):
+            Contact.objects.create(name="Jane", surname="Doe")
+        self.assertEqual(subscription.get(0), [])
+
+    @override_settings(EVENTS={'HEARTBEAT': 0.01, 'WSGI_STREAMS': 1})
+    def test_stream(self):
+        """
+        The stream starts with a sync event for a stale Last-Event-ID, then sends events and heartbeats.
+        """
+        response = self.client.get(reverse('events'), HTTP_LAST_EVENT_ID='0')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        first = next(chunks)
+        self.assertTrue(first.startswith(b'retry: 3000'))
+        self.assertEqual(parse_events([first])[0][0], 'sync')
+        self.assertEqual(next(chunks), b': keep-alive\n\n')
+        self.broker.publish('board', encode_event('task.deleted', {'id': 1}, 5))
+        self.assertEqual(parse_events([next(chunks)]), [('task.deleted', {'id': 1})])
+        response.close()
+        self.assertFalse(self.broker.listening)
+
+    @override_settings(EVENTS={'WSGI_STREAMS': 1})
+    def test_wsgi_stream_limit(self):
+        """
+        Under WSGI streams are refused with 503 beyond WSGI_STREAMS, and by default altogether.
+        """
+        response = self.client.get(reverse('events'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        next(iter(response.streaming_content))
+        self.assertEqual(self.client.get(reverse('events')).status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        response.close()
+        self.assertEqual(self.client.get(reverse('events')).status_code, status.HTTP_200_OK)
+        with override_settings(EVENTS={}):
+            self.assertEqual(self.client.get(reverse('events')).status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    @override_settings(EVENTS={'WSGI_STREAMS': 1})
+    def test_stream_eviction_and_query_token(self):
+        """
+        A stream authenticated with ?token= ends with an evicted event once its client falls behind.
+        """
+        token = Token.objects.create(user=self.user)
+        response = Client().get(reverse('events'), {'token': token.key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        for i in range(4):
+            self.broker.publish('board', encode_event('test', {'n': i}))
+        self.assertEqual(parse_events([next(chunks)]), [('evicted', {'reason': 'slow consumer'})])
+        self.assertRaises(StopIteration, next, chunks)
+        self.assertEqual(Client().get(reverse('events'), {'token': 'invalid'}).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(REPLICA_ROUTING={'DATABASES': ['replica'], 'LAG': 60, 'CACHE': 'default'})
+class ReplicaRoutingTests(TestCase):
+    """
+    A second SQLite file stands in for a read replica. Rows written to only one of
+    the two files show which database served a read.
+    """
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Adds the replica database and creates its tables.
+        """
+        cls.directory = TemporaryDirectory()
+        connections.settings['replica'] = connections.configure_settings({
+            'default': connections.settings['default'],
+            'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(cls.directory.name, 'replica.sqlite3')},
+        })['replica']
+        call_command('migrate', database='replica', verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Removes the replica database.
+        """
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        """
+        Set up a user with a token on the primary, and a task only on the replica.
+        """
+        cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client = Client(headers={'authorization': f'Token {self.token.key}'})
+        self.task = Task.objects.using('replica').create(title='Replica', description='Text', due_date='2024-05-01',
+                                                         status='todo', bgcolor={})
+
+    def test_reads_go_to_replica(self):
+        """
+        Task details are read from the replica, while the token is checked on the primary.
+        """
+        response = self.client.get(reverse('task-detail', args=[self.task.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['title'], 'Replica')
+
+    def test_primary_override(self):
+        """
+        The X-Read-Primary header and ?primary=true send the reads to the primary.
+        """
+        path = reverse('task-detail', args=[self.task.pk])
+        self.assertEqual(self.client.get(path, headers={'x-read-primary': 'true'}).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(path, {'primary': 'true'}).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_write_pins_client_to_primary(self):
+        """
+        After a write the client reads from the primary, other clients still read from the replica.
+        """
+        response = self.client.post(reverse('contacts'), {'name': 'Jane', 'surname': 'Doe', 'email': 'jane@example.com',
+                                                          'telefon': '123', 'bgcolor': '#fff'}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        path = reverse('contacts-detail', args=[response.json()['id']])
+        self.assertEqual(self.client.get(path).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse('task-detail', args=[self.task.pk])).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        other = Token.objects.create(user=User.objects.create_user(username='other'))
+        self.assertEqual(Client().get(path, headers={'authorization': f'Token {other.key}'}).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_cached_lists_are_read_from_replica(self):
+        """
+        A list miss runs on the replica and is cached under the replica's change counter.
+        """
+        Task.objects.create(title='Primary', description='Text', due_date='2024-05-01', status='todo', bgcolor={})
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = self.client.get(reverse('tasks'), {'paginate': 'false'})
+        self.assertEqual([task['title'] for task in response.json()], ['Replica'])
+        self.assertTrue(any('FROM "api_task"' in query['sql'] for query in queries))
+        Task.objects.using('replica').create(title='Caught up', description='Text', due_date='2024-05-01',
+                                             status='todo', bgcolor={})
+        ChangeCounter.objects.using('replica').update_or_create(name='task', defaults={'value': 100})
+        response = self.client.get(reverse('tasks'), {'paginate': 'false'})
+        self.assertEqual([task['title'] for task in response.json()], ['Replica', 'Caught up'])
+
+    def test_router(self):
+        """
+        Only reads inside a routed block go to the replica; tokens and all writes stay on the primary.
+        """
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Task))
+        with reading_from('replica'):
+            self.assertEqual(router.db_for_read(Task), 'replica')
+            self.assertIsNone(router.db_for_read(Token))
+            self.assertEqual(router.db_for_write(Task, instance=self.task), 'default')
+        self.assertTrue(router.allow_relation(self.task, self.user))
@@ -0,0 +1,96 @@
+import hashlib
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket throttle backed by the Django cache.
+    A rate of ``N/period`` gives a bucket of N tokens that refills continuously at
+    N per period, so clients may burst up to N requests and are then limited to the
+    refill rate. The bucket is stored in the cache as (tokens, timestamp), one entry
+    per client, instead of the request history kept by SimpleRateThrottle. Updates
+    are not atomic, so concurrent requests of one client may slip an extra token.
+    Rates are configured per ``scope`` in ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``.
+    """
+    def get_rate(self):
+        """
+        Returns the rate of the scope, read from the current settings.
+        Returns:
+            str: The rate, e.g. '10/min'.
+        Raises:
+            ImproperlyConfigured: If no rate is set for the scope.
+        """
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def allow_request(self, request, view):
+        """
+        Takes a token from the bucket of the client.
+        Args:
+            request (Request): The incoming request.
+            view (APIView): The view being accessed.
+        Returns:
+            bool: True if the bucket had a token left.
+        """
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        tokens, stamp = self.cache.get(self.key, (self.num_requests, self.now))
+        self.tokens = min(self.num_requests, tokens + (self.now - stamp) * self.num_requests / self.duration)
+        if self.tokens < 1:
+            return self.throttle_failure()
+        self.cache.set(self.key, (self.tokens - 1, self.now), self.duration)
+        return True
+
+    def wait(self):
+        """
+        Returns the seconds until the bucket holds a token again.
+        Returns:
+            float: The recommended wait before the next request.
+        """
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """
+    Limits login attempts per client IP address.
+    """
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        """
+        Returns the cache key of the client IP address.
+        """
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    """
+    Limits login attempts per email address, whatever IP addresses they come from.
+    """
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        """
+        Returns the cache key of the submitted email address, or None if there is none.
+        The address is hashed, so it never shows up in a shared cache backend.
+        """
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email:
+            return None
+        ident = hashlib.sha256(email.strip().lower().encode('utf-8')).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class RegisterIPThrottle(LoginIPThrottle):
+    """
+    Limits registrations per client IP address.
+    """
+    scope = 'register_ip'
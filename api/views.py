@@ -1,15 +1,34 @@
-from django.shortcuts import render
+import io
+from django.shortcuts import get_object_or_404, render
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib.auth.models import User 
 from rest_framework import generics
 from .serializers import UserSerializer
 from rest_framework.authtoken.views import ObtainAuthToken, APIView, Token, Response
 from rest_framework import status
 from django.contrib.auth import logout
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from .authentication import CachedTokenAuthentication, QueryTokenAuthentication, is_expired, refresh_token
 from rest_framework.permissions import IsAuthenticated
-from .models import Task, Contact, Subtask
-from .serializers import TaskItemSerializer, ContactSerializer, SubtaskSerializer, EmailAuthTokenSerializer
-from rest_framework.exceptions import NotFound
+from django.db import transaction
+from datetime import date
+from django.core.cache import cache
+from django.db.models import Count, Min, Q, prefetch_related_objects
+from .models import Task, TaskAssignment, Contact, Subtask, Tombstone, ChangeCounter, current_version, next_version, delete_tracked, refresh_subtask_counters, replace_subtasks, column_ends, renumber_column
+from .serializers import TaskItemSerializer, TaskMoveSerializer, ContactSerializer, SubtaskSerializer, SubtaskBatchItemSerializer, EmailAuthTokenSerializer
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
+from .pagination import TaskCursorPagination
+from .filters import filter_tasks
+from .subtasks import parse_subtasks
+from .conditional import list_validators, detail_etag, not_modified, set_validators
+from .fast_serializers import values_serializer
+from .cache import ResponseCache
+from .exports import ExportContentNegotiation, serialized_chunks, aserialized_chunks, ndjson_lines, andjson_lines, csv_lines, acsv_lines
+from .imports import IMPORT_TYPES, TaskImporter, ContactImporter, UnreadableInput
+from .events import BOARD_CHANNEL, get_broker, get_event_settings, resync_frame, event_stream, aevent_stream, publish, publish_sync
+from .throttling import LoginIPThrottle, LoginEmailThrottle, RegisterIPThrottle
 
 
 class UserView(APIView):
@@ -19,7 +38,18 @@ class UserView(APIView):
     Provides two HTTP methods:
     - POST: To create a new user instance.
     - GET: To retrieve one or all user instances.
+    Registrations (POST) are throttled per client IP address.
     """
+    def get_throttles(self):
+        """
+        Returns the throttles of the request; only registrations are throttled.
+        Returns:
+            list: The throttle instances.
+        """
+        if self.request.method == 'POST':
+            return [RegisterIPThrottle()]
+        return super().get_throttles()
+
     def post(self, request):
         """
         Creates a new user instance.
@@ -52,19 +82,20 @@ class UserView(APIView):
             format (str, optional): The format of the response (e.g., 'json'). Defaults to None.
 
         Returns:
-            Response: A Django Rest Framework response object containing the user data.
+            Response: A Django Rest Framework response object containing the user data, limited to
+            the fields selected with ``?fields=``/``?exclude=``.
             If a specific user is requested and not found, raises NotFound with a 404 status.
         """
+        fields = UserSerializer.requested_fields(request)
         if pk:
             try:
-                user = User.objects.get(pk=pk)
-                serializer = UserSerializer(user)
+                users = User.objects.only(*UserSerializer.model_columns(fields)) if fields else User.objects
+                serializer = UserSerializer(users.get(pk=pk), fields=fields)
             except User.DoesNotExist:
                 raise NotFound(detail="User not found", code=404)
-        else:
-            users = User.objects.all()
-            serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+            return Response(serializer.data)
+        serializer = values_serializer(UserSerializer).project(fields)
+        return Response(serializer.serialize(serializer.values(User.objects.all())))
     
 class TasksItemView(APIView):
     """
@@ -72,12 +103,25 @@ class TasksItemView(APIView):
     * Requires token authentication.
     * Only authenticated users are able to access this view.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    pagination_class = TaskCursorPagination
+    response_cache = ResponseCache(Task)
+
     def get(self, request, pk=None, format=None):
         """
-        Retrieve a single Task by its id or all Tasks if no id is provided.
+        Retrieve a single Task by its id or a page of Tasks if no id is provided.
+        The list can be narrowed down with query parameters (see filter_tasks)
+        and is paginated with an opaque cursor (see TaskCursorPagination).
+        Clients that still need the complete list in one response can opt in
+        with ``?paginate=false``.
+        Responses carry an ETag (and Last-Modified for the list); a request whose
+        validators are still current is answered with 304 before any serialization.
+        Lists are read as ``values()`` rows and rendered by the compiled
+        ValuesSerializer, which produces the same output as TaskItemSerializer.
+        ``?fields=``/``?exclude=`` limit the output and the selected columns.
+        Rendered lists are cached per user and request until a task changes (see ResponseCache).
 
         Args:
             request: The HTTP request object.
@@ -88,15 +132,48 @@ class TasksItemView(APIView):
             Response object containing serialized Task data.
         """
         if pk:
+            if request.headers.get('If-None-Match'):
+                version = Task.objects.filter(pk=pk).values_list('version', flat=True).first()
+                if version is not None:
+                    response = not_modified(request, detail_etag(request, Task, pk, version))
+                    if response:
+                        return response
+            fields = TaskItemSerializer.requested_fields(request)
+            todos = Task.objects.only(*TaskItemSerializer.model_columns(fields), 'version') if fields else Task.objects
+            if fields is None or 'assignees' in fields:
+                todos = todos.prefetch_related('assignees')
             try:
-                todo = Task.objects.get(pk=pk)  # Einzelnen Task abrufen
-                serializer = TaskItemSerializer(todo)
+                todo = todos.get(pk=pk)  # Einzelnen Task abrufen
+                serializer = TaskItemSerializer(todo, fields=fields)
             except Task.DoesNotExist:
                 raise NotFound(detail="Task not found", code=404)
+            return set_validators(Response(serializer.data), detail_etag(request, Task, pk, todo.version))
+        return self.response_cache.fetch(request, lambda: self.list(request))
+
+    def list(self, request):
+        """
+        Compute a page (or, with ``?paginate=false``, all) of the filtered tasks.
+        Args:
+            request: The HTTP request object.
+        Returns:
+            Response object with the serialized tasks and their validators, or 304.
+        """
+        etag, last_modified = list_validators(request, Task)
+        response = not_modified(request, etag, last_modified)
+        if response:
+            return response
+        serializer = values_serializer(TaskItemSerializer).project(TaskItemSerializer.requested_fields(request))
+        paginator = self.pagination_class()
+        todos = serializer.values(filter_tasks(Task.objects.all(), request.query_params),
+                                  extra=paginator.get_ordering(request))  # Alle Tasks abrufen
+        if request.query_params.get('paginate') == 'false':
+            if paginator.ordering_query_param in request.query_params:
+                todos = todos.order_by(*paginator.get_ordering(request))
+            response = Response(serializer.serialize(todos))
         else:
-            todos = Task.objects.all()  # Alle Tasks abrufen
-            serializer = TaskItemSerializer(todos, many=True)
-        return Response(serializer.data)
+            page = paginator.paginate_queryset(todos, request, view=self)
+            response = paginator.get_paginated_response(serializer.serialize(page))
+        return set_validators(response, etag, last_modified)
     
     
     def post(self, request, format=None):
@@ -110,9 +187,9 @@ class TasksItemView(APIView):
             Response object with created Task data and HTTP 201 status on success,
             or error details with HTTP 400 status on failure.
         """
-        serializer = TaskItemSerializer(data=request.data)
+        serializer = TaskItemSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save(author=request.user)
+            serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -142,6 +219,31 @@ class TasksItemView(APIView):
         else:
             return Response({"message": "Missing task ID"}, status=status.HTTP_400_BAD_REQUEST)
 
+    def patch(self, request, pk=None, format=None):
+        """
+        Partially update an existing Task specified by its id.
+        Only the submitted fields are validated and written.
+
+        Args:
+            request: The HTTP request object.
+            pk: The primary key of the Task to update.
+            format: The format of the response (defaults to JSON if None).
+
+        Returns:
+            Response object with updated Task data, or error details with HTTP 400 status on failure.
+        """
+        if not pk:
+            return Response({"message": "Missing task ID"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            todo = Task.objects.get(pk=pk)
+        except Task.DoesNotExist:
+            raise NotFound(detail="Task not found", code=404)
+        serializer = TaskItemSerializer(todo, data=request.data, partial=True)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     def delete(self, request, pk, format=None):
         """
         Delete a Task instance specified by its id.
@@ -153,12 +255,452 @@ class TasksItemView(APIView):
 
         Returns:
             Empty Response object with HTTP 204 status on successful deletion.
+
+        Raises:
+            Http404: If the task does not exist or was not created by the user.
         """
-        todo = Task.objects.get(pk=pk, author=request.user)
+        todo = get_object_or_404(Task, pk=pk, author=request.user)
         todo.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
    
     
+class TaskSummaryView(APIView):
+    """
+    View returning the board summary: task counts per status and priority, the number
+    of urgent tasks and the next deadline of an open urgent task.
+    * Requires token authentication.
+    * Only authenticated users are able to access this view.
+    The summary is computed with one grouped aggregate query and cached under a key
+    containing the task table's change counter, so any task write invalidates it.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    cache_timeout = 300
+
+    def get(self, request, format=None):
+        """
+        Return the board summary.
+        Args:
+            request: The HTTP request object.
+            format: The format of the response (defaults to JSON if None).
+        Returns:
+            Response containing 'total', 'by_status', 'by_priority', 'urgent' and
+            'upcoming_deadline' (None if there is no open urgent task due from today on).
+        """
+        today = date.today()
+        counter = ChangeCounter.objects.filter(name='task').values_list('value', flat=True).first() or 0
+        key = f'tasks-summary:{counter}:{today.isoformat()}'
+        summary = cache.get(key)
+        if summary is None:
+            summary = self.compute(today)
+            cache.set(key, summary, self.cache_timeout)
+        return Response(summary)
+
+    def compute(self, today):
+        """
+        Compute the summary with one query grouped by status and priority.
+        Args:
+            today (datetime.date): Deadlines before this day are not upcoming.
+        Returns:
+            dict: The summary.
+        """
+        groups = (Task.objects.order_by().values('status', 'priority')
+                  .annotate(count=Count('id'), next_due=Min('due_date', filter=Q(due_date__gte=today))))
+        summary = {'total': 0, 'by_status': {}, 'by_priority': {}, 'urgent': 0, 'upcoming_deadline': None}
+        for group in groups:
+            summary['total'] += group['count']
+            summary['by_status'][group['status']] = summary['by_status'].get(group['status'], 0) + group['count']
+            priority = group['priority'] or ''
+            summary['by_priority'][priority] = summary['by_priority'].get(priority, 0) + group['count']
+            if priority.lower() == 'urgent':
+                summary['urgent'] += group['count']
+                if group['status'] != 'done' and group['next_due'] is not None:
+                    upcoming = summary['upcoming_deadline']
+                    summary['upcoming_deadline'] = group['next_due'] if upcoming is None else min(upcoming, group['next_due'])
+        return summary
+
+
+class TaskMoveView(APIView):
+    """
+    View to move a card to another column and/or rank.
+    * Requires token authentication.
+    * Only authenticated users are able to access this view.
+    Only ``status`` and ``position`` change, with one conditional UPDATE and without
+    reading the task first; the other cards of the column keep their ranks, unless the
+    ranks of the neighbours leave no room and the column is renumbered first.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk, format=None):
+        """
+        Move a Task specified by its id.
+        Args:
+            request: The HTTP request object with 'status' and/or a rank, see TaskMoveSerializer.
+            pk: The primary key of the Task to move.
+            format: The format of the response (defaults to JSON if None).
+        Returns:
+            Response with the new 'status', 'position' and 'version' of the task,
+            HTTP 400 for invalid data, HTTP 404 if the task does not exist and
+            HTTP 409 if the task changed since the given 'version'.
+        """
+        serializer = TaskMoveSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        changes = dict(serializer.validated_data)
+        condition = {'pk': pk}
+        if 'version' in changes:
+            condition['version'] = changes.pop('version')
+        renumber = 'renumber_after' in changes
+        after = changes.pop('renumber_after', None)
+        with transaction.atomic():
+            changes['version'] = next_version(scope='task')
+            if renumber:
+                column = changes.get('status') or Task.objects.filter(pk=pk).values_list('status', flat=True).first()
+                changes['position'] = renumber_column(column, after, pk, changes['version'])
+            moved = Task.objects.filter(**condition).update(**changes)
+            if not moved:
+                transaction.set_rollback(True)
+            else:
+                publish('task.updated', {'id': pk, 'version': changes['version'], 'fields': changes}, changes['version'])
+                if renumber:
+                    publish_sync(Task)
+        if not moved:
+            if 'version' in condition and Task.objects.filter(pk=pk).exists():
+                return Response({"message": "Task was changed in the meantime"}, status=status.HTTP_409_CONFLICT)
+            raise NotFound(detail="Task not found", code=404)
+        return Response({'id': pk, **changes})
+
+
+class TaskBulkView(APIView):
+    """
+    View to create, update and delete many Task instances in one request.
+    * Requires token authentication.
+    * Only authenticated users are able to access this view.
+    The body is a list of operations:
+    - {"op": "create", "data": {...}}
+    - {"op": "update", "id": 1, "data": {...}} (partial, only the given fields change)
+    - {"op": "delete", "id": 2}
+    All operations are validated first. If any of them is invalid nothing is written;
+    otherwise they are applied in one transaction with bulk_create, bulk_update and a
+    single DELETE, so the number of queries does not grow with the number of operations.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    max_operations = 5000
+    batch_size = 500
+
+    def post(self, request, format=None):
+        """
+        Validate and apply a batch of task operations.
+        Args:
+            request: The HTTP request object containing the list of operations.
+            format: The format of the response (defaults to JSON if None).
+        Returns:
+            Response with the new change ``version`` and one result per operation, in
+            request order, with HTTP 200 status on success. If any operation is invalid,
+            HTTP 400 with the per-operation errors and nothing applied.
+        """
+        operations = request.data
+        if not isinstance(operations, list):
+            return Response({"message": "Expected a list of operations"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > self.max_operations:
+            return Response({"message": f"At most {self.max_operations} operations per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        validated, errors = self.validate_operations(operations, request.user)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.apply_operations(validated, request.user))
+
+    def validate_operations(self, operations, user):
+        """
+        Validate all operations in a single pass.
+        Rows referenced by updates and deletes are loaded with one query each.
+        Args:
+            operations (list): The raw operations from the request body.
+            user (User): The requesting user, who must own the tasks to delete.
+        Returns:
+            tuple: The list of validated (op, instance or id, validated data) triples and
+            the list of errors, each with the index of the failing operation.
+        """
+        # Ids that are not plain integers (e.g. lists) are unhashable or never match a row,
+        # they are reported per operation below.
+        ids = {'update': set(), 'delete': set()}
+        for op in operations:
+            if isinstance(op, dict) and op.get('op') in ids and self.is_task_id(op.get('id')):
+                ids[op['op']].add(op['id'])
+        instances = Task.objects.in_bulk(list(ids['update']))
+        deletable = set(Task.objects.filter(pk__in=ids['delete'], author=user).values_list('pk', flat=True))
+        # One serializer per kind is reused for every row, so the fields are only built once.
+        creator, updater = TaskItemSerializer(), TaskItemSerializer(partial=True)
+        validated, errors, seen = [], [], set()
+        for index, operation in enumerate(operations):
+            kind = operation.get('op') if isinstance(operation, dict) else None
+            pk = operation.get('id') if kind in ('update', 'delete') else None
+            if kind in ('update', 'delete') and not self.is_task_id(pk):
+                errors.append({'index': index, 'errors': {'id': ['A valid integer is required.']}})
+                continue
+            if kind == 'create':
+                serializer, target = creator, None
+            elif kind == 'update' and pk in instances and pk not in seen:
+                seen.add(pk)
+                serializer, target = updater, instances[pk]
+            elif kind == 'delete' and pk in deletable and pk not in seen:
+                seen.add(pk)
+                validated.append((kind, pk, None))
+                continue
+            elif kind in ('update', 'delete'):
+                message = "Duplicate operation for this task" if pk in seen else "Task not found"
+                errors.append({'index': index, 'errors': {'id': [message]}})
+                continue
+            else:
+                errors.append({'index': index, 'errors': {'op': ['Expected "create", "update" or "delete"']}})
+                continue
+            try:
+                validated.append((kind, target, serializer.run_validation(operation.get('data'))))
+            except ValidationError as exc:
+                errors.append({'index': index, 'errors': exc.detail})
+        return validated, errors
+
+    def is_task_id(self, value):
+        """
+        Tell whether an operation references a task with a plain integer id.
+        Args:
+            value: The ``id`` of an operation, as sent.
+        Returns:
+            bool: True for integers other than booleans.
+        """
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def apply_operations(self, validated, user):
+        """
+        Apply validated operations in one transaction.
+        Args:
+            validated (list): The triples returned by validate_operations().
+            user (User): The requesting user, recorded as author of created tasks.
+        Returns:
+            dict: The new change ``version`` and one result per operation.
+        """
+        created, updated, deleted, fields, assignees, subtasks = [], [], [], set(), [], []
+        rewritten = {}
+        with transaction.atomic():
+            version = next_version(scope='task')
+            ends = column_ends({data['status'] for kind, target, data in validated
+                                if kind == 'create' and data.get('position') is None})
+            for kind, target, data in validated:
+                if kind == 'delete':
+                    deleted.append(target)
+                    continue
+                data = dict(data)
+                if 'assignees' in data:
+                    assignees.append((kind, len(created if kind == 'create' else updated), data.pop('assignees')))
+                if kind == 'create':
+                    if data.get('position') is None:
+                        data['position'] = ends[data['status']]
+                        ends[data['status']] += 1
+                    subtasks.append(parse_subtasks(data.get('subtasks')))
+                    created.append(Task(**data, author=user, version=version,
+                                        subtasks_total=len(subtasks[-1]),
+                                        subtasks_done=sum(subtask['done'] for subtask in subtasks[-1])))
+                else:
+                    if 'subtasks' in data:
+                        rewritten[target.pk] = parse_subtasks(data['subtasks'])
+                        data['subtasks_total'] = len(rewritten[target.pk])
+                        data['subtasks_done'] = sum(subtask['done'] for subtask in rewritten[target.pk])
+                    for field, value in data.items():
+                        setattr(target, field, value)
+                    target.version = version
+                    fields.update(data)
+                    updated.append(target)
+            Task.objects.bulk_create(created, batch_size=self.batch_size)
+            Subtask.objects.bulk_create(
+                [Subtask(task=task, **subtask) for task, parsed in zip(created, subtasks) for subtask in parsed],
+                batch_size=self.batch_size
+            )
+            if updated:
+                Task.objects.bulk_update(updated, sorted(fields | {'version'}), batch_size=self.batch_size)
+            replace_subtasks(rewritten, batch_size=self.batch_size)
+            if assignees:
+                self.replace_assignees(created, updated, assignees)
+            if deleted:
+                delete_tracked(Task.objects.filter(pk__in=deleted))
+            publish_sync(Task)
+        prefetch_related_objects(created + updated, 'assignees')
+        created_iter = iter(TaskItemSerializer(created, many=True).data)
+        updated_iter = iter(TaskItemSerializer(updated, many=True).data)
+        results = []
+        for kind, target, data in validated:
+            if kind == 'create':
+                results.append({'op': kind, 'status': status.HTTP_201_CREATED, 'data': next(created_iter)})
+            elif kind == 'update':
+                results.append({'op': kind, 'status': status.HTTP_200_OK, 'data': next(updated_iter)})
+            else:
+                results.append({'op': kind, 'status': status.HTTP_204_NO_CONTENT, 'id': target})
+        return {'version': version, 'results': results}
+
+    def replace_assignees(self, created, updated, assignees):
+        """
+        Replace the assignees of the written tasks with one DELETE and one INSERT.
+        Args:
+            created (list): The created tasks, with primary keys.
+            updated (list): The updated tasks.
+            assignees (list): Triples of (op, index into created/updated, contact ids).
+        """
+        tasks = [((created if kind == 'create' else updated)[index], kind, ids) for kind, index, ids in assignees]
+        TaskAssignment.objects.filter(task__in=[task for task, kind, ids in tasks if kind == 'update']).delete()
+        TaskAssignment.objects.bulk_create(
+            [TaskAssignment(task=task, contact_id=pk) for task, kind, ids in tasks for pk in ids],
+            batch_size=self.batch_size
+        )
+
+
+class ExportView(APIView):
+    """
+    Base view streaming a whole table as NDJSON (default) or CSV, chosen with ``?type=``.
+    * Requires token authentication.
+    * Only authenticated users are able to access this view.
+    Rows are read with a database cursor and serialized in chunks of ``chunk_size``,
+    so memory stays flat and the first bytes go out before the table is read to the end.
+    Under ASGI the body is an async iterator reading with the async ORM; a sync one
+    would be collected into a list by Django before sending.
+    ``?fields=``/``?exclude=`` select the columns like on the list views.
+    Attributes:
+        model (type): The exported model.
+        serializer_class (type): The serializer whose output is exported.
+        chunk_size (int): Rows fetched and serialized at once.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = ExportContentNegotiation
+    model = None
+    serializer_class = None
+    chunk_size = 2000
+    content_types = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv; charset=utf-8',
+    }
+
+    def get_queryset(self, request):
+        """
+        Return the rows to export, in a stable order.
+        Args:
+            request: The HTTP request object.
+        Returns:
+            QuerySet: The rows ordered by primary key.
+        """
+        return self.model.objects.order_by('pk')
+
+    def get(self, request, format=None):
+        """
+        Stream the export.
+        Args:
+            request: The HTTP request object.
+            format: Unused, the export type is given with ``?type=``.
+        Returns:
+            StreamingHttpResponse with the rows as an attachment, or HTTP 400 for an unknown type.
+        """
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in self.content_types:
+            return Response({"message": "Expected type=ndjson or type=csv"}, status=status.HTTP_400_BAD_REQUEST)
+        fields = self.serializer_class.requested_fields(request)
+        serializer = values_serializer(self.serializer_class).project(fields)
+        columns = fields or self.serializer_class.readable_field_names()
+        if isinstance(request._request, ASGIRequest):
+            chunks = aserialized_chunks(self.get_queryset(request), serializer, self.chunk_size)
+            lines = acsv_lines(chunks, columns) if export_type == 'csv' else andjson_lines(chunks)
+        else:
+            chunks = serialized_chunks(self.get_queryset(request), serializer, self.chunk_size)
+            lines = csv_lines(chunks, columns) if export_type == 'csv' else ndjson_lines(chunks)
+        response = StreamingHttpResponse(lines, content_type=self.content_types[export_type])
+        response['Content-Disposition'] = f'attachment; filename="{self.model._meta.verbose_name_plural}.{export_type}"'
+        return response
+
+
+class TaskExportView(ExportView):
+    """
+    View streaming the tasks, narrowed down by the filters of the task list (see filter_tasks).
+    """
+    model = Task
+    serializer_class = TaskItemSerializer
+
+    def get_queryset(self, request):
+        """
+        Return the filtered tasks ordered by id.
+        Args:
+            request: The HTTP request object.
+        Returns:
+            QuerySet: The tasks to export.
+        """
+        return filter_tasks(super().get_queryset(request), request.query_params)
+
+
+class ContactExportView(ExportView):
+    """
+    View streaming all contacts.
+    """
+    model = Contact
+    serializer_class = ContactSerializer
+
+
+class ImportView(APIView):
+    """
+    Base view importing an uploaded CSV or NDJSON file (multipart field ``file``).
+    * Requires token authentication.
+    * Only authenticated users are able to access this view.
+    The file is parsed as a stream and written in chunks with bulk_create inside one
+    transaction (see BoardImporter). If any row is invalid nothing is written, unless
+    ``?skip_invalid=true`` is given. The format is taken from ``?type=`` or the file name.
+    Attributes:
+        importer_class (type): The BoardImporter subclass doing the import.
+        batch_size (int): Rows validated and inserted at once.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    importer_class = None
+    batch_size = 1000
+
+    def post(self, request, format=None):
+        """
+        Import the uploaded file.
+        Args:
+            request: The HTTP request object with the upload in ``file``.
+            format: The format of the response (defaults to JSON if None).
+        Returns:
+            Response with 'created', 'error_count' and the per-row 'errors', with HTTP 200
+            status if rows were imported and HTTP 400 if the upload, its encoding or some rows were invalid.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"message": "Missing file"}, status=status.HTTP_400_BAD_REQUEST)
+        import_type = request.query_params.get('type') or upload.name.rpartition('.')[2].lower()
+        if import_type not in IMPORT_TYPES:
+            return Response({"message": "Expected type=ndjson or type=csv"}, status=status.HTTP_400_BAD_REQUEST)
+        skip_invalid = request.query_params.get('skip_invalid') == 'true'
+        importer = self.importer_class(self.batch_size, skip_invalid, request.user)
+        try:
+            result = importer.run(io.TextIOWrapper(upload.file, encoding='utf-8', newline=''), import_type)
+        except UnreadableInput as exc:
+            return Response({"message": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if result['error_count'] and not skip_invalid:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+
+class TaskImportView(ImportView):
+    """
+    View importing tasks; the uploading user becomes their author.
+    """
+    importer_class = TaskImporter
+
+
+class ContactImportView(ImportView):
+    """
+    View importing contacts.
+    """
+    importer_class = ContactImporter
+
+
 class LoginView(ObtainAuthToken):
     """
     View for handling user authentication requests by verifying email and password,
@@ -169,6 +711,7 @@ class LoginView(ObtainAuthToken):
         validating and deserializing input data. It handles email-based authentication.
     """
     serializer_class = EmailAuthTokenSerializer
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def post(self, request, *args, **kwargs):
         """
@@ -191,6 +734,11 @@ class LoginView(ObtainAuthToken):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         token, created = Token.objects.get_or_create(user=user)
+        if not created and is_expired(token):
+            token.delete()
+            token = Token.objects.create(user=user)
+        elif not created:
+            refresh_token(token)
         return Response({
             'token': token.key,
             'user_id': user.pk,
@@ -201,23 +749,30 @@ class LoginView(ObtainAuthToken):
 class LogoutView(APIView):
     """
     A view that handles log out operations for authenticated users.
-    This view handles POST requests to log out a user by clearing their session and
-    returning an HTTP 204 No Content status, indicating that the server successfully
-    processed the request, but is not returning any content.
+    This view handles POST requests to log out a user by revoking their API token,
+    clearing their session and returning an HTTP 204 No Content status, indicating
+    that the server successfully processed the request, but is not returning any content.
     Methods:
         post(request): Handles the POST request to log out a user.
     """
+    authentication_classes = [CachedTokenAuthentication, SessionAuthentication, BasicAuthentication]
+
     def post(self, request):
         """
         Handle the POST request to log out a user.
-        This method logs out the user by calling the `logout` function, which clears
-        the user's session. After the user is logged out, the method returns an empty
-        response with a 204 No Content status.
+        This method deletes the user's API token, which also drops it from the
+        authentication cache, and logs out the user by calling the `logout` function,
+        which clears the user's session. After the user is logged out, the method
+        returns an empty response with a 204 No Content status.
         Parameters:
             request (HttpRequest): The request object containing all the details of the request.
         Returns:
             Response: An HTTP Response object with status 204 No Content.
         """
+        if isinstance(request.auth, Token):
+            request.auth.delete()
+        elif request.user.is_authenticated:
+            Token.objects.filter(user=request.user).delete()
         logout(request)
         return Response(status=status.HTTP_204_NO_CONTENT)
     
@@ -227,9 +782,11 @@ class ContactView(APIView):
     Attributes:
         authentication_classes (list): List of authentication classes for this view.
         permission_classes (list): List of permission classes for this view.
+        response_cache (ResponseCache): Cache of the rendered contact lists.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    response_cache = ResponseCache(Contact)
     
     def post(self, request, *args, **kwargs):
         """
@@ -257,20 +814,44 @@ class ContactView(APIView):
             pk (int, optional): The primary key of the contact to retrieve.
             format (str, optional): The format of the response.
         Returns:
-            Response: HTTP response containing serialized data of the requested contact(s).
+            Response: HTTP response containing serialized data of the requested contact(s), limited
+            to the fields selected with ``?fields=``/``?exclude=`` and cached per user until a
+            contact changes, with ETag (and Last-Modified for the list), or 304 if the client's copy is current.
         Raises:
             NotFound: If the requested contact does not exist.
         """
         if pk:
+            if request.headers.get('If-None-Match'):
+                version = Contact.objects.filter(pk=pk).values_list('version', flat=True).first()
+                if version is not None:
+                    response = not_modified(request, detail_etag(request, Contact, pk, version))
+                    if response:
+                        return response
+            fields = ContactSerializer.requested_fields(request)
+            contacts = Contact.objects.only(*ContactSerializer.model_columns(fields), 'version') if fields else Contact.objects
             try:
-                user = Contact.objects.get(pk=pk)
-                serializer = ContactSerializer(user)
+                user = contacts.get(pk=pk)
+                serializer = ContactSerializer(user, fields=fields)
             except Contact.DoesNotExist:
                 raise NotFound(detail="User not found", code=404)
-        else:
-            users = Contact.objects.all()
-            serializer = ContactSerializer(users, many=True)  
-        return Response(serializer.data)
+            return set_validators(Response(serializer.data), detail_etag(request, Contact, pk, user.version))
+        return self.response_cache.fetch(request, lambda: self.list(request))
+
+    def list(self, request):
+        """
+        Compute the list of contacts.
+        Args:
+            request (HttpRequest): The HTTP request object.
+        Returns:
+            Response: HTTP response with the serialized contacts and their validators, or 304.
+        """
+        etag, last_modified = list_validators(request, Contact)
+        response = not_modified(request, etag, last_modified)
+        if response:
+            return response
+        serializer = values_serializer(ContactSerializer).project(ContactSerializer.requested_fields(request))
+        users = serializer.values(Contact.objects.all())
+        return set_validators(Response(serializer.serialize(users)), etag, last_modified)
     
     def put(self, request, pk=None, *args, **kwargs):
         """
@@ -299,6 +880,33 @@ class ContactView(APIView):
         else:
             return Response({"message": "Missing contact ID"}, status=status.HTTP_400_BAD_REQUEST)
     
+    def patch(self, request, pk=None, *args, **kwargs):
+        """
+        Handle PATCH requests to partially update an existing contact.
+        Only the submitted fields are validated and written.
+        Args:
+            request (HttpRequest): The HTTP request object.
+            pk (int, optional): The primary key of the contact to update.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+        Returns:
+            Response: HTTP response containing serialized data of the updated contact.
+        Raises:
+            NotFound: If the contact to be updated does not exist.
+            Response(status=status.HTTP_400_BAD_REQUEST): If the provided data is invalid.
+        """
+        if not pk:
+            return Response({"message": "Missing contact ID"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            contact = Contact.objects.get(pk=pk)
+        except Contact.DoesNotExist:
+            raise NotFound(detail="Contact not found", code=404)
+        serializer = ContactSerializer(contact, data=request.data, partial=True)
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     def delete(self, request, pk=None, *args, **kwargs):
         """
         Handle DELETE requests to delete an existing contact.
@@ -326,15 +934,23 @@ class ContactView(APIView):
 class SubtaskItemView(APIView):
     """
     A view to handle CRUD operations for individual subtasks.    
+    * Requires token authentication.
+    * Only authenticated users are able to access this view.
+    Every write refreshes the subtask counters of the affected task(s).
     Methods:
     - get(self, request, pk=None, format=None): Retrieve a single subtask or a list of all subtasks.
     - post(self, request, format=None): Create a new subtask.
     - put(self, request, pk, format=None): Update an existing subtask.
+    - patch(self, request, pk, format=None): Partially update an existing subtask.
     - delete(self, request, pk, format=None): Delete an existing subtask.
     """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
     def get(self, request, pk=None, format=None):
         """
         Retrieve a single subtask or a list of all subtasks.
+        The list can be restricted to one task with ``?task=<id>``.
         Args:
             request: The request object.
             pk (int, optional): The primary key of the subtask to retrieve. Defaults to None.
@@ -350,6 +966,11 @@ class SubtaskItemView(APIView):
                 raise NotFound(detail="Subtask not found", code=404)
         else:
             subtasks = Subtask.objects.all()
+            task = request.query_params.get('task')
+            if task:
+                if not task.isdigit():
+                    return Response({"task": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+                subtasks = subtasks.filter(task_id=int(task))
             serializer = SubtaskSerializer(subtasks, many=True)
         return Response(serializer.data)
     
@@ -364,7 +985,10 @@ class SubtaskItemView(APIView):
         """
         serializer = SubtaskSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                subtask = serializer.save()
+                refresh_subtask_counters([subtask.task_id])
+                publish_sync(Task)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -378,10 +1002,44 @@ class SubtaskItemView(APIView):
         Returns:
             Response: A JSON response containing the updated subtask data.
         """
-        subtask = Subtask.objects.get(pk=pk)
-        serializer = SubtaskSerializer(subtask, data=request.data)
+        return self.update(request, pk, partial=False)
+
+    def patch(self, request, pk, format=None):
+        """
+        Partially update an existing subtask, e.g. to check it off.
+        Args:
+            request: The request object.
+            pk (int): The primary key of the subtask to update.
+            format (str, optional): The format of the response. Defaults to None.
+        Returns:
+            Response: A JSON response containing the updated subtask data.
+        """
+        return self.update(request, pk, partial=True)
+
+    def update(self, request, pk, partial):
+        """
+        Validate and save changes to a subtask.
+        Args:
+            request: The request object.
+            pk (int): The primary key of the subtask to update.
+            partial (bool): Whether only the submitted fields are validated and written.
+        Returns:
+            Response: A JSON response containing the updated subtask data, or the
+            validation errors with HTTP 400 status.
+        Raises:
+            NotFound: If the subtask does not exist.
+        """
+        try:
+            subtask = Subtask.objects.get(pk=pk)
+        except Subtask.DoesNotExist:
+            raise NotFound(detail="Subtask not found", code=404)
+        previous_task = subtask.task_id
+        serializer = SubtaskSerializer(subtask, data=request.data, partial=partial)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+                refresh_subtask_counters([previous_task, subtask.task_id])
+                publish_sync(Task)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -395,6 +1053,146 @@ class SubtaskItemView(APIView):
         Returns:
             Response: An empty response indicating successful deletion.
         """
-        subtask = Subtask.objects.get(pk=pk)
-        subtask.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        try:
+            subtask = Subtask.objects.get(pk=pk)
+        except Subtask.DoesNotExist:
+            raise NotFound(detail="Subtask not found", code=404)
+        with transaction.atomic():
+            subtask.delete()
+            refresh_subtask_counters([subtask.task_id])
+            publish_sync(Task)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SubtaskBulkView(APIView):
+    """
+    View to toggle and/or reorder many subtasks in one request.
+    * Requires token authentication.
+    * Only authenticated users are able to access this view.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    max_items = 1000
+
+    def patch(self, request, format=None):
+        """
+        Apply a list of subtask changes, see SubtaskBatchItemSerializer.
+        The subtasks are loaded with one query and written with bulk_update; the
+        counters of all affected tasks are refreshed with one more UPDATE.
+        Args:
+            request: The request object containing the list of changes.
+            format (str, optional): The format of the response. Defaults to None.
+        Returns:
+            Response: The updated subtasks, HTTP 400 for invalid data and HTTP 404
+            if one of the subtasks does not exist. Nothing is written on errors.
+        """
+        if isinstance(request.data, list) and len(request.data) > self.max_items:
+            return Response({"message": f"At most {self.max_items} subtasks per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        serializer = SubtaskBatchItemSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        changes = {item.pop('id'): item for item in serializer.validated_data}
+        subtasks = Subtask.objects.in_bulk(list(changes))
+        missing = [pk for pk in changes if pk not in subtasks]
+        if missing:
+            raise NotFound(detail=f"Subtasks not found: {missing}", code=404)
+        fields = set()
+        for pk, item in changes.items():
+            for field, value in item.items():
+                setattr(subtasks[pk], field, value)
+            fields.update(item)
+        with transaction.atomic():
+            if fields:
+                Subtask.objects.bulk_update(subtasks.values(), sorted(fields))
+            refresh_subtask_counters(subtask.task_id for subtask in subtasks.values())
+            publish_sync(Task)
+        return Response(SubtaskSerializer(list(subtasks.values()), many=True).data)
+
+
+class SyncView(APIView):
+    """
+    Delta-sync endpoint returning everything that changed after a given version.
+    Clients remember the returned ``version`` and pass it as ``?since=`` on their
+    next poll, so a poll costs O(changes) instead of O(board size).
+    * Requires token authentication.
+    * Only authenticated users are able to access this view.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        """
+        Return tasks and contacts created, updated or deleted after ``since``.
+        Args:
+            request: The HTTP request object. ``since`` defaults to 0 (full sync).
+            format: The format of the response (defaults to JSON if None).
+        Returns:
+            Response containing the new high-water mark ``version``, the changed
+            ``tasks`` and ``contacts`` and the ids of ``deleted`` rows per model.
+            HTTP 400 if ``since`` is not a non-negative integer.
+        """
+        since = request.query_params.get('since', '0')
+        if not since.isdigit():
+            return Response({"since": ["A non-negative integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        since = int(since)
+        # Read the high-water mark first: every row stamped with a version up to it is committed.
+        version = current_version()
+        tasks = Task.objects.filter(version__gt=since).prefetch_related('assignees')
+        contacts = Contact.objects.filter(version__gt=since)
+        deleted = {'task': [], 'contact': []}
+        for model_name, object_id in Tombstone.objects.filter(version__gt=since).values_list('model_name', 'object_id'):
+            deleted[model_name].append(object_id)
+        return Response({
+            'version': version,
+            'tasks': TaskItemSerializer(tasks, many=True).data,
+            'contacts': ContactSerializer(contacts, many=True).data,
+            'deleted': {'tasks': deleted['task'], 'contacts': deleted['contact']},
+        })
+
+
+class EventsView(APIView):
+    """
+    Server-Sent Events stream of the changes on the board, replacing polling.
+    * Requires token authentication, from the Authorization header or, for browser
+      EventSource clients, from ``?token=``.
+    * Only authenticated users are able to access this view.
+    Events are ``task.created``/``task.updated`` and ``contact.created``/``contact.updated``
+    with the changed fields, ``*.deleted`` with the id, and ``sync`` for bulk changes,
+    which clients fetch from /sync/ with the last version they have seen. Event ids are
+    change versions: a client reconnecting with an older Last-Event-ID (or ``?since=``)
+    first gets a ``sync`` event. A client that does not keep up is sent ``evicted``
+    and disconnected (see EVENTS).
+    Under ASGI the stream waits on the event loop. Under WSGI it holds a worker thread
+    for as long as the client stays connected, so there it is answered with 503 unless
+    ``EVENTS['WSGI_STREAMS']`` allows some streams per process; keep that well below
+    the number of worker threads, or the streams starve the other requests.
+    """
+    authentication_classes = [CachedTokenAuthentication, QueryTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = ExportContentNegotiation
+
+    def get(self, request, format=None):
+        """
+        Open the event stream.
+        Args:
+            request: The HTTP request object.
+            format: Unused, the stream is always text/event-stream.
+        Returns:
+            StreamingHttpResponse with the event stream, or HTTP 503 if this process
+            already serves the maximum number of streams (for WSGI, WSGI_STREAMS).
+        """
+        options = get_event_settings()
+        broker = get_broker()
+        is_async = isinstance(request._request, ASGIRequest)
+        subscription = broker.subscribe([BOARD_CHANNEL], None if is_async else options['WSGI_STREAMS'])
+        if subscription is None:
+            return Response({"message": "Too many open event streams"}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={'Retry-After': str(options['RETRY'] // 1000 or 1)})
+        prelude = resync_frame(request.headers.get('Last-Event-ID') or request.query_params.get('since'))
+        stream = aevent_stream if is_async else event_stream
+        response = StreamingHttpResponse(stream(broker, subscription, options, prelude),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
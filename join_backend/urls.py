@@ -2,8 +2,14 @@
 from django.contrib import admin
 from django.urls import path
 from api.views import UserView
-from api.views import LoginView, LogoutView, TasksItemView, ContactView
+from api.views import LoginView, LogoutView, TasksItemView, TaskSummaryView, TaskMoveView, TaskBulkView, TaskExportView, TaskImportView, ContactView, ContactExportView, ContactImportView, SubtaskItemView, SubtaskBulkView, SyncView, EventsView
+from django.conf import settings
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from api.async_views import AsyncTasksItemView, AsyncContactView
+
+# Serve task and contact reads on the event loop when running under ASGI.
+task_view = AsyncTasksItemView if settings.ASYNC_VIEWS else TasksItemView
+contact_view = AsyncContactView if settings.ASYNC_VIEWS else ContactView
 
 
 urlpatterns = [
@@ -11,10 +17,22 @@ urlpatterns = [
     path('register/', UserView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
-    path('tasks/', TasksItemView.as_view(), name='tasks'),
-    path('tasks/<int:pk>/', TasksItemView.as_view(), name='task-detail'),
+    path('tasks/', task_view.as_view(), name='tasks'),
+    path('tasks/<int:pk>/', task_view.as_view(), name='task-detail'),
+    path('tasks/summary/', TaskSummaryView.as_view(), name='tasks-summary'),
+    path('tasks/<int:pk>/move/', TaskMoveView.as_view(), name='task-move'),
+    path('tasks/bulk/', TaskBulkView.as_view(), name='tasks-bulk'),
+    path('tasks/export/', TaskExportView.as_view(), name='tasks-export'),
+    path('tasks/import/', TaskImportView.as_view(), name='tasks-import'),
     path('users/', UserView.as_view(), name='user-list'),
     path('users/<int:pk>/', UserView.as_view(), name='user-detail'),
-    path('contacts/', ContactView.as_view(), name='contacts'),
-    path('contacts/<int:pk>/', ContactView.as_view(), name='contacts-detail'),
+    path('contacts/', contact_view.as_view(), name='contacts'),
+    path('contacts/<int:pk>/', contact_view.as_view(), name='contacts-detail'),
+    path('contacts/export/', ContactExportView.as_view(), name='contacts-export'),
+    path('contacts/import/', ContactImportView.as_view(), name='contacts-import'),
+    path('subtasks/', SubtaskItemView.as_view(), name='subtasks'),
+    path('subtasks/<int:pk>/', SubtaskItemView.as_view(), name='subtask-detail'),
+    path('subtasks/bulk/', SubtaskBulkView.as_view(), name='subtasks-bulk'),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('events/', EventsView.as_view(), name='events'),
 ] + staticfiles_urlpatterns()